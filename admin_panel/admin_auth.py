@@ -13,12 +13,6 @@ from database import async_session_maker
 from app.models.user import User
 from security import verify_password
 
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-SECRET_KEY = os.getenv("SECRET_KEY")
-
 
 class AdminAuth(AuthenticationBackend):
     async def login(self, request: Request) -> bool:
@@ -69,6 +63,3 @@ class AdminAuth(AuthenticationBackend):
         request.state.user = user
         return True
 
-
-# اطمینان حاصل کنید که متغیر SECRET_KEY را پاس می‌دهید، نه رشته "SECRET_KEY"
-authentication_backend = AdminAuth(secret_key=SECRET_KEY)
@@ -0,0 +1,67 @@
+# admin_panel/mount.py
+
+# این ماژول عمداً هیچ وابستگی به sqladmin / wtforms / jinja2 ندارد تا در حالت
+# lazy، بارگذاری پنل ادمین تا اولین درخواست به /admin عقب بیفتد.
+
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+
+ADMIN_BASE_URL = "/admin"
+ADMIN_STATIC_URL = "/admin_panel/static"
+ADMIN_STATIC_DIR = "admin_panel/static"
+
+
+def mount_admin_static(app: FastAPI) -> None:
+    """
+    فایل‌های استاتیک ادمین. باید روی اپلیکیشن بیرونی mount شود چون
+    قالب‌ها از url_for('admin_static', ...) استفاده می‌کنند.
+    """
+    app.mount(ADMIN_STATIC_URL, StaticFiles(directory=ADMIN_STATIC_DIR), name="admin_static")
+
+
+class LazyAdminApp:
+    """
+    ASGI app that builds the sqladmin application on its first request.
+
+    Mounted under the name "admin", so `url_for("admin:...")` keeps working once
+    the real admin exists (its routes are exposed through `routes`).
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._app = None
+
+    def _build(self):
+        if self._app is None:
+            from starlette.applications import Starlette
+            from admin_panel.setup import build_admin
+
+            # Admin خودش را روی یک اپ موقت mount می‌کند؛ ما فقط اپ داخلی آن را لازم داریم
+            self._app = build_admin(Starlette(), self.engine).admin
+        return self._app
+
+    @property
+    def routes(self):
+        return self._app.routes if self._app is not None else []
+
+    async def __call__(self, scope, receive, send):
+        await self._build()(scope, receive, send)
+
+
+def mount_admin(app: FastAPI, engine, mode: str) -> None:
+    """
+    اتصال پنل ادمین به اپلیکیشن بر اساس ADMIN_MODE:
+    - "eager": مانند قبل، هنگام import ساخته می‌شود.
+    - "lazy":  در اولین درخواست به /admin ساخته می‌شود.
+    - "off":   فقط API (مثلاً workerهای مخصوص ربات)؛ ادمین را جداگانه با
+               `uvicorn admin_panel.setup:create_admin_app --factory` اجرا کنید.
+    """
+    if mode == "off":
+        return
+    if mode == "eager":
+        from admin_panel.setup import init_admin
+        init_admin(app, engine)
+        return
+
+    app.mount(ADMIN_BASE_URL, LazyAdminApp(engine), name="admin")
+    mount_admin_static(app)
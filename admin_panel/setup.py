@@ -4,11 +4,10 @@ from fastapi import FastAPI
 from sqladmin import Admin
 # ما دیگر نیازی به ایمپورت Environment از Jinja2 در اینجا نداریم
 # from jinja2 import Environment, FileSystemLoader
-import os
 
-from fastapi.staticfiles import StaticFiles
-from admin_panel.dependencies import admin_instance
 from admin_panel import views
+from admin_panel.mount import ADMIN_BASE_URL, mount_admin_static
+from setting import settings
 from .admin_auth import AdminAuth
 from .views import DashboardView, UsersAdmin, DrugsAdmin, DiseaseTypeAdmin, OrdersAdmin, OrderListAdmin,BotMessageAdmin
 
@@ -21,18 +20,19 @@ def format_price_filter(value: float) -> str:
     return f"{int(value):,}"
 
 
-def init_admin(app: FastAPI, engine):
+def build_admin(app, engine) -> Admin:
     """
-    پنل ادمین را راه‌اندازی و به اپلیکیشن FastAPI متصل می‌کند.
+    پنل ادمین را می‌سازد و روی `app` (در مسیر /admin) mount می‌کند.
+    فایل‌های استاتیک جداگانه با mount_admin_static اضافه می‌شوند.
     """
-    SECRET_KEY = os.getenv("SECRET_KEY")
-    authentication_backend = AdminAuth(secret_key=SECRET_KEY)
+    authentication_backend = AdminAuth(secret_key=settings.SECRET_KEY)
 
     # --- مرحله ۱: ساخت آبجکت ادمین با پارامتر قدیمی ---
     # در نسخه‌های قدیمی، به جای jinja_env از templates_dir استفاده می‌کنیم
     admin = Admin(
         app,
         engine,
+        base_url=ADMIN_BASE_URL,
         authentication_backend=authentication_backend,
         templates_dir="admin_panel/templates"  # <-- تغییر: استفاده از پارامتر قدیمی
 
@@ -44,14 +44,6 @@ def init_admin(app: FastAPI, engine):
     # و فیلتر خود را به آن اضافه می‌کنیم.
     admin.templates.env.filters["format_price"] = format_price_filter
 
-
-    # اتصال فایل‌های استاتیک ادمین (این بخش بدون تغییر باقی می‌ماند)
-    app.mount(
-        "/admin_panel/static",
-        StaticFiles(directory="admin_panel/static"),
-        name="admin_static"
-    )
-
     # افزودن تمام View ها به پنل ادمین
     admin.add_view(DashboardView)
     admin.add_view(UsersAdmin)
@@ -60,7 +52,27 @@ def init_admin(app: FastAPI, engine):
     admin.add_view(OrdersAdmin)
     admin.add_view(OrderListAdmin)
     admin.add_view(BotMessageAdmin)
+    return admin
+
+
+def init_admin(app: FastAPI, engine):
+    """
+    پنل ادمین را راه‌اندازی و به اپلیکیشن FastAPI متصل می‌کند.
+    """
+    build_admin(app, engine)
 
+    # اتصال فایل‌های استاتیک ادمین
+    mount_admin_static(app)
 
 
+def create_admin_app() -> FastAPI:
+    """
+    اپلیکیشن مستقل پنل ادمین برای استقرار جداگانه از API:
+
+        uvicorn admin_panel.setup:create_admin_app --factory --port 8001
+    """
+    from database import engine
 
+    admin_app = FastAPI(title="Fazel Pharma Admin", docs_url=None, redoc_url=None, openapi_url=None)
+    init_admin(admin_app, engine)
+    return admin_app
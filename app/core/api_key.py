@@ -0,0 +1,93 @@
+# app/core/api_key.py
+
+import hashlib
+import hmac
+import secrets
+from dataclasses import dataclass
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import SnapshotCache
+from app.models.api_client import ApiClient
+from setting import settings
+
+# ============================================================
+#  احراز هویت کلاینت‌های ماشینی (ربات تلگرام و ...) با API key
+# ============================================================
+# کلید با HMAC-SHA256 (نه bcrypt) هش می‌شود: کلیدها ۲۵۶ بیت تصادفی هستند و
+# brute-force روی آن‌ها بی‌معنی است، پس یک هش سریع و کلیددار کافی است و
+# بررسی هر درخواست چند میکروثانیه طول می‌کشد.
+
+API_KEY_PREFIX = "fp_"
+# تعداد کاراکترهای ابتدای کلید که به عنوان شناسه عمومی ذخیره می‌شود (ستون api_key)
+PUBLIC_PREFIX_LENGTH = 12
+
+ANY = "*"
+
+
+def hash_api_key(api_key: str) -> str:
+    secret = (settings.API_KEY_SECRET or settings.SECRET_KEY).encode()
+    return hmac.new(secret, api_key.encode(), hashlib.sha256).hexdigest()
+
+
+def generate_api_key() -> tuple[str, str, str]:
+    """Return (full key, public prefix, digest). Only the last two are stored."""
+    api_key = API_KEY_PREFIX + secrets.token_urlsafe(32)
+    return api_key, api_key[:PUBLIC_PREFIX_LENGTH], hash_api_key(api_key)
+
+
+@dataclass(frozen=True)
+class ApiClientPrincipal:
+    """
+    Authenticated machine client. Used in place of `User` by the auth
+    dependencies; RoleChecker checks its scopes instead of a role.
+    """
+    id: int
+    client_name: str
+    scopes: frozenset[tuple[str, str]]
+    digest: str
+    is_active: bool = True
+
+    def allows(self, form_name: str, action: str) -> bool:
+        return any(
+            form in (form_name, ANY) and granted in (action, ANY)
+            for form, granted in self.scopes
+        )
+
+
+def parse_scopes(scopes: list[str]) -> frozenset[tuple[str, str]]:
+    """'Patient:view' -> ('Patient', 'view'); a bare '*' grants everything."""
+    parsed = set()
+    for scope in scopes:
+        form, _, action = scope.partition(":")
+        parsed.add((form, action or ANY))
+    return frozenset(parsed)
+
+
+async def _load_active_clients(session: AsyncSession) -> dict[str, ApiClientPrincipal]:
+    rows = (await session.exec(select(ApiClient).where(ApiClient.is_active == True))).all()  # noqa: E712
+    return {
+        row.hashed_api_key: ApiClientPrincipal(
+            id=row.id, client_name=row.client_name, scopes=parse_scopes(row.scopes or []),
+            digest=row.hashed_api_key,
+        )
+        for row in rows
+    }
+
+
+# { hashed_api_key: ApiClientPrincipal } فقط کلاینت‌های فعال.
+# ابطال یا تغییر scope در همین worker فوراً invalidate می‌کند و worker های دیگر
+# حداکثر بعد از API_CLIENT_CACHE_SECONDS آن را می‌بینند.
+api_client_cache = SnapshotCache("api_client", _load_active_clients, settings.API_CLIENT_CACHE_SECONDS)
+
+
+async def authenticate_api_key(api_key: str, session: AsyncSession) -> ApiClientPrincipal | None:
+    """Resolve a presented key to its client; no query while the cache is fresh."""
+    digest = hash_api_key(api_key)
+    clients = await api_client_cache.get(session)
+    principal = clients.get(digest)
+    # مقایسه زمان-ثابت، مستقل از اینکه lookup دیکشنری چطور انجام شده
+    if principal is None or not hmac.compare_digest(principal.digest, digest):
+        return None
+    return principal
@@ -0,0 +1,378 @@
+# app/core/archive.py
+
+import asyncio
+import gzip
+import hashlib
+import logging
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+import orjson
+from sqlalchemy import Date, DateTime, Enum, Numeric, delete, exists, func, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.enums import PatientStatus
+from app.models import Message, Order, OrderList, Patient, PaymentList
+from app.models.archive import ArchivedCase, ArchiveSegment
+from app.models.base import get_current_utc_naive
+from app.models.order import OrderStatusEnum
+from database import async_session_maker, engine
+from setting import settings
+
+logger = logging.getLogger("app.archive")
+
+# ============================================================
+#  بایگانی سرد پرونده‌های بسته
+# ============================================================
+# بیمارانی که بیش از ARCHIVE_AFTER_DAYS روز در وضعیت completed مانده‌اند و همه
+# سفارش‌هایشان تحویل یا رد شده، دسته‌ای (ARCHIVE_BATCH_PATIENTS بیمار) در یک فایل
+# JSONL فشرده (gzip) در ARCHIVE_DIR نوشته می‌شوند: سفارش‌ها، اقلام، پرداخت‌ها و
+# پیام‌ها، هر ردیف یک خط {"table", "patient_id", "row"}. خود ردیف بیمار می‌ماند.
+#
+# ترتیب کار برای هر فایل:
+#   ۱. خواندن ردیف‌ها در یک snapshot (REPEATABLE READ) و نوشتن فایل .part،
+#      fsync و تغییر نام؛ sha256 هم کنار فایل (.sha256) و در tbl_ArchiveSegment؛
+#   ۲. ثبت tbl_ArchiveSegment و tbl_ArchivedCase؛
+#   ۳. حذف ردیف‌ها با کلیدهای خود فایل، ARCHIVE_DELETE_CHUNK ردیف در هر تراکنش
+#      (قفل کوتاه). ردیفی حذف می‌شود که updated_at آن با نسخه بایگانی شده یکی
+#      باشد؛ تغییری که بعد از snapshot آمده از دست نمی‌رود. اگر پروسه وسط حذف
+#      بمیرد، اجرای بعدی از روی همان فایل ادامه می‌دهد (purged_at خالی است).
+# بازگرداندن (POST /archive/patients/{id}/rehydrate) ردیف‌ها را با همان کلیدها
+# برمی‌گرداند و پرونده تا ARCHIVE_AFTER_DAYS روز دوباره بایگانی نمی‌شود.
+
+# کلید advisory lock کار بایگانی (عدد ثابت دلخواه)؛ در طول اجرا روی یک اتصال نگه داشته می‌شود
+ARCHIVE_LOCK_KEY = 4_707_001
+ROWS_PER_WRITE = 1000
+CLOSED_ORDER_STATUSES = (OrderStatusEnum.DELIVERED, OrderStatusEnum.REJECTED)
+
+
+class ArchiveIntegrityError(Exception):
+    """The segment file is missing or does not match its recorded sha256."""
+
+
+class CaseNotReady(Exception):
+    """The segment of the case is still being purged; restore it after the archive job finishes."""
+
+
+@dataclass(frozen=True)
+class ArchivedTable:
+    name: str  # نام در فایل
+    model: type
+    key: str
+    counter: str  # ستون شمارنده در tbl_ArchivedCase
+
+    @property
+    def table(self):
+        return self.model.__table__
+
+
+# ترتیب درج هنگام بازگرداندن؛ حذف به ترتیب عکس (اول فرزندها)
+ARCHIVED_TABLES = (
+    ArchivedTable("order", Order, "order_id", "orders"),
+    ArchivedTable("order_item", OrderList, "order_list_id", "order_items"),
+    ArchivedTable("payment", PaymentList, "payment_list_id", "payments"),
+    ArchivedTable("message", Message, "messages_id", "messages"),
+)
+_BY_NAME = {item.name: item for item in ARCHIVED_TABLES}
+
+
+def archive_path(file_name: str) -> Path:
+    return Path(settings.ARCHIVE_DIR) / file_name
+
+
+# ------------------------------------------------------------
+#  تبدیل ردیف به JSON و برعکس
+# ------------------------------------------------------------
+
+def _encode_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _encode_line(name: str, patient_id: int, row: dict) -> bytes:
+    return orjson.dumps({"table": name, "patient_id": patient_id, "row": row}, default=_encode_default) + b"\n"
+
+
+def _decoder(column):
+    column_type = column.type
+    if isinstance(column_type, DateTime):
+        return datetime.fromisoformat
+    if isinstance(column_type, Date):
+        return date.fromisoformat
+    if isinstance(column_type, Enum) and column_type.enum_class is not None:
+        return column_type.enum_class
+    if isinstance(column_type, Numeric) and column_type.asdecimal:
+        return Decimal
+    return None
+
+
+def decode_row(archived: ArchivedTable, row: dict) -> dict:
+    """Values of one archived row as the column types expect them (datetime, enum, Decimal)."""
+    values = {}
+    for column in archived.table.columns:
+        if column.name not in row:
+            continue
+        value = row[column.name]
+        decoder = _decoder(column)
+        values[column.name] = decoder(value) if decoder is not None and value is not None else value
+    return values
+
+
+# ------------------------------------------------------------
+#  فایل‌ها (در thread تا event loop بسته نشود)
+# ------------------------------------------------------------
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _finish_file(part: Path, final: Path) -> tuple[str, int]:
+    with open(part, "rb+") as file:
+        os.fsync(file.fileno())
+    os.replace(part, final)
+    checksum = _sha256(final)
+    final.with_name(final.name + ".sha256").write_text(f"{checksum}  {final.name}\n")
+    return checksum, final.stat().st_size
+
+
+def _read_lines(path: Path, patient_id: int | None = None):
+    with gzip.open(path, "rb") as file:
+        for line in file:
+            record = orjson.loads(line)
+            if patient_id is None or record["patient_id"] == patient_id:
+                yield record
+
+
+def _read_versions(path: Path) -> dict[str, list[tuple[int, str]]]:
+    """(key, updated_at) of every row of a segment, by table."""
+    versions = defaultdict(list)
+    for record in _read_lines(path):
+        archived = _BY_NAME[record["table"]]
+        versions[archived.name].append((record["row"][archived.key], record["row"]["updated_at"]))
+    return versions
+
+
+def _read_case(path: Path, patient_id: int) -> dict[str, list[dict]]:
+    rows = defaultdict(list)
+    for record in _read_lines(path, patient_id):
+        rows[record["table"]].append(record["row"])
+    return rows
+
+
+async def verify_segment(segment: ArchiveSegment) -> Path:
+    path = archive_path(segment.file_name)
+    if not path.exists():
+        raise ArchiveIntegrityError(f"Archive segment {segment.file_name} is missing")
+    if await asyncio.to_thread(_sha256, path) != segment.sha256:
+        raise ArchiveIntegrityError(f"Archive segment {segment.file_name} does not match its sha256")
+    return path
+
+
+# ------------------------------------------------------------
+#  نوشتن segment
+# ------------------------------------------------------------
+
+async def select_closed_cases(session: AsyncSession, limit: int) -> list[int]:
+    """Patients whose case is closed long enough and still has rows in the hot tables."""
+    cutoff = get_current_utc_naive() - timedelta(days=settings.ARCHIVE_AFTER_DAYS)
+    statement = (
+        select(Patient.patient_id)
+        .where(
+            Patient.patient_status == PatientStatus.COMPLETED,
+            Patient.status_changed_at < cutoff,
+            exists().where(Order.patient_id == Patient.patient_id) | exists().where(
+                Message.patient_id == Patient.patient_id),
+            ~exists().where(Order.patient_id == Patient.patient_id,
+                            Order.order_status.not_in(CLOSED_ORDER_STATUSES)),
+            ~exists().where(ArchivedCase.patient_id == Patient.patient_id, ArchivedCase.restored_at >= cutoff),
+        )
+        .order_by(Patient.patient_id)
+        .limit(limit)
+    )
+    return list((await session.exec(statement)).all())
+
+
+def _rows_statement(archived: ArchivedTable, patient_ids: list[int]):
+    table = archived.table
+    if "patient_id" in table.c:
+        statement = select(table, table.c.patient_id.label("archive_patient_id")).where(
+            table.c.patient_id.in_(patient_ids))
+    else:
+        orders = Order.__table__
+        statement = (
+            select(table, orders.c.patient_id.label("archive_patient_id"))
+            .join(orders, orders.c.order_id == table.c.order_id)
+            .where(orders.c.patient_id.in_(patient_ids))
+        )
+    return statement.order_by(table.c[archived.key])
+
+
+async def write_segment() -> ArchiveSegment | None:
+    """Write the next batch of closed cases to a new segment file. None when there is nothing to archive."""
+    directory = Path(settings.ARCHIVE_DIR)
+    await asyncio.to_thread(directory.mkdir, parents=True, exist_ok=True)
+    async with async_session_maker() as session:
+        # همه جدول‌ها از یک snapshot، تا سفارش و اقلامش با هم بخوانند
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        patient_ids = await select_closed_cases(session, settings.ARCHIVE_BATCH_PATIENTS)
+        if not patient_ids:
+            return None
+        snapshot_at = get_current_utc_naive()
+        file_name = f"segment-{snapshot_at:%Y%m%dT%H%M%S}-{patient_ids[0]}.jsonl.gz"
+        part = directory / (file_name + ".part")
+        counts: dict[int, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        row_count = 0
+        output = await asyncio.to_thread(gzip.open, part, "wb")
+        try:
+            for archived in ARCHIVED_TABLES:
+                columns = [column.name for column in archived.table.columns]
+                result = await session.stream(
+                    _rows_statement(archived, patient_ids).execution_options(yield_per=ROWS_PER_WRITE))
+                async for rows in result.partitions(ROWS_PER_WRITE):
+                    chunk = []
+                    for row in rows:
+                        mapping = row._mapping
+                        patient_id = mapping["archive_patient_id"]
+                        chunk.append(_encode_line(archived.name, patient_id, {name: mapping[name] for name in columns}))
+                        counts[patient_id][archived.counter] += 1
+                    await asyncio.to_thread(output.write, b"".join(chunk))
+                    row_count += len(chunk)
+        finally:
+            await asyncio.to_thread(output.close)
+        await session.rollback()
+    checksum, size = await asyncio.to_thread(_finish_file, part, directory / file_name)
+
+    async with async_session_maker() as session:
+        segment = ArchiveSegment(file_name=file_name, sha256=checksum, row_count=row_count, size_bytes=size,
+                                 snapshot_at=snapshot_at)
+        session.add(segment)
+        await session.flush()
+        for patient_id in patient_ids:
+            session.add(ArchivedCase(patient_id=patient_id, segment_id=segment.id, **counts[patient_id]))
+        await session.commit()
+    logger.info("Archived %d patients (%d rows) to %s", len(patient_ids), row_count, file_name)
+    return segment
+
+
+# ------------------------------------------------------------
+#  حذف ردیف‌های بایگانی شده
+# ------------------------------------------------------------
+
+def _delete_statement(archived: ArchivedTable, versions: list[tuple[int, str]]):
+    table = archived.table
+    pairs = [(key, datetime.fromisoformat(updated_at)) for key, updated_at in versions]
+    statement = delete(table).where(tuple_(table.c[archived.key], table.c.updated_at).in_(pairs))
+    if archived.model is Order:
+        # سفارشی که بعد از snapshot قلم یا پرداخت تازه گرفته می‌ماند
+        for child in (OrderList.__table__, PaymentList.__table__):
+            statement = statement.where(~exists().where(child.c.order_id == table.c.order_id))
+    return statement
+
+
+async def purge_segment(segment: ArchiveSegment) -> int:
+    """Delete the hot rows stored in a segment, in short transactions. Returns the rows deleted."""
+    path = await verify_segment(segment)
+    versions = await asyncio.to_thread(_read_versions, path)
+    removed = 0
+    chunk_size = settings.ARCHIVE_DELETE_CHUNK
+    for archived in reversed(ARCHIVED_TABLES):
+        rows = versions.get(archived.name, [])
+        for start in range(0, len(rows), chunk_size):
+            async with async_session_maker() as session:
+                result = await session.execute(_delete_statement(archived, rows[start:start + chunk_size]))
+                await session.commit()
+            removed += result.rowcount
+    async with async_session_maker() as session:
+        db_segment = await session.get(ArchiveSegment, segment.id)
+        db_segment.purged_at = get_current_utc_naive()
+        await session.commit()
+    return removed
+
+
+async def archive_closed_cases() -> int:
+    """
+    One run of the archive job: finish segments left half purged, then archive
+    batches until no closed case is left. Returns the number of segments written.
+    Skipped when another worker holds the lock.
+    """
+    written = 0
+    async with engine.connect() as connection:
+        connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        locked = (await connection.execute(select(func.pg_try_advisory_lock(ARCHIVE_LOCK_KEY)))).scalar_one()
+        if not locked:
+            return 0
+        try:
+            async with async_session_maker() as session:
+                pending = (await session.exec(
+                    select(ArchiveSegment).where(ArchiveSegment.purged_at.is_(None)).order_by(ArchiveSegment.id)
+                )).all()
+            for segment in pending:
+                await purge_segment(segment)
+            while (segment := await write_segment()) is not None:
+                removed = await purge_segment(segment)
+                logger.info("Removed %d archived rows of %s from the hot tables", removed, segment.file_name)
+                written += 1
+        finally:
+            await connection.execute(select(func.pg_advisory_unlock(ARCHIVE_LOCK_KEY)))
+    return written
+
+
+async def run_archive() -> None:
+    """Lifespan task: archive closed cases periodically (disabled when ARCHIVE_AFTER_DAYS is 0)."""
+    if settings.ARCHIVE_AFTER_DAYS <= 0:
+        return
+    while True:
+        try:
+            await archive_closed_cases()
+        except Exception:
+            logger.exception("Archive run failed")
+        await asyncio.sleep(settings.ARCHIVE_INTERVAL)
+
+
+# ------------------------------------------------------------
+#  بازگرداندن
+# ------------------------------------------------------------
+
+async def rehydrate_patient(session: AsyncSession, patient_id: int) -> dict[str, int] | None:
+    """
+    Put the archived rows of a patient back into the hot tables (rows that are
+    still there are left as they are). Returns the number of cases and of
+    restored rows per table, or None when the patient has no archived case.
+    The caller commits.
+    """
+    cases = (await session.exec(
+        select(ArchivedCase, ArchiveSegment)
+        .join(ArchiveSegment, ArchiveSegment.id == ArchivedCase.segment_id)
+        .where(ArchivedCase.patient_id == patient_id, ArchivedCase.restored_at.is_(None))
+        .order_by(ArchivedCase.id)
+    )).all()
+    if not cases:
+        return None
+    if any(segment.purged_at is None for _, segment in cases):
+        raise CaseNotReady(f"The archive of patient {patient_id} is still being written")
+
+    restored = {"cases": len(cases), **{archived.counter: 0 for archived in ARCHIVED_TABLES}}
+    now = get_current_utc_naive()
+    for case, segment in cases:
+        path = await verify_segment(segment)
+        rows = await asyncio.to_thread(_read_case, path, patient_id)
+        for archived in ARCHIVED_TABLES:
+            values = [decode_row(archived, row) for row in rows.get(archived.name, [])]
+            for start in range(0, len(values), ROWS_PER_WRITE):
+                result = await session.execute(
+                    insert(archived.table).values(values[start:start + ROWS_PER_WRITE]).on_conflict_do_nothing())
+                restored[archived.counter] += result.rowcount
+        case.restored_at = now
+        session.add(case)
+    return restored
@@ -0,0 +1,116 @@
+# app/core/cache.py
+
+import asyncio
+import json
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.metrics import record_cache_hit, record_cache_miss
+from app.models.bot_message import BotMessage
+from app.models.disease_type import DiseaseType
+from app.models.drug import Drug
+from app.models.drug_map import DrugMap
+from app.schemas.bot_message import BotMessageRead
+from app.schemas.drug import DrugRead
+from setting import settings
+
+# ============================================================
+#  کش جداول کوچک و پرخواندنی (درون حافظه هر worker)
+# ============================================================
+# روت‌های نوشتن همان worker کش را فوراً invalidate می‌کنند. تغییرات worker های
+# دیگر یا پنل ادمین حداکثر بعد از CACHE_TTL_SECONDS دیده می‌شوند.
+
+# همه کش‌های ساخته شده (برای warm-up و ریست بعد از fork)
+ALL_CACHES: list["SnapshotCache"] = []
+
+
+class SnapshotCache:
+    """
+    Whole-table snapshot built by `loader(session)`.
+
+    Reloaded on the first read after `ttl` seconds or after `invalidate()`.
+    Concurrent misses share one reload. Every instance registers itself in
+    ALL_CACHES.
+    """
+
+    def __init__(self, name: str, loader: Callable[[AsyncSession], Awaitable[Any]], ttl: float):
+        self.name = name
+        self._loader = loader
+        self._ttl = ttl
+        self._value: Any = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+        ALL_CACHES.append(self)
+
+    def _fresh(self) -> bool:
+        return self._value is not None and time.monotonic() < self._expires_at
+
+    async def get(self, session: AsyncSession) -> Any:
+        if self._fresh():
+            record_cache_hit(self.name)
+            return self._value
+
+        async with self._lock:
+            # شاید درخواست دیگری همین الان کش را پر کرده باشد
+            if self._fresh():
+                record_cache_hit(self.name)
+                return self._value
+
+            record_cache_miss(self.name)
+            generation = self._generation
+            value = await self._loader(session)
+            self._value = value
+            # اگر وسط بارگذاری invalidate شده، این نسخه را تازه حساب نکن
+            self._expires_at = time.monotonic() + self._ttl if generation == self._generation else 0.0
+            return value
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._expires_at = 0.0
+
+    def clear(self) -> None:
+        self.invalidate()
+        self._value = None
+
+
+# ------------------------------------------------------------
+#  پیام‌های ربات: { message_key: BotMessageRead-dict } + نسخه کاتالوگ
+# ------------------------------------------------------------
+
+@dataclass(frozen=True)
+class BotMessageCatalog:
+    messages: dict[str, dict]
+    # هش محتوا: در همه worker ها یکسان است و ربات با آن می‌فهمد کش خودش کهنه شده یا نه
+    version: str
+
+
+async def _load_bot_messages(session: AsyncSession) -> BotMessageCatalog:
+    rows = (await session.exec(select(BotMessage))).all()
+    messages = {row.message_key: BotMessageRead.model_validate(row).model_dump(mode="json") for row in rows}
+    digest = zlib.crc32(json.dumps(messages, sort_keys=True, ensure_ascii=False).encode())
+    return BotMessageCatalog(messages=messages, version=f"{digest:08x}")
+
+
+# ------------------------------------------------------------
+#  کاتالوگ دارو: { diseases_type_id: [DrugRead-dict, ...] }
+#  (همه انواع بیماری کلید دارند، حتی بدون دارو؛ نبودن کلید یعنی 404)
+# ------------------------------------------------------------
+
+async def _load_drug_catalog(session: AsyncSession) -> dict[int, list[dict]]:
+    catalog: dict[int, list[dict]] = {
+        disease_type_id: [] for disease_type_id in (await session.exec(select(DiseaseType.diseases_type_id))).all()
+    }
+    statement = select(DrugMap.diseases_type_id, Drug).join(DrugMap, Drug.drugs_id == DrugMap.drugs_id)
+    for disease_type_id, drug in (await session.exec(statement)).all():
+        catalog.setdefault(disease_type_id, []).append(DrugRead.model_validate(drug).model_dump(mode="json"))
+    return catalog
+
+
+bot_message_cache = SnapshotCache("bot_message", _load_bot_messages, settings.CACHE_TTL_SECONDS)
+drug_catalog_cache = SnapshotCache("drug_catalog", _load_drug_catalog, settings.CACHE_TTL_SECONDS)
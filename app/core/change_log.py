@@ -0,0 +1,142 @@
+# app/core/change_log.py
+
+import asyncio
+import logging
+from datetime import timedelta
+
+from sqlalchemy import delete, func, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.enums import PatientStatus
+from app.models.base import get_current_utc_naive
+from app.models.change_log import ChangeLog
+from app.models.order import OrderStatusEnum
+from app.models.payment_list import PaymentStatusEnum
+from database import async_session_maker
+from setting import settings
+
+logger = logging.getLogger("app.change_log")
+
+# ============================================================
+#  فید تغییرات (GET /changes)
+# ============================================================
+# trigger های app/models/change_log.py برای هر insert/update/delete روی سفارش،
+# پرداخت، بیمار و پیام یک ردیف در tbl_ChangeLog می‌نویسند (حتی UPDATE های دسته‌ای
+# و پنل ادمین). کلاینت با since=<آخرین seq> فقط تغییرات جدید را می‌گیرد.
+#
+# seq در خود trigger داده نمی‌شود: تراکنشی که شماره کوچک‌تر گرفته ممکن است دیرتر
+# commit شود و کلاینتی که از روی آن رد شده آن را از دست بدهد. به جای آن ردیف‌ها
+# وقتی شماره می‌گیرند که تراکنششان قطعاً تمام شده (txid کمتر از xmin snapshot)،
+# آن هم زیر یک advisory lock تا زمان commit؛ پس هر seq جدید از همه seq های قابل
+# مشاهده بزرگ‌تر است. هزینه: یک تراکنش طولانی باز، فید را تا پایانش نگه می‌دارد.
+
+# کلید advisory lock شماره‌گذاری (عدد ثابت دلخواه)
+SEQUENCE_LOCK_KEY = 4_303_001
+SEQUENCE_BATCH_SIZE = 5000
+CLEANUP_BATCH_SIZE = 1000
+CLEANUP_INTERVAL = 3600.0
+
+# trigger نام ذخیره شده enum را می‌نویسد (SENT)؛ API مقدار آن را برمی‌گرداند (Sent)
+STATUS_ENUMS = {"order": OrderStatusEnum, "payment": PaymentStatusEnum, "patient": PatientStatus}
+
+_ASSIGN_SEQUENCE = text("""
+UPDATE "tbl_ChangeLog" AS c
+SET seq = n.seq
+FROM (
+    SELECT id, nextval('"seq_tbl_ChangeLog"') AS seq
+    FROM (
+        SELECT id FROM "tbl_ChangeLog"
+        WHERE seq IS NULL AND txid < txid_snapshot_xmin(txid_current_snapshot())
+        ORDER BY id
+        LIMIT :batch
+    ) AS finished
+) AS n
+WHERE c.id = n.id
+""")
+
+
+async def assign_sequence() -> int:
+    """
+    Number the change rows of finished transactions. Skipped when another
+    worker is already doing it. Returns the number of rows numbered.
+    """
+    async with async_session_maker() as session:
+        locked = (await session.exec(select(func.pg_try_advisory_xact_lock(SEQUENCE_LOCK_KEY)))).one()
+        if not locked:
+            return 0
+        result = await session.execute(_ASSIGN_SEQUENCE, {"batch": SEQUENCE_BATCH_SIZE})
+        await session.commit()
+        return result.rowcount
+
+
+async def read_changes(session: AsyncSession, since: int, limit: int, entities: list[str] | None = None,
+                       patient_id: int | None = None) -> tuple[list[ChangeLog], int, bool]:
+    """
+    Changes with seq > since, oldest first. Returns (changes, next_since, has_more).
+    next_since moves past filtered-out rows too, so a filtered client does not
+    scan them again.
+    """
+    # head اول خوانده می‌شود و ردیف‌ها به آن محدود می‌شوند: هر دو از یک نقطه
+    head = (await session.exec(select(func.max(ChangeLog.seq)))).one() or 0
+    if since > 0:
+        oldest = (await session.exec(select(func.min(ChangeLog.seq)))).one()
+        if oldest is not None and since < oldest - 1:
+            raise ChangesExpired()
+
+    statement = select(ChangeLog).where(ChangeLog.seq > since, ChangeLog.seq <= head)
+    if entities:
+        statement = statement.where(ChangeLog.entity.in_(entities))
+    if patient_id is not None:
+        statement = statement.where(ChangeLog.patient_id == patient_id)
+    changes = list((await session.exec(statement.order_by(ChangeLog.seq).limit(limit + 1))).all())
+
+    has_more = len(changes) > limit
+    if has_more:
+        changes = changes[:limit]
+        return changes, changes[-1].seq, True
+    return changes, max(since, head), False
+
+
+def api_status(change: ChangeLog) -> str | None:
+    kind = STATUS_ENUMS.get(change.entity)
+    if kind is None or change.status is None or change.status not in kind.__members__:
+        return change.status
+    return kind[change.status].value
+
+
+class ChangesExpired(Exception):
+    """`since` points at changes that were already purged; the client must resync."""
+
+
+async def purge_old_changes() -> int:
+    """Delete changes older than CHANGE_LOG_RETENTION_DAYS; the newest row is always kept."""
+    removed = 0
+    cutoff = get_current_utc_naive() - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS)
+    while True:
+        async with async_session_maker() as session:
+            newest = select(func.max(ChangeLog.seq)).scalar_subquery()
+            old = (
+                select(ChangeLog.id)
+                .where(ChangeLog.changed_at < cutoff, ChangeLog.seq.is_not(None), ChangeLog.seq < newest)
+                .order_by(ChangeLog.seq)
+                .limit(CLEANUP_BATCH_SIZE)
+                .scalar_subquery()
+            )
+            result = await session.execute(delete(ChangeLog).where(ChangeLog.id.in_(old)))
+            await session.commit()
+        removed += result.rowcount
+        if result.rowcount < CLEANUP_BATCH_SIZE:
+            return removed
+
+
+async def run_change_log_cleanup() -> None:
+    """Lifespan task: purge old changes every CLEANUP_INTERVAL seconds."""
+    while True:
+        try:
+            removed = await purge_old_changes()
+            if removed:
+                logger.info("Removed %d old change log rows", removed)
+        except Exception:
+            logger.exception("Change log cleanup failed")
+        await asyncio.sleep(CLEANUP_INTERVAL)
@@ -0,0 +1,102 @@
+# app/core/conditional.py
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any
+
+from fastapi import Request, Response, status
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.negotiation import response_format
+
+# ============================================================
+#  درخواست‌های شرطی (ETag / Last-Modified -> 304 Not Modified)
+# ============================================================
+# نسخه هر ردیف از (شناسه، updated_at) و نسخه هر لیست از (تعداد، آخرین updated_at)
+# ساخته می‌شود. روت‌ها اول این نسخه را با یک کوئری سبک (بدون relationship) می‌خوانند؛
+# اگر با هدر کلاینت یکی بود 304 برمی‌گردد و ردیف اصلاً load نمی‌شود.
+
+# پاسخ‌ها به کاربر وابسته‌اند: proxy ها ذخیره نکنند و کلاینت همیشه revalidate کند
+CACHE_CONTROL = "private, no-cache"
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: datetime | None
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": CACHE_CONTROL}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified.replace(tzinfo=timezone.utc), usegmt=True)
+        return headers
+
+    def matches(self, request: Request) -> bool:
+        """RFC 9110: If-None-Match wins; If-Modified-Since is only used without it."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            # مقایسه weak: W/ در هر دو طرف نادیده گرفته می‌شود
+            ours = self.etag.removeprefix("W/")
+            return any(tag.strip().removeprefix("W/") == ours for tag in if_none_match.split(","))
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is None or self.last_modified is None:
+            return False
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        # تاریخ HTTP دقت ثانیه دارد
+        return self.last_modified.replace(microsecond=0) <= since
+
+    def not_modified(self) -> Response:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=self.headers)
+
+    def apply(self, response: Response) -> None:
+        response.headers.update(self.headers)
+
+
+def make_validators(*parts: Any) -> Validators:
+    # weak ETag چون بدنه ممکن است فشرده شود ولی محتوا همان است. قالب انتخاب شده
+    # (JSON / MessagePack) جزو ETag است تا بدنه یک قالب با 304 برای قالب دیگر استفاده نشود
+    digest = hashlib.blake2b(repr((response_format.get(), *parts)).encode(), digest_size=12).hexdigest()
+    stamps = [part for part in parts if isinstance(part, datetime)]
+    return Validators(etag=f'W/"{digest}"', last_modified=max(stamps) if stamps else None)
+
+
+async def row_validators(session: AsyncSession, key, *stamps, where) -> Validators | None:
+    """
+    Validators of one row from a light query: `key` and the `stamps` columns
+    (updated_at, or scalar subqueries over child rows) filtered by `where`.
+    Returns None when the row does not exist.
+    """
+    row = (await session.exec(select(key, *stamps).where(where))).first()
+    if row is None:
+        return None
+    return make_validators(*row)
+
+
+async def collection_validators(session: AsyncSession, request: Request, *models) -> Validators:
+    """
+    Validators of a list endpoint: row count and latest updated_at of each table
+    the response reads, plus the query string (offset/limit give different bodies).
+    A delete changes the count, an insert/update the latest updated_at.
+    """
+    # همه جدول‌ها در یک کوئری (یک رفت و برگشت)
+    columns = []
+    for model in models:
+        columns += [
+            select(func.count()).select_from(model).scalar_subquery(),
+            select(func.max(model.updated_at)).scalar_subquery(),
+        ]
+    parts = (await session.exec(select(*columns))).one()
+    return make_validators(request.url.path, request.url.query, *parts)
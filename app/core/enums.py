@@ -49,4 +49,10 @@ class PackageTypeEnum(str, enum.Enum):
     نوع پکیج درمانی بیمار
     """
     ECONOMIC = "economic"   # اقتصادی
-    PREMIUM = "premium"     # پریمیوم (ویژه)
\ No newline at end of file
+    PREMIUM = "premium"     # پریمیوم (ویژه)
+
+class OutboxStatusEnum(str, enum.Enum):
+    """وضعیت رویدادهای صف خروجی (tbl_Outbox)"""
+    PENDING = "pending"   # منتظر ارسال (یا تلاش دوباره بعد از خطا)
+    DONE = "done"         # با موفقیت تحویل شد
+    DEAD = "dead"         # بعد از OUTBOX_MAX_ATTEMPTS یا خطای دائمی کنار گذاشته شد
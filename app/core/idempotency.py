@@ -0,0 +1,307 @@
+# app/core/idempotency.py
+
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from fastapi import Depends, Header, HTTPException, Request, Response, status
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.api_key import ApiClientPrincipal
+from app.core.negotiation import response_format
+from app.models.base import get_current_utc_naive
+from app.models.idempotency_key import IdempotencyKey
+from database import async_session_maker
+from security import get_current_active_user
+from setting import settings
+
+logger = logging.getLogger("app.idempotency")
+
+# ============================================================
+#  Idempotency-Key برای درخواست‌های ساخت (سفارش، پرداخت)
+# ============================================================
+# ربات درخواست‌هایی را که timeout شده‌اند دوباره می‌فرستد. با هدر Idempotency-Key:
+# - درخواست اول کلید را در tbl_IdempotencyKey رزرو می‌کند و اجرا می‌شود؛ پاسخ آن
+#   قبل از ارسال به کلاینت ذخیره می‌شود (IdempotencyMiddleware)؛
+# - تکرار همان درخواست پاسخ ذخیره شده را بدون اجرای دوباره روت برمی‌گرداند؛
+# - تکرار در حین اجرای درخواست اول 409 و همان کلید با درخواست دیگر (مسیر، query string،
+#   بدنه یا قالب پاسخ Accept) 422 می‌گیرد.
+# پاسخ‌های 5xx ذخیره نمی‌شوند و کلید آزاد می‌شود تا تکرار دوباره اجرا شود.
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+# کلید رزرو شده در request.state؛ middleware بعد از پایان روت آن را می‌خواند
+IDEMPOTENCY_STATE = "idempotency_reservation"
+
+CLEANUP_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    content_type: str | None
+    body: bytes
+    expires_at: datetime
+
+
+@dataclass(frozen=True)
+class Reservation:
+    id: int
+    cache_key: tuple[str, str]
+    request_hash: str
+
+
+class IdempotentReplay(Exception):
+    """Raised by the dependency when a stored response must be returned instead of running the route."""
+
+    def __init__(self, stored: StoredResponse):
+        self.stored = stored
+
+
+async def replay_stored_response(request: Request, exc: IdempotentReplay) -> Response:
+    stored = exc.stored
+    headers = {REPLAYED_HEADER: "true"}
+    return Response(content=stored.body, status_code=stored.status_code, media_type=stored.content_type,
+                    headers=headers)
+
+
+class _FrontCache:
+    """Per-worker LRU of completed responses; the table stays the source of truth."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items: OrderedDict[tuple[str, str], StoredResponse] = OrderedDict()
+
+    def get(self, key: tuple[str, str]) -> StoredResponse | None:
+        stored = self._items.get(key)
+        if stored is None:
+            return None
+        if stored.expires_at <= get_current_utc_naive():
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return stored
+
+    def put(self, key: tuple[str, str], stored: StoredResponse) -> None:
+        self._items[key] = stored
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+front_cache = _FrontCache(settings.IDEMPOTENCY_CACHE_SIZE)
+
+
+def principal_of(current_user) -> str:
+    if isinstance(current_user, ApiClientPrincipal):
+        return f"client:{current_user.id}"
+    # User و TokenPrincipal هر دو user_id دارند
+    return f"user:{current_user.user_id}"
+
+
+def _stored(row: IdempotencyKey) -> StoredResponse:
+    return StoredResponse(request_hash=row.request_hash, status_code=row.status_code,
+                          content_type=row.content_type, body=row.response_body or b"", expires_at=row.expires_at)
+
+
+def _check_same_request(request_hash: str, stored_hash: str) -> None:
+    if request_hash != stored_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"{IDEMPOTENCY_HEADER} was already used for a different request.",
+        )
+
+
+def _in_progress() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"A request with this {IDEMPOTENCY_HEADER} is still being processed. Retry later.",
+    )
+
+
+class Idempotent:
+    """
+    Dependency for mutating routes. Without the header it does nothing.
+    Must come after the auth dependency so keys are scoped per principal.
+    """
+
+    async def __call__(
+            self,
+            request: Request,
+            current_user=Depends(get_current_active_user),
+            idempotency_key: str | None = Header(default=None, alias=IDEMPOTENCY_HEADER, max_length=255),
+    ) -> None:
+        if not idempotency_key:
+            return
+
+        body = await request.body()
+        # قالب پاسخ هم جزو درخواست است: replay همان content_type ذخیره شده را برمی‌گرداند
+        request_hash = hashlib.sha256(b"\0".join((
+            request.method.encode(), request.url.path.encode(), request.url.query.encode(),
+            response_format.get().encode(), body,
+        ))).hexdigest()
+        cache_key = (principal_of(current_user), idempotency_key)
+
+        stored = front_cache.get(cache_key)
+        if stored is not None:
+            _check_same_request(request_hash, stored.request_hash)
+            raise IdempotentReplay(stored)
+
+        now = get_current_utc_naive()
+        async with async_session_maker() as session:
+            statement = select(IdempotencyKey).where(
+                IdempotencyKey.principal == cache_key[0], IdempotencyKey.key == idempotency_key)
+            row = (await session.exec(statement)).one_or_none()
+
+            if row is not None and row.expires_at <= now:
+                await session.delete(row)
+                await session.commit()
+                row = None
+
+            if row is not None:
+                _check_same_request(request_hash, row.request_hash)
+                if row.status_code is not None:
+                    stored = _stored(row)
+                    front_cache.put(cache_key, stored)
+                    raise IdempotentReplay(stored)
+                if row.updated_at > now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS):
+                    raise _in_progress()
+                # رزرو رها شده (worker در حین اجرا از کار افتاده): همین درخواست آن را ادامه می‌دهد.
+                # UPDATE شرطی تا از دو تکرار همزمان فقط یکی برنده شود
+                result = await session.exec(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.id == row.id, IdempotencyKey.updated_at == row.updated_at)
+                    .values(updated_at=now)
+                )
+                await session.commit()
+                if result.rowcount != 1:
+                    raise _in_progress()
+            else:
+                row = IdempotencyKey(
+                    principal=cache_key[0], key=idempotency_key, request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS),
+                )
+                session.add(row)
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    # درخواست همزمان دیگری همین الان کلید را رزرو کرد
+                    await session.rollback()
+                    raise _in_progress()
+
+        setattr(request.state, IDEMPOTENCY_STATE, Reservation(id=row.id, cache_key=cache_key, request_hash=request_hash))
+
+
+async def _save(reservation: Reservation, status_code: int, content_type: str | None, body: bytes) -> None:
+    expires_at = get_current_utc_naive() + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+    async with async_session_maker() as session:
+        await session.exec(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.id == reservation.id)
+            .values(status_code=status_code, content_type=content_type, response_body=body, expires_at=expires_at)
+        )
+        await session.commit()
+    front_cache.put(reservation.cache_key, StoredResponse(
+        request_hash=reservation.request_hash, status_code=status_code, content_type=content_type, body=body,
+        expires_at=expires_at))
+
+
+async def _release(reservation: Reservation) -> None:
+    async with async_session_maker() as session:
+        await session.exec(delete(IdempotencyKey).where(IdempotencyKey.id == reservation.id))
+        await session.commit()
+
+
+class IdempotencyMiddleware:
+    """
+    Stores the response of requests whose key was reserved by `Idempotent`.
+    The body is held back until it is stored, so a client never sees a
+    response that a retry could not replay. Must be inside the compression
+    middleware so the stored body is the plain one.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or IDEMPOTENCY_HEADER.lower() not in Headers(scope=scope):
+            await self.app(scope, receive, send)
+            return
+
+        start: Message | None = None
+        chunks: list[bytes] = []
+        finished = False
+
+        def reservation() -> Reservation | None:
+            return scope.get("state", {}).get(IDEMPOTENCY_STATE)
+
+        async def capture(message: Message) -> None:
+            nonlocal start, finished
+            # بدون هدر معتبر، یا وقتی پاسخ قبل از رزرو کلید ساخته شده (401، 409، replay ...)
+            if reservation() is None or message["type"] not in ("http.response.start", "http.response.body"):
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            if start["status"] < 500:
+                content_type = Headers(raw=start["headers"]).get("content-type")
+                await _save(reservation(), start["status"], content_type, body)
+            else:
+                await _release(reservation())
+            finished = True
+            await send(start)
+            await send({"type": "http.response.body", "body": body, "more_body": False})
+
+        try:
+            await self.app(scope, receive, capture)
+        except Exception:
+            if reservation() is not None and not finished:
+                await _release(reservation())
+            raise
+
+
+async def purge_expired_keys() -> int:
+    """Delete expired keys in small batches (short locks). Returns the number of rows removed."""
+    removed = 0
+    while True:
+        async with async_session_maker() as session:
+            expired = (
+                select(IdempotencyKey.id)
+                .where(IdempotencyKey.expires_at <= get_current_utc_naive())
+                .limit(CLEANUP_BATCH_SIZE)
+                .scalar_subquery()
+            )
+            result = await session.exec(delete(IdempotencyKey).where(IdempotencyKey.id.in_(expired)))
+            await session.commit()
+        removed += result.rowcount
+        if result.rowcount < CLEANUP_BATCH_SIZE:
+            return removed
+
+
+async def run_idempotency_cleanup() -> None:
+    """Lifespan task: purge expired keys every IDEMPOTENCY_CLEANUP_INTERVAL seconds."""
+    while True:
+        try:
+            removed = await purge_expired_keys()
+            if removed:
+                logger.info("Removed %d expired idempotency keys", removed)
+        except Exception:
+            logger.exception("Idempotency key cleanup failed")
+        await asyncio.sleep(settings.IDEMPOTENCY_CLEANUP_INTERVAL)
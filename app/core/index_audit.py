@@ -0,0 +1,153 @@
+# app/core/index_audit.py
+"""
+Index audit: every foreign key and every column in FILTERED_COLUMNS must be
+the leading column(s) of an index, both in SQLModel.metadata and in the live
+database (invalid indexes left by a failed CREATE INDEX CONCURRENTLY do not
+count).
+
+    python -m app.core.index_audit                  # metadata + live DB; exit code 1 on problems
+    python -m app.core.index_audit --metadata-only  # no database needed (CI)
+"""
+
+import argparse
+import asyncio
+import sys
+from dataclasses import dataclass
+
+from sqlalchemy import Table, text
+from sqlmodel import SQLModel
+
+# همه مدل‌ها باید در metadata باشند (مثل migrations/env.py)
+import app.models  # noqa: F401
+from app.models.api_client import ApiClient  # noqa: F401
+from app.models.archive import ArchiveSegment, ArchivedCase  # noqa: F401
+from app.models.change_log import ChangeLog  # noqa: F401
+from app.models.idempotency_key import IdempotencyKey  # noqa: F401
+from app.models.outbox import OutboxEvent  # noqa: F401
+from app.models.status_history import StatusHistory, StatusRollup  # noqa: F401
+
+# ستون‌هایی که کوئری‌های پرتکرار روی آن‌ها فیلتر می‌کنند (foreign key ها خودکار بررسی می‌شوند)
+FILTERED_COLUMNS: dict[str, tuple[tuple[str, ...], ...]] = {
+    "tbl_Patient": (("telegram_id",), ("patient_status",)),
+    "tbl_User": (("telegram_id",), ("mobile_number",)),
+    "tbl_Order": (("patient_id",),),
+    "tbl_PaymentList": (("order_id",),),
+    "tbl_OrderList": (("order_id",),),
+    "tbl_Message": (("patient_id",),),
+    "tbl_BotMessage": (("message_key",),),
+    "tbl_Outbox": (("status",),),
+    "tbl_IdempotencyKey": (("expires_at",),),
+    "tbl_StatusHistory": (("changed_at",),),
+}
+
+_LIVE_INDEXES = text("""
+SELECT t.relname AS table_name, i.indisvalid AS valid, i.indpred IS NOT NULL AS partial, ix.relname AS index_name,
+       array(SELECT a.attname FROM unnest(i.indkey) WITH ORDINALITY AS k(attnum, n)
+             JOIN pg_attribute a ON a.attrelid = t.oid AND a.attnum = k.attnum
+             ORDER BY k.n) AS columns
+FROM pg_index i
+JOIN pg_class t ON t.oid = i.indrelid
+JOIN pg_class ix ON ix.oid = i.indexrelid
+WHERE t.relnamespace = current_schema()::regnamespace
+""")
+
+_LIVE_TABLES = text("SELECT relname FROM pg_class WHERE relnamespace = current_schema()::regnamespace "
+                    "AND relkind IN ('r', 'p')")
+
+
+@dataclass(frozen=True)
+class Requirement:
+    table: str
+    columns: tuple[str, ...]
+    reason: str  # "foreign key -> tbl_X" یا "filtered column"
+
+
+def _covers(index_columns: tuple[str, ...], columns: tuple[str, ...]) -> bool:
+    # ترتیب ستون‌ها در ابتدای index مهم نیست، فقط باید همه در ابتدا باشند
+    return set(index_columns[:len(columns)]) == set(columns)
+
+
+def requirements(metadata=SQLModel.metadata) -> list[Requirement]:
+    found: dict[tuple[str, frozenset[str]], Requirement] = {}
+    for table in metadata.sorted_tables:
+        for foreign_key in table.foreign_key_constraints:
+            columns = tuple(column.name for column in foreign_key.columns)
+            found.setdefault((table.name, frozenset(columns)), Requirement(
+                table.name, columns, f"foreign key -> {foreign_key.referred_table.name}"))
+        for columns in FILTERED_COLUMNS.get(table.name, ()):
+            found.setdefault((table.name, frozenset(columns)), Requirement(table.name, columns, "filtered column"))
+    return list(found.values())
+
+
+def metadata_indexes(table: Table) -> list[tuple[str, ...]]:
+    """Column lists of the full (non-partial) indexes, primary key and unique constraints of a model."""
+    indexes = [tuple(column.name for column in table.primary_key.columns)]
+    for index in table.indexes:
+        if index.dialect_options["postgresql"].get("where") is None:
+            indexes.append(tuple(column.name for column in index.columns))
+    for constraint in table.constraints:
+        if constraint.__class__.__name__ == "UniqueConstraint":
+            indexes.append(tuple(column.name for column in constraint.columns))
+    return indexes
+
+
+def audit_metadata(metadata=SQLModel.metadata) -> list[str]:
+    problems = []
+    for requirement in requirements(metadata):
+        table = metadata.tables[requirement.table]
+        if not any(_covers(index, requirement.columns) for index in metadata_indexes(table)):
+            problems.append(f"model {requirement.table}({', '.join(requirement.columns)}): "
+                            f"no index ({requirement.reason})")
+    return problems
+
+
+async def audit_database(connection, metadata=SQLModel.metadata) -> list[str]:
+    problems = []
+    live_tables = set((await connection.execute(_LIVE_TABLES)).scalars())
+    live: dict[str, list[tuple[str, ...]]] = {}
+    for row in (await connection.execute(_LIVE_INDEXES)).mappings():
+        if not row["valid"]:
+            problems.append(f"database {row['table_name']}: index {row['index_name']} is INVALID "
+                            f"(failed concurrent build); drop and recreate it")
+            continue
+        if not row["partial"]:
+            live.setdefault(row["table_name"], []).append(tuple(row["columns"]))
+    missing = set()
+    for requirement in requirements(metadata):
+        if requirement.table not in live_tables:
+            if requirement.table not in missing:
+                missing.add(requirement.table)
+                problems.append(f"database {requirement.table}: table missing (migrations not applied?)")
+            continue
+        if not any(_covers(index, requirement.columns) for index in live.get(requirement.table, [])):
+            problems.append(f"database {requirement.table}({', '.join(requirement.columns)}): "
+                            f"no index ({requirement.reason})")
+    return problems
+
+
+async def run_audit(metadata_only: bool = False) -> list[str]:
+    problems = audit_metadata()
+    if not metadata_only:
+        from database import engine
+        async with engine.connect() as connection:
+            problems += await audit_database(connection)
+        await engine.dispose()
+    return problems
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fail when a foreign key or filtered column has no index.")
+    parser.add_argument("--metadata-only", action="store_true", help="check the models only, not the live DB")
+    args = parser.parse_args()
+    problems = asyncio.run(run_audit(args.metadata_only))
+    for problem in problems:
+        print(problem)
+    if problems:
+        print(f"{len(problems)} index problem(s)", file=sys.stderr)
+        return 1
+    print("All foreign keys and filtered columns are indexed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
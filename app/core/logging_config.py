@@ -1,12 +1,104 @@
 # app/core/logging_config.py
 
+import atexit
+import copy
+import json
+import logging
 import logging.config
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
+from setting import settings
+
 # مسیر پایه پروژه:
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 LOGS_DIR = BASE_DIR / "logs"
-LOGS_DIR.mkdir(parents=True, exist_ok=True)
+
+# ============================================================
+#  صف مشترک لاگ‌ها
+# ============================================================
+# لاگرهای برنامه فقط رکورد را داخل این صف می‌گذارند (بدون I/O روی event loop)
+# و یک ترد پس‌زمینه (QueueListener) آن‌ها را در فایل و کنسول می‌نویسد.
+LOG_QUEUE: queue.SimpleQueue = queue.SimpleQueue()
+
+# نام لاگر داخلی که هندلرهای واقعی (فایل و کنسول) روی آن ساخته می‌شوند.
+# هیچ کدی مستقیماً روی این لاگر لاگ نمی‌نویسد.
+SINK_LOGGER_NAME = "app.core.logging.sink"
+
+_listener: QueueListener | None = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    """
+    Compact one-line JSON formatter for log shippers.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "where": f"{record.module}:{record.lineno}",
+            "msg": record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Per-logger sampling for noisy, low-severity records.
+
+    `rates` maps a logger name prefix to the fraction of records to keep
+    (e.g. {"uvicorn.access": 0.1}). The longest matching prefix wins.
+    WARNING and above are never dropped.
+    """
+
+    def __init__(self, rates: dict[str, float] | None = None):
+        super().__init__()
+        # طولانی‌ترین پیشوند اول بررسی می‌شود
+        self.rates = sorted((rates or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.rates or record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + "."):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class ExcInfoQueueHandler(QueueHandler):
+    """
+    QueueHandler that keeps exc_info on the queued record.
+
+    The stock prepare() formats the record on the caller's thread and clears
+    exc_info/exc_text, so RichHandler could not render a rich traceback and
+    JsonLineFormatter never saw the exception. Only the message is rendered
+    here (its args may change after the call); the traceback is formatted by
+    the sink handlers on the listener thread. The queue is in-process, so the
+    record does not need to be picklable.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+def make_queue_handler() -> QueueHandler:
+    """Factory used by dictConfig to build the non-blocking handler of every logger."""
+    handler = ExcInfoQueueHandler(LOG_QUEUE)
+    handler.addFilter(SamplingFilter(settings.LOG_SAMPLING))
+    return handler
+
 
 LOGGING_CONFIG = {
     "version": 1,
@@ -21,12 +113,15 @@ LOGGING_CONFIG = {
             "format": "%(asctime)s - %(name)s - %(levelname)s - "
                       "%(module)s:%(lineno)d - %(message)s",
         },
+        "json": {
+            "()": JsonLineFormatter,
+        },
     },
 
     "handlers": {
-        # هندلر مربوط به فایل‌ها (چرخان)
+        # هندلر مربوط به فایل‌ها (چرخان) - فقط توسط ترد QueueListener صدا زده می‌شود
         "file": {
-            "formatter": "file",
+            "formatter": "json" if settings.LOG_JSON else "file",
             "class": "logging.handlers.RotatingFileHandler",
             "filename": LOGS_DIR / "app.log",
             "maxBytes": 5 * 1024 * 1024,   # 5 MB
@@ -42,22 +137,62 @@ LOGGING_CONFIG = {
             "rich_tracebacks": True,
             "level": "INFO",
         },
+
+        # تنها هندلری که به لاگرهای برنامه وصل است: رکورد را در صف می‌گذارد
+        "queue": {
+            "()": make_queue_handler,
+        },
     },
 
     "loggers": {
-        "uvicorn": {
+        SINK_LOGGER_NAME: {
             "handlers": ["console", "file"],
+            "level": "DEBUG",
+            "propagate": False,
+        },
+        "uvicorn": {
+            "handlers": ["queue"],
             "level": "INFO",
             "propagate": False,
         },
+        "uvicorn.access": {
+            "handlers": ["queue"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        "sqlalchemy.engine": {
+            "handlers": ["queue"],
+            "level": "INFO" if settings.DB_ECHO else "WARNING",
+            "propagate": False,
+        },
         "app": {
-            "handlers": ["console", "file"],
+            "handlers": ["queue"],
             "level": "DEBUG",
             "propagate": False,
         },
     },
 }
 
+
 def setup_logging():
-    """اعمال تنظیمات لاگینگ برنامه"""
+    """اعمال تنظیمات لاگینگ برنامه و راه‌اندازی ترد نویسنده لاگ‌ها"""
+    global _listener
+    if _listener is not None:
+        return
+
+    LOGS_DIR.mkdir(parents=True, exist_ok=True)
     logging.config.dictConfig(LOGGING_CONFIG)
+
+    sink_handlers = logging.getLogger(SINK_LOGGER_NAME).handlers
+    _listener = QueueListener(LOG_QUEUE, *sink_handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """توقف ترد لاگ و خالی کردن صف (هنگام خاموش شدن برنامه)"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    _listener = None
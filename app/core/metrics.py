@@ -0,0 +1,184 @@
+# app/core/metrics.py
+
+import time
+from bisect import bisect_left
+
+# ============================================================
+#  📊 متریک‌های درون حافظه (هر worker رجیستری مخصوص خودش را دارد)
+# ============================================================
+# همه به‌روزرسانی‌ها روی ترد event loop انجام می‌شوند، پس نیازی به lock نیست.
+
+# Prometheus default latency buckets (seconds)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Response size buckets (bytes)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Label used for requests that did not match any API route (404s, mounted apps, ...)
+UNROUTED = "<unrouted>"
+
+
+class Histogram:
+    """A fixed-bucket histogram; `counts[-1]` is the +Inf overflow bucket."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+# { (method, route, status): Histogram }
+REQUEST_LATENCY: dict[tuple[str, str, str], Histogram] = {}
+RESPONSE_SIZE: dict[tuple[str, str, str], Histogram] = {}
+IN_PROGRESS = {"value": 0}
+
+# { cache_name: [hits, misses] }
+CACHE_STATS: dict[str, list[int]] = {}
+
+
+def observe_request(method: str, route: str, status_code: int, duration: float, size: int) -> None:
+    """Record one finished HTTP request."""
+    key = (method, route, str(status_code))
+    latency = REQUEST_LATENCY.get(key)
+    if latency is None:
+        latency = REQUEST_LATENCY[key] = Histogram(LATENCY_BUCKETS)
+        RESPONSE_SIZE[key] = Histogram(SIZE_BUCKETS)
+    latency.observe(duration)
+    RESPONSE_SIZE[key].observe(size)
+
+
+def reset_metrics() -> None:
+    """Forget every series (a forked worker must not report its parent's numbers)."""
+    REQUEST_LATENCY.clear()
+    RESPONSE_SIZE.clear()
+    IN_PROGRESS["value"] = 0
+    CACHE_STATS.clear()
+
+
+def record_cache_hit(cache_name: str) -> None:
+    CACHE_STATS.setdefault(cache_name, [0, 0])[0] += 1
+
+
+def record_cache_miss(cache_name: str) -> None:
+    CACHE_STATS.setdefault(cache_name, [0, 0])[1] += 1
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that measures every HTTP request.
+
+    The route *template* (e.g. `/order/{order_id}`) is used as label, so the
+    number of series stays bounded no matter how many ids are requested.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        IN_PROGRESS["value"] += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            IN_PROGRESS["value"] -= 1
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNROUTED
+            observe_request(scope["method"], template, status_code, time.perf_counter() - start, size)
+
+
+# ------------------------------------------------------------
+#  خروجی با فرمت متنی Prometheus
+# ------------------------------------------------------------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _render_histograms(lines: list, name: str, help_text: str, series: dict) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route, status_code), hist in series.items():
+        cumulative = 0
+        for bound, count in zip(hist.buckets, hist.counts):
+            cumulative += count
+            lines.append(
+                f"{name}_bucket{_labels(method=method, route=route, status=status_code, le=bound)} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(method=method, route=route, status=status_code, le='+Inf')} {hist.count}")
+        lines.append(f"{name}_sum{_labels(method=method, route=route, status=status_code)} {hist.total}")
+        lines.append(f"{name}_count{_labels(method=method, route=route, status=status_code)} {hist.count}")
+
+
+def _render_pool(lines: list, engine) -> None:
+    pool = engine.sync_engine.pool
+    # NullPool/StaticPool آمار ندارند
+    if not hasattr(pool, "checkedout"):
+        return
+    for name, help_text, value in (
+            ("db_pool_size", "Configured size of the connection pool.", pool.size()),
+            ("db_pool_checked_out", "Connections currently in use.", pool.checkedout()),
+            ("db_pool_checked_in", "Idle connections in the pool.", pool.checkedin()),
+            ("db_pool_overflow", "Connections opened beyond pool_size.", pool.overflow()),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {value}")
+
+
+def render_prometheus(engine=None) -> str:
+    """Render every metric of this worker in the Prometheus text exposition format."""
+    lines: list[str] = []
+
+    lines.append("# HELP http_requests_total Total HTTP requests by route template and status.")
+    lines.append("# TYPE http_requests_total counter")
+    for (method, route, status_code), hist in REQUEST_LATENCY.items():
+        lines.append(f"http_requests_total{_labels(method=method, route=route, status=status_code)} {hist.count}")
+
+    _render_histograms(lines, "http_request_duration_seconds", "HTTP request latency.", REQUEST_LATENCY)
+    _render_histograms(lines, "http_response_size_bytes", "HTTP response body size.", RESPONSE_SIZE)
+
+    lines.append("# HELP http_requests_in_progress HTTP requests currently being served.")
+    lines.append("# TYPE http_requests_in_progress gauge")
+    lines.append(f"http_requests_in_progress {IN_PROGRESS['value']}")
+
+    if engine is not None:
+        _render_pool(lines, engine)
+
+    lines.append("# HELP cache_requests_total Cache lookups by result.")
+    lines.append("# TYPE cache_requests_total counter")
+    for cache_name, (hits, misses) in CACHE_STATS.items():
+        lines.append(f"cache_requests_total{_labels(cache=cache_name, result='hit')} {hits}")
+        lines.append(f"cache_requests_total{_labels(cache=cache_name, result='miss')} {misses}")
+
+    lines.append("# HELP cache_hit_ratio Fraction of cache lookups served from the cache.")
+    lines.append("# TYPE cache_hit_ratio gauge")
+    for cache_name, (hits, misses) in CACHE_STATS.items():
+        total = hits + misses
+        lines.append(f"cache_hit_ratio{_labels(cache=cache_name)} {hits / total if total else 0.0}")
+
+    return "\n".join(lines) + "\n"
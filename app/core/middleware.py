@@ -4,6 +4,8 @@ import time
 from fastapi import Request, Response
 from starlette.status import HTTP_429_TOO_MANY_REQUESTS
 
+from setting import settings
+
 # ============================================================
 #  🛡️ تنظیمات Rate Limit (حافظه موقت RAM)
 # ============================================================
@@ -13,8 +15,9 @@ from starlette.status import HTTP_429_TOO_MANY_REQUESTS
 REQUEST_HISTORY = {}
 
 # تنظیمات: حداکثر ۶۰ درخواست در هر ۶۰ ثانیه (میانگین ۱ در ثانیه)
-LIMIT_COUNT = 500
-LIMIT_SECONDS = 60
+# (قابل تنظیم از .env، مثلاً برای تست بار)
+LIMIT_COUNT = settings.RATE_LIMIT_COUNT
+LIMIT_SECONDS = settings.RATE_LIMIT_SECONDS
 
 
 async def global_rate_limit_middleware(request: Request, call_next):
@@ -0,0 +1,207 @@
+# app/core/negotiation.py
+
+import zlib
+from contextvars import ContextVar
+
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from setting import settings
+
+# ============================================================
+#  انتخاب قالب پاسخ (JSON / MessagePack) و فشرده‌سازی (br / gzip)
+# ============================================================
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_ALIASES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+# قالبی که کلاینت درخواست جاری می‌خواهد؛ FastJSONResponse.render آن را می‌خواند
+response_format: ContextVar[str] = ContextVar("response_format", default=JSON_MEDIA_TYPE)
+
+# پاسخ‌هایی که بدنه‌شان به Accept بستگی دارد (304 هم، چون ETag به قالب وابسته است)
+NEGOTIATED_TYPES = (JSON_MEDIA_TYPE, *MSGPACK_ALIASES)
+
+# انواعی که فشرده‌سازی ارزش دارد. text/event-stream عمداً نیست: هر رویداد باید فوراً برسد
+COMPRESSIBLE_TYPES = (JSON_MEDIA_TYPE, MSGPACK_MEDIA_TYPE, "application/javascript", "application/xml")
+NEVER_COMPRESS = ("text/event-stream",)
+
+
+def _qualities(header: str) -> dict[str, float]:
+    """'gzip;q=0.8, br' -> {'gzip': 0.8, 'br': 1.0}"""
+    qualities = {}
+    for item in header.split(","):
+        token, *params = [part.strip() for part in item.split(";")]
+        if not token:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        qualities[token.lower()] = q
+    return qualities
+
+
+def choose_format(accept: str | None) -> str:
+    """MessagePack only when the client asks for it at least as strongly as JSON."""
+    if not accept:
+        return JSON_MEDIA_TYPE
+    qualities = _qualities(accept)
+    msgpack_q = max(qualities.get(alias, 0.0) for alias in MSGPACK_ALIASES)
+    json_q = max(qualities.get(JSON_MEDIA_TYPE, 0.0), qualities.get("*/*", 0.0), qualities.get("application/*", 0.0))
+    return MSGPACK_MEDIA_TYPE if msgpack_q > 0 and msgpack_q >= json_q else JSON_MEDIA_TYPE
+
+
+def choose_encoding(accept_encoding: str | None) -> str | None:
+    if not accept_encoding:
+        return None
+    qualities = _qualities(accept_encoding)
+    # در تساوی، brotli (فشرده‌تر برای متن فارسی/JSON)
+    best = max(("br", "gzip"), key=lambda coding: qualities.get(coding, qualities.get("*", 0.0)))
+    return best if qualities.get(best, qualities.get("*", 0.0)) > 0 else None
+
+
+class _Encoder:
+    """Incremental br/gzip encoder; `chunk` flushes so streamed parts are decodable on arrival."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=settings.BROTLI_QUALITY)
+        else:
+            self._gzip = zlib.compressobj(settings.GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._gzip.compress(data) + self._gzip.flush(zlib.Z_FINISH)
+
+
+def _compressible(headers: Headers) -> bool:
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type in NEVER_COMPRESS:
+        return False
+    return content_type.startswith("text/") or content_type in COMPRESSIBLE_TYPES
+
+
+class ContentNegotiationMiddleware:
+    """
+    Pure ASGI middleware:
+    - sets `response_format` from the Accept header (JSON or MessagePack) and
+      adds `Vary: Accept` to JSON/MessagePack responses and 304s;
+    - compresses bodies of at least COMPRESSION_MIN_SIZE bytes with br or gzip.
+      Streaming responses (no Content-Length) are compressed chunk by chunk with
+      a flush after each chunk, so incremental delivery still works; event
+      streams are never touched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int | None = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers(scope=scope)
+        token = response_format.set(choose_format(request_headers.get("accept")))
+        encoding = choose_encoding(request_headers.get("accept-encoding"))
+
+        async def send_with_vary(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+                if message["status"] == 304 or content_type in NEGOTIATED_TYPES:
+                    headers.add_vary_header("Accept")
+            await send(message)
+
+        try:
+            # پاسخ HEAD بدنه ندارد ولی Content-Length آن مال بدنه فشرده‌نشده است
+            if encoding is None or scope["method"] == "HEAD":
+                await self.app(scope, receive, send_with_vary)
+            else:
+                await self.app(scope, receive, _CompressingSend(send_with_vary, encoding, self.minimum_size))
+        finally:
+            response_format.reset(token)
+
+
+class _CompressingSend:
+    """
+    Responses with a Content-Length are compressed as a whole (the body is
+    already in memory; BaseHTTPMiddleware may still deliver it in pieces).
+    Responses without it are real streams and are compressed chunk by chunk.
+    """
+
+    def __init__(self, send: Send, encoding: str, minimum_size: int):
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.start: Message | None = None
+        self.headers: MutableHeaders | None = None
+        self.encoder: _Encoder | None = None
+        self.buffer: list[bytes] | None = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # تا رسیدن اولین تکه بدنه صبر می‌کنیم
+            self.start = message
+            self.headers = MutableHeaders(raw=message["headers"])
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None and self.buffer is None:
+            headers = self.headers
+            if not _compressible(headers) or self.start["status"] in (204, 304):
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+
+            length = headers.get("content-length")
+            size = int(length) if length is not None else len(body) if not more_body else None
+            if size is not None and size < self.minimum_size:
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+
+            self.encoder = _Encoder(self.encoding)
+            headers["Content-Encoding"] = self.encoding
+            if size is not None:
+                self.buffer = []
+            else:
+                # stream واقعی (مثل StreamingResponse): هر تکه فشرده و flush می‌شود
+                await self.send(self.start)
+
+        if self.buffer is not None:
+            self.buffer.append(body)
+            if more_body:
+                return
+            body = self.encoder.finish(b"".join(self.buffer))
+            self.headers["Content-Length"] = str(len(body))
+            await self.send(self.start)
+            await self.send({"type": "http.response.body", "body": body, "more_body": False})
+            return
+
+        body = self.encoder.chunk(body) if more_body else self.encoder.finish(body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
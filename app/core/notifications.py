@@ -0,0 +1,85 @@
+# app/core/notifications.py
+
+import logging
+
+import httpx
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import bot_message_cache
+from app.core.outbox import TRACKED_STATUS, PermanentDeliveryError, register_handler
+from app.models import Order, Patient
+from app.models.outbox import OutboxEvent
+from setting import settings
+
+logger = logging.getLogger("app.notifications")
+
+# ============================================================
+#  اطلاع‌رسانی تغییر وضعیت به بیمار از طریق ربات تلگرام
+# ============================================================
+# متن پیام از tbl_BotMessage با کلید notify_<نوع>_<وضعیت جدید> خوانده می‌شود، مثلاً
+# notify_order_sent یا notify_payment_accepted؛ اگر چنین کلیدی تعریف نشده باشد
+# برای آن وضعیت پیامی ارسال نمی‌شود. متن می‌تواند از مقادیر payload استفاده کند:
+# "سفارش شما ارسال شد ({old} -> {new})".
+
+_client: httpx.AsyncClient | None = None
+
+
+def notification_key(aggregate_type: str, status_value: str) -> str:
+    return f"notify_{aggregate_type}_{status_value.lower().replace(' ', '_')}"
+
+
+def _render(text: str, payload: dict) -> str:
+    try:
+        return text.format(**payload)
+    except (KeyError, IndexError, ValueError):
+        return text
+
+
+async def _patient_telegram_id(session: AsyncSession, outbox_event: OutboxEvent) -> str | None:
+    statement = select(Patient.telegram_id)
+    if outbox_event.aggregate_type == "order":
+        statement = statement.where(Patient.patient_id == outbox_event.payload["patient_id"])
+    elif outbox_event.aggregate_type == "payment":
+        statement = statement.join(Order, Order.patient_id == Patient.patient_id).where(
+            Order.order_id == outbox_event.payload["order_id"])
+    else:
+        statement = statement.where(Patient.patient_id == outbox_event.aggregate_id)
+    return (await session.exec(statement)).first()
+
+
+async def send_telegram_message(chat_id: str, text: str) -> None:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(base_url=settings.TELEGRAM_API_URL, timeout=10.0)
+    response = await _client.post(f"/bot{settings.TELEGRAM_BOT_TOKEN}/sendMessage",
+                                  json={"chat_id": chat_id, "text": text})
+    if response.status_code == 429 or response.status_code >= 500:
+        # محدودیت نرخ یا خطای موقت تلگرام: outbox دوباره تلاش می‌کند
+        response.raise_for_status()
+    if response.status_code >= 400:
+        # chat not found، ربات block شده و ...: تکرار فایده‌ای ندارد
+        raise PermanentDeliveryError(f"Telegram {response.status_code}: {response.text[:200]}")
+
+
+async def close_telegram_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@register_handler(*(tracked.event_type for tracked in TRACKED_STATUS.values()))
+async def notify_patient(session: AsyncSession, outbox_event: OutboxEvent) -> None:
+    if not settings.TELEGRAM_BOT_TOKEN:
+        return
+    catalog = await bot_message_cache.get(session)
+    message = catalog.messages.get(notification_key(outbox_event.aggregate_type, outbox_event.payload["new"]))
+    if message is None:
+        return
+    chat_id = await _patient_telegram_id(session, outbox_event)
+    if not chat_id:
+        logger.info("No telegram id for %s %s, notification skipped",
+                    outbox_event.aggregate_type, outbox_event.aggregate_id)
+        return
+    await send_telegram_message(chat_id, _render(message["message_text"], outbox_event.payload))
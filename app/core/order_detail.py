@@ -0,0 +1,113 @@
+# app/core/order_detail.py
+
+import enum
+from datetime import datetime
+from decimal import Decimal
+from types import UnionType
+from typing import Any, Union, get_args, get_origin
+
+from sqlalchemy import Text, case, cast, func, literal_column, null, true
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models import Drug, Order, OrderList, PaymentList
+from app.schemas.drug import DrugRead
+from app.schemas.order import OrderReadWithDetails
+from app.schemas.order_list import OrderListRead
+from app.schemas.payment_list import PaymentListRead
+
+# ============================================================
+#  مدل خواندنی جزئیات سفارش (PostgreSQL)
+# ============================================================
+# به جای Order + selectinload (چهار کوئری و ساخت آبجکت ORM برای هر ردیف)،
+# JSON نهایی OrderReadWithDetails در یک کوئری با json_agg و LATERAL ساخته می‌شود
+# و همان متن بدون parse به پاسخ می‌رود. فیلدها از خود schema ها خوانده می‌شوند،
+# پس خروجی همیشه با response_model یکی است (همان ترتیب کلیدها، Decimal به صورت رشته،
+# مقدار enum به جای نام ذخیره شده در دیتابیس و تاریخ ISO مثل Pydantic).
+
+# Pydantic ثانیه‌ها را با ۶ رقم اعشار می‌نویسد و اگر صفر باشد اصلاً نمی‌نویسد
+_ISO_FORMAT = 'YYYY-MM-DD"T"HH24:MI:SS.US'
+
+
+def _sql_literal(value: str):
+    return literal_column("'" + value.replace("'", "''") + "'")
+
+
+def _plain_type(annotation: Any) -> Any:
+    if get_origin(annotation) in (Union, UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return args[0] if len(args) == 1 else annotation
+    return annotation
+
+
+def _json_value(column, annotation: Any):
+    kind = _plain_type(annotation)
+    if isinstance(kind, type) and issubclass(kind, enum.Enum):
+        # enum ها با نام (CREATED) ذخیره می‌شوند ولی در API مقدار (Created) برمی‌گردد
+        return case(
+            {member.name: _sql_literal(str(member.value)) for member in kind},
+            value=cast(column, Text),
+        )
+    if kind is Decimal:
+        return cast(column, Text)
+    if kind is datetime:
+        return func.regexp_replace(func.to_char(column, _ISO_FORMAT), r"\.000000$", "")
+    return column
+
+
+def _json_object(schema: type, model: type, nested: dict | None = None):
+    """json_build_object with the fields of `schema`, in the same order, read from `model` columns."""
+    nested = nested or {}
+    args = []
+    for name, info in schema.model_fields.items():
+        value = nested[name] if name in nested else _json_value(getattr(model, name), info.annotation)
+        args += [_sql_literal(name), value]
+    return func.json_build_object(*args)
+
+
+def _empty_json_array():
+    return literal_column("'[]'::json")
+
+
+def order_detail_statement(*where):
+    """
+    One statement returning the OrderReadWithDetails JSON (as text) of every
+    order matching `where`, ordered by order_id.
+    """
+    drug = case((Drug.drugs_id.is_(None), null()), else_=_json_object(DrugRead, Drug))
+    item = _json_object(OrderListRead, OrderList, nested={"drug": drug})
+    items = (
+        select(func.json_agg(aggregate_order_by(item, OrderList.order_list_id)).label("rows"))
+        .select_from(OrderList)
+        .outerjoin(Drug, Drug.drugs_id == OrderList.drug_id)
+        .where(OrderList.order_id == Order.order_id)
+        .lateral("items")
+    )
+    payment = _json_object(PaymentListRead, PaymentList)
+    payments = (
+        select(func.json_agg(aggregate_order_by(payment, PaymentList.payment_list_id)).label("rows"))
+        .where(PaymentList.order_id == Order.order_id)
+        .lateral("payments")
+    )
+    order = _json_object(OrderReadWithDetails, Order, nested={
+        "order_list": func.coalesce(items.c.rows, _empty_json_array()),
+        "payment_list": func.coalesce(payments.c.rows, _empty_json_array()),
+    })
+    return (
+        select(cast(order, Text))
+        .select_from(Order)
+        .outerjoin(items, true())
+        .outerjoin(payments, true())
+        .where(*where)
+        .order_by(Order.order_id)
+    )
+
+
+async def read_order_detail_json(session: AsyncSession, order_id: int) -> str | None:
+    """OrderReadWithDetails of one order as a JSON string, or None when it does not exist."""
+    return (await session.exec(order_detail_statement(Order.order_id == order_id))).first()
+
+
+async def read_orders_detail_json(session: AsyncSession, *where) -> list[str]:
+    return list((await session.exec(order_detail_statement(*where))).all())
@@ -0,0 +1,308 @@
+# app/core/outbox.py
+
+import asyncio
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import suppress
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, event, insert, update
+from sqlalchemy.orm import Session, attributes
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.enums import OutboxStatusEnum
+from app.models import Order, Patient, PaymentList
+from app.models.base import get_current_utc_naive
+from app.models.outbox import OutboxEvent
+from database import async_session_maker
+from setting import settings
+
+logger = logging.getLogger("app.outbox")
+
+# ============================================================
+#  Transactional outbox
+# ============================================================
+# تغییر وضعیت سفارش، پرداخت و بیمار یک ردیف در tbl_Outbox می‌نویسد، در همان
+# تراکنش تغییر (listener روی after_flush). پس یا هر دو ثبت می‌شوند یا هیچکدام و
+# روت منتظر ربات نمی‌ماند. workerهای OutboxDispatcher در lifespan صف را دسته‌ای
+# با FOR UPDATE SKIP LOCKED برمی‌دارند (چند worker و چند پروسه بدون تداخل)،
+# handlerها را اجرا می‌کنند و در خطا با backoff نمایی دوباره تلاش می‌کنند؛ بعد از
+# OUTBOX_MAX_ATTEMPTS رویداد dead می‌شود. تحویل «حداقل یک بار» است: اگر worker
+# وسط کار بمیرد رویداد بعد از OUTBOX_LEASE_SECONDS دوباره ارسال می‌شود، پس
+# handlerها باید تکرار را تحمل کنند.
+
+PURGE_BATCH_SIZE = 1000
+PURGE_INTERVAL = 3600.0
+# قبل از تمام شدن lease، رویدادهای باقیمانده دسته به صف برمی‌گردند
+LEASE_SAFETY = 0.8
+
+# session.info: این تراکنش رویداد نوشته؛ بعد از commit workerها بیدار می‌شوند
+_WROTE_EVENTS = "outbox_wrote_events"
+
+
+class PermanentDeliveryError(Exception):
+    """Raised by a handler when retrying cannot help (e.g. the patient blocked the bot)."""
+
+
+Handler = Callable[[AsyncSession, OutboxEvent], Awaitable[None]]
+HANDLERS: dict[str, list[Handler]] = defaultdict(list)
+
+
+def register_handler(*event_types: str):
+    """Decorator: run the handler for every delivered event of these types."""
+
+    def decorator(handler: Handler) -> Handler:
+        for event_type in event_types:
+            HANDLERS[event_type].append(handler)
+        return handler
+
+    return decorator
+
+
+# ------------------------------------------------------------
+#  ثبت رویداد در همان تراکنش
+# ------------------------------------------------------------
+
+@dataclass(frozen=True)
+class TrackedStatus:
+    aggregate_type: str
+    attribute: str
+    key: str
+    # ستون‌هایی که در payload می‌آیند تا handler بدون کوئری اضافه کار کند
+    payload: tuple[str, ...] = ()
+
+    @property
+    def event_type(self) -> str:
+        return f"{self.aggregate_type}.status_changed"
+
+
+TRACKED_STATUS: dict[type, TrackedStatus] = {
+    Order: TrackedStatus("order", "order_status", "order_id", ("patient_id",)),
+    PaymentList: TrackedStatus("payment", "payment_status", "payment_list_id", ("order_id",)),
+    Patient: TrackedStatus("patient", "patient_status", "patient_id"),
+}
+
+
+def _status_value(value):
+    return getattr(value, "value", value)
+
+
+def _event_row(event_type: str, aggregate_type: str, aggregate_id: int, payload: dict) -> dict:
+    # insert هسته‌ای default_factory های SQLModel را اجرا نمی‌کند
+    now = get_current_utc_naive()
+    return {
+        "event_type": event_type, "aggregate_type": aggregate_type, "aggregate_id": aggregate_id,
+        "payload": payload, "status": OutboxStatusEnum.PENDING, "attempts": 0, "available_at": now,
+        "created_at": now, "updated_at": now,
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _capture_status_changes(session: Session, flush_context) -> None:
+    rows = []
+    # فقط تغییر وضعیت ردیف‌های موجود؛ ساختن ردیف جدید تغییر وضعیت حساب نمی‌شود
+    for obj in session.dirty:
+        tracked = TRACKED_STATUS.get(type(obj))
+        if tracked is None:
+            continue
+        history = attributes.get_history(obj, tracked.attribute)
+        if not history.added or not history.deleted:
+            continue
+        old, new = _status_value(history.deleted[0]), _status_value(history.added[0])
+        if old == new:
+            continue
+        payload = {"old": old, "new": new, **{name: getattr(obj, name) for name in tracked.payload}}
+        rows.append(_event_row(tracked.event_type, tracked.aggregate_type, getattr(obj, tracked.key), payload))
+    if rows:
+        # هنوز داخل flush هستیم: مستقیم روی اتصال همین تراکنش
+        session.connection().execute(insert(OutboxEvent), rows)
+        session.info[_WROTE_EVENTS] = True
+
+
+def record_status_change(session: AsyncSession, model: type, aggregate_id: int, old, new, **payload) -> None:
+    """
+    Outbox event for a status changed with a bulk UPDATE (which bypasses the
+    flush listener). Call it in the same transaction as the UPDATE.
+    """
+    tracked = TRACKED_STATUS[model]
+    row = _event_row(tracked.event_type, tracked.aggregate_type, aggregate_id,
+                     {"old": _status_value(old), "new": _status_value(new), **payload})
+    session.add(OutboxEvent(**row))
+    session.info[_WROTE_EVENTS] = True
+
+
+_wakeup = asyncio.Event()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session: Session) -> None:
+    if session.info.pop(_WROTE_EVENTS, False):
+        _wakeup.set()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_events(session: Session) -> None:
+    session.info.pop(_WROTE_EVENTS, None)
+
+
+# ------------------------------------------------------------
+#  تحویل
+# ------------------------------------------------------------
+
+def backoff_seconds(attempts: int) -> float:
+    """Exponential backoff with jitter for the attempt that just failed (1-based)."""
+    delay = min(settings.OUTBOX_BACKOFF_MAX, settings.OUTBOX_BACKOFF_BASE * 2 ** (attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+async def claim_batch(session: AsyncSession, limit: int) -> list[OutboxEvent]:
+    """
+    Lease up to `limit` ready events: their available_at moves to the end of
+    the lease, so no other worker takes them until it runs out.
+    """
+    now = get_current_utc_naive()
+    ready = (
+        select(OutboxEvent.id)
+        .where(OutboxEvent.status == OutboxStatusEnum.PENDING, OutboxEvent.available_at <= now)
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+    statement = (
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_(ready))
+        .values(attempts=OutboxEvent.attempts + 1,
+                available_at=now + timedelta(seconds=settings.OUTBOX_LEASE_SECONDS), updated_at=now)
+        .returning(OutboxEvent)
+    )
+    events = list((await session.execute(statement)).scalars().all())
+    await session.commit()
+    # جدا از session تا rollback بعد از خطای یک handler آن‌ها را expire نکند
+    session.expunge_all()
+    return sorted(events, key=lambda item: item.id)
+
+
+async def _finish(session: AsyncSession, outbox_event: OutboxEvent, **values) -> None:
+    values["updated_at"] = get_current_utc_naive()
+    await session.execute(update(OutboxEvent).where(OutboxEvent.id == outbox_event.id).values(**values))
+    await session.commit()
+
+
+async def deliver(session: AsyncSession, outbox_event: OutboxEvent) -> None:
+    """Run the handlers of one claimed event and record the outcome."""
+    try:
+        for handler in HANDLERS.get(outbox_event.event_type, ()):
+            await handler(session, outbox_event)
+    except Exception as exc:
+        await session.rollback()
+        error = f"{type(exc).__name__}: {exc}"
+        if isinstance(exc, PermanentDeliveryError) or outbox_event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            logger.error("Outbox event %s (%s) dead after %d attempts: %s",
+                         outbox_event.id, outbox_event.event_type, outbox_event.attempts, error)
+            await _finish(session, outbox_event, status=OutboxStatusEnum.DEAD, last_error=error)
+        else:
+            delay = backoff_seconds(outbox_event.attempts)
+            logger.warning("Outbox event %s (%s) failed, retry in %.0fs: %s",
+                           outbox_event.id, outbox_event.event_type, delay, error)
+            await _finish(session, outbox_event, last_error=error,
+                          available_at=get_current_utc_naive() + timedelta(seconds=delay))
+        return
+    await _finish(session, outbox_event, status=OutboxStatusEnum.DONE, processed_at=get_current_utc_naive(),
+                  last_error=None)
+
+
+async def _release(session: AsyncSession, events: list[OutboxEvent]) -> None:
+    """Give back leased events that were not attempted."""
+    await session.execute(
+        update(OutboxEvent)
+        .where(OutboxEvent.id.in_([item.id for item in events]))
+        .values(attempts=OutboxEvent.attempts - 1, available_at=get_current_utc_naive())
+    )
+    await session.commit()
+
+
+async def process_batch(limit: int | None = None) -> int:
+    """Claim and deliver one batch. Returns the number of events claimed."""
+    async with async_session_maker() as session:
+        events = await claim_batch(session, limit or settings.OUTBOX_BATCH_SIZE)
+        deadline = time.monotonic() + settings.OUTBOX_LEASE_SECONDS * LEASE_SAFETY
+        for index, outbox_event in enumerate(events):
+            if time.monotonic() > deadline:
+                await _release(session, events[index:])
+                break
+            await deliver(session, outbox_event)
+        return len(events)
+
+
+async def purge_delivered_events() -> int:
+    """Delete delivered events older than OUTBOX_RETENTION_DAYS in small batches."""
+    removed = 0
+    cutoff = get_current_utc_naive() - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+    while True:
+        async with async_session_maker() as session:
+            old = (
+                select(OutboxEvent.id)
+                .where(OutboxEvent.status == OutboxStatusEnum.DONE, OutboxEvent.processed_at < cutoff)
+                .limit(PURGE_BATCH_SIZE)
+                .scalar_subquery()
+            )
+            result = await session.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(old)))
+            await session.commit()
+        removed += result.rowcount
+        if result.rowcount < PURGE_BATCH_SIZE:
+            return removed
+
+
+class OutboxDispatcher:
+    """OUTBOX_WORKERS asyncio tasks draining tbl_Outbox, plus the purge of delivered events."""
+
+    def __init__(self):
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self, workers: int | None = None) -> None:
+        workers = settings.OUTBOX_WORKERS if workers is None else workers
+        if workers <= 0:
+            return
+        self._tasks = [asyncio.create_task(self._work(number)) for number in range(workers)]
+        self._tasks.append(asyncio.create_task(self._purge()))
+
+    async def stop(self) -> None:
+        # رویدادی که وسط ارسال قطع شود بعد از پایان lease دوباره ارسال می‌شود
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            with suppress(asyncio.CancelledError):
+                await task
+        self._tasks = []
+
+    async def _work(self, number: int) -> None:
+        while True:
+            _wakeup.clear()
+            try:
+                claimed = await process_batch()
+            except Exception:
+                logger.exception("Outbox worker %d failed", number)
+                claimed = 0
+            if claimed:
+                continue
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(_wakeup.wait(), settings.OUTBOX_POLL_INTERVAL)
+
+    async def _purge(self) -> None:
+        while True:
+            try:
+                removed = await purge_delivered_events()
+                if removed:
+                    logger.info("Removed %d delivered outbox events", removed)
+            except Exception:
+                logger.exception("Outbox purge failed")
+            await asyncio.sleep(PURGE_INTERVAL)
+
+
+outbox_dispatcher = OutboxDispatcher()
@@ -0,0 +1,151 @@
+# app/core/partitions.py
+
+import asyncio
+import logging
+from datetime import date
+
+from sqlalchemy import func, text
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.base import get_current_utc_naive
+from database import async_session_maker
+from setting import settings
+
+logger = logging.getLogger("app.partitions")
+
+# ============================================================
+#  partition های ماهانه tbl_Message
+# ============================================================
+# migration d9f2a6c8e154 جدول پیام‌ها را بر اساس created_at ماهانه partition
+# می‌کند (tbl_Message_pYYYYMM به علاوه tbl_Message_default). این کار روزانه:
+#   - partition ماه جاری و MESSAGE_PARTITIONS_AHEAD ماه بعد را از قبل می‌سازد تا
+#     insert ها به partition پیش‌فرض نروند؛
+#   - partition های قدیمی‌تر از MESSAGE_RETENTION_MONTHS را از جدول جدا (DETACH)
+#     و به schema archive منتقل می‌کند؛ داده پاک نمی‌شود و می‌توان آن را با
+#     pg_dump بایگانی و بعد drop کرد.
+# روی دیتابیسی که جدولش partition نشده (مثلاً create_all در توسعه) کاری نمی‌کند.
+
+# کلید advisory lock نگهداری partition ها (عدد ثابت دلخواه)
+PARTITION_LOCK_KEY = 4_606_001
+MESSAGE_TABLE = "tbl_Message"
+ARCHIVE_SCHEMA = "archive"
+# DETACH روی جدول والد قفل کامل می‌گیرد؛ پشت یک تراکنش طولانی صف نمی‌کشیم
+DETACH_LOCK_TIMEOUT = "5s"
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+async def is_partitioned(session: AsyncSession, table: str) -> bool:
+    result = await session.execute(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:name))"),
+        {"name": f'"{table}"'},
+    )
+    return result.scalar_one()
+
+
+async def monthly_partitions(session: AsyncSession, table: str) -> dict[date, str]:
+    """Attached monthly partitions of `table` by their first day (the default partition is left out)."""
+    result = await session.execute(text("""
+        SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(:name) AND c.relname ~ '_p[0-9]{6}$'
+    """), {"name": f'"{table}"'})
+    partitions = {}
+    for name in result.scalars():
+        suffix = name.rsplit("_p", 1)[1]
+        partitions[date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return partitions
+
+
+async def _locked(session: AsyncSession) -> bool:
+    return (await session.exec(select(func.pg_try_advisory_xact_lock(PARTITION_LOCK_KEY)))).one()
+
+
+async def create_future_partitions(table: str, months_ahead: int) -> list[str]:
+    """Create the partitions of the current month and `months_ahead` months after it. Returns the new ones."""
+    first = get_current_utc_naive().date().replace(day=1)
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(first, offset)
+        async with async_session_maker() as session:
+            if not await _locked(session) or month in await monthly_partitions(session, table):
+                continue
+            name = partition_name(table, month)
+            try:
+                await session.execute(text(
+                    f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+                ))
+                await session.commit()
+            except DBAPIError:
+                # معمولاً ردیف‌های همین ماه در partition پیش‌فرض نشسته‌اند و باید دستی منتقل شوند
+                logger.exception("Could not create partition %s", name)
+                continue
+        created.append(name)
+    return created
+
+
+async def detach_old_partitions(table: str, retention_months: int) -> list[str]:
+    """
+    Detach the monthly partitions that ended more than `retention_months`
+    months ago and move them to the archive schema. One transaction per
+    partition; one that cannot get its lock is retried on the next run.
+    """
+    cutoff = add_months(get_current_utc_naive().date().replace(day=1), -retention_months)
+    async with async_session_maker() as session:
+        old = sorted((month, name) for month, name in (await monthly_partitions(session, table)).items()
+                     if month < cutoff)
+    detached = []
+    for month, name in old:
+        async with async_session_maker() as session:
+            if not await _locked(session):
+                break
+            try:
+                await session.execute(text(f"SET LOCAL lock_timeout = '{DETACH_LOCK_TIMEOUT}'"))
+                await session.execute(text(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"'))
+                await session.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{ARCHIVE_SCHEMA}"'))
+                await session.execute(text(f'ALTER TABLE "{name}" SET SCHEMA "{ARCHIVE_SCHEMA}"'))
+                # بایگانی نباید جلوی حذف بیمار یا کاربر را بگیرد
+                foreign_keys = await session.execute(text(
+                    "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(:name) AND contype = 'f'"
+                ), {"name": f'"{ARCHIVE_SCHEMA}"."{name}"'})
+                for constraint in foreign_keys.scalars().all():
+                    await session.execute(text(
+                        f'ALTER TABLE "{ARCHIVE_SCHEMA}"."{name}" DROP CONSTRAINT "{constraint}"'))
+                await session.commit()
+            except DBAPIError:
+                logger.warning("Could not detach partition %s, will retry", name, exc_info=True)
+                continue
+        detached.append(name)
+    return detached
+
+
+async def maintain_message_partitions() -> None:
+    async with async_session_maker() as session:
+        if not await is_partitioned(session, MESSAGE_TABLE):
+            return
+    created = await create_future_partitions(MESSAGE_TABLE, settings.MESSAGE_PARTITIONS_AHEAD)
+    if created:
+        logger.info("Created message partitions: %s", ", ".join(created))
+    if settings.MESSAGE_RETENTION_MONTHS > 0:
+        detached = await detach_old_partitions(MESSAGE_TABLE, settings.MESSAGE_RETENTION_MONTHS)
+        if detached:
+            logger.info("Detached message partitions to schema %s: %s", ARCHIVE_SCHEMA, ", ".join(detached))
+
+
+async def run_partition_maintenance() -> None:
+    """Lifespan task: keep the message partitions ahead of time and apply the retention."""
+    while True:
+        try:
+            await maintain_message_partitions()
+        except Exception:
+            logger.exception("Partition maintenance failed")
+        await asyncio.sleep(settings.PARTITION_MAINTENANCE_INTERVAL)
@@ -0,0 +1,89 @@
+# app/core/patient_status.py
+
+from collections.abc import Iterable
+
+from fastapi import HTTPException, status
+from sqlalchemy import update
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.enums import PatientStatus
+from app.core.outbox import record_status_change
+from app.models.base import get_current_utc_naive
+from app.models.patient import Patient
+
+# ============================================================
+#  ماشین وضعیت بیمار
+# ============================================================
+# فقط این یال‌ها مجازند. هر تغییر وضعیت status_changed_at را هم به‌روز می‌کند؛
+# صف مشاوره بر اساس آن مرتب می‌شود، نه updated_at که با هر ویرایشی (مثلاً آدرس) عوض می‌شود.
+
+_S = PatientStatus
+
+TRANSITIONS: dict[PatientStatus, frozenset[PatientStatus]] = {
+    _S.AWAITING_PROFILE_COMPLETION: frozenset({_S.PROFILE_COMPLETED, _S.CANCELLED}),
+    # بیمار می‌تواند قبل از رسیدن نوبت مشاوره اطلاعاتش را اصلاح کند
+    _S.PROFILE_COMPLETED: frozenset({_S.AWAITING_CONSULTATION, _S.AWAITING_PROFILE_COMPLETION, _S.CANCELLED}),
+    _S.AWAITING_CONSULTATION: frozenset({_S.AWAITING_INVOICE_APPROVAL, _S.PROFILE_COMPLETED, _S.CANCELLED}),
+    # رد فاکتور توسط بیمار: برگشت به صف مشاور
+    _S.AWAITING_INVOICE_APPROVAL: frozenset({_S.AWAITING_PAYMENT, _S.AWAITING_CONSULTATION, _S.CANCELLED}),
+    _S.AWAITING_PAYMENT: frozenset({_S.PAYMENT_COMPLETED, _S.CANCELLED}),
+    # رد رسید توسط صندوق‌دار: پرداخت دوباره
+    _S.PAYMENT_COMPLETED: frozenset({_S.PAYMENT_CONFIRMED, _S.AWAITING_PAYMENT, _S.CANCELLED}),
+    _S.PAYMENT_CONFIRMED: frozenset({_S.AWAITING_SHIPMENT}),
+    _S.AWAITING_SHIPMENT: frozenset({_S.SHIPPED}),
+    _S.SHIPPED: frozenset({_S.COMPLETED}),
+    # دور جدید درمان برای بیمار قبلی
+    _S.COMPLETED: frozenset({_S.AWAITING_CONSULTATION, _S.PROFILE_COMPLETED}),
+    _S.CANCELLED: frozenset({_S.AWAITING_PROFILE_COMPLETION, _S.PROFILE_COMPLETED}),
+}
+
+
+def can_transition(current: PatientStatus, target: PatientStatus) -> bool:
+    return target in TRANSITIONS[current]
+
+
+def check_transition(current: PatientStatus, target: PatientStatus) -> None:
+    if not can_transition(current, target):
+        allowed = ", ".join(sorted(item.value for item in TRANSITIONS[current])) or "none"
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Patient status cannot change from '{current.value}' to '{target.value}'. Allowed: {allowed}.",
+        )
+
+
+def transition(patient: Patient, target: PatientStatus) -> bool:
+    """
+    Move one loaded patient to `target` (the caller commits). Returns False
+    when it already is there; raises 409 for an edge that is not allowed.
+    """
+    if patient.patient_status == target:
+        return False
+    check_transition(patient.patient_status, target)
+    patient.patient_status = target
+    patient.status_changed_at = get_current_utc_naive()
+    return True
+
+
+async def bulk_transition(session: AsyncSession, current: PatientStatus, target: PatientStatus,
+                          patient_ids: Iterable[int] | None = None) -> list[int]:
+    """
+    Move every patient in `current` (optionally only `patient_ids`) to `target`
+    with one UPDATE. The status is part of the WHERE clause, so a patient
+    changed meanwhile by someone else is left alone. Outbox events are written
+    in the same transaction. Returns the ids that moved; the caller commits.
+    """
+    check_transition(current, target)
+    now = get_current_utc_naive()
+    statement = (
+        update(Patient)
+        .where(Patient.patient_status == current)
+        .values(patient_status=target, status_changed_at=now, updated_at=now)
+        .returning(Patient.patient_id)
+        .execution_options(synchronize_session=False)
+    )
+    if patient_ids is not None:
+        statement = statement.where(Patient.patient_id.in_(list(patient_ids)))
+    moved = list((await session.execute(statement)).scalars().all())
+    for patient_id in moved:
+        record_status_change(session, Patient, patient_id, current, target)
+    return moved
@@ -2,6 +2,8 @@
 from enum import Enum
 
 from fastapi import Depends, HTTPException, status # <<-- اضافه شده
+from app.core.api_key import ApiClientPrincipal
+from app.core.token_claims import PERMISSION_BITS, TokenPrincipal
 from app.models.user import User                   # <<-- اضافه شده
 from security import get_current_active_user   # <<-- اضافه شده
 
@@ -45,6 +47,19 @@ class FormName(str, Enum):
     DRUG_MAP = "DrugMap"
     BOT_MESSAGE = "BotMessage"
 
+    # --- Machine clients ---
+    API_CLIENT = "ApiClient"
+
+    # --- Background delivery ---
+    OUTBOX = "Outbox"
+    CHANGE_LOG = "ChangeLog"
+
+    # --- Reports ---
+    REPORT = "Report"
+
+    # --- Archive ---
+    ARCHIVE = "Archive"
+
 
     # ... سایر فرم‌ها را به همین ترتیب اضافه کنید
 
@@ -66,6 +81,21 @@ class RoleChecker:
         """
         This method is executed when the dependency is called by FastAPI.
         """
+        # کلاینت‌های API نقش ندارند؛ scope های خودشان بررسی می‌شود (بدون کوئری)
+        if isinstance(current_user, ApiClientPrincipal):
+            if not current_user.allows(self.form_name, self.required_permission):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=f"API client '{current_user.client_name}' lacks scope "
+                           f"'{self.form_name}:{self.required_permission}'.",
+                )
+            return
+
+        # توکن با دسترسی‌های داخلی (نسخه معتبر): بررسی بیت‌ها بدون کوئری
+        if isinstance(current_user, TokenPrincipal):
+            self._check_mask(current_user.permissions)
+            return
+
         if not current_user.role or not current_user.role.user_role_permission:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -87,4 +117,43 @@ class RoleChecker:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"No permissions defined for form '{self.form_name}' in your role.",
-            )
\ No newline at end of file
+            )
+
+    def _check_mask(self, permissions: dict[str, int]) -> None:
+        """Same checks and messages as the role path, on the compact token claims."""
+        if not permissions:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"You do not have permission to perform '{self.required_permission}' on '{self.form_name}'.",
+            )
+        mask = permissions.get(self.form_name)
+        if mask is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"No permissions defined for form '{self.form_name}' in your role.",
+            )
+        if not mask & PERMISSION_BITS[self.required_permission]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"You do not have permission to perform '{self.required_permission}' on '{self.form_name}'.",
+            )
+
+
+class ApiClientScope:
+    """
+    Scope check for API clients on routes that any logged-in user may call
+    (no RoleChecker). Users pass through unchanged.
+    """
+
+    def __init__(self, form_name: FormName, required_permission: PermissionAction):
+        self.form_name = form_name.value
+        self.required_permission = required_permission.value
+
+    def __call__(self, current_user: User = Depends(get_current_active_user)):
+        if isinstance(current_user, ApiClientPrincipal) and not current_user.allows(
+                self.form_name, self.required_permission):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"API client '{current_user.client_name}' lacks scope "
+                       f"'{self.form_name}:{self.required_permission}'.",
+            )
@@ -0,0 +1,104 @@
+# app/core/query_stats.py
+
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from setting import settings
+
+logger = logging.getLogger("app.db")
+
+
+class QueryStats:
+    """Queries executed while serving a single HTTP request."""
+
+    __slots__ = ("count", "duration", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # { SQL text (with placeholders): times executed }
+        self.statements: Counter = Counter()
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements executed at least `threshold` times (likely N+1 patterns)."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+# آمار درخواست جاری؛ خارج از درخواست HTTP (مثلاً در کارهای پس‌زمینه) None است
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def install_query_stats(engine) -> None:
+    """
+    Hook cursor execution events of the (async) engine to count queries and
+    DB time of the current request.
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if current_query_stats.get() is not None:
+            conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = current_query_stats.get()
+        if stats is None:
+            return
+        start_times = conn.info.get("query_start_time")
+        if start_times:
+            stats.duration += time.perf_counter() - start_times.pop()
+        stats.count += 1
+        stats.statements[statement] += 1
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware that collects QueryStats for each request.
+
+    - In DEBUG mode the response gets `X-DB-Queries` and `X-DB-Time` (ms) headers.
+    - Statements repeated DB_QUERY_REPEAT_THRESHOLD times or more in a single
+      request are logged as N+1 suspects.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and settings.DEBUG:
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.count).encode()))
+                headers.append((b"x-db-time", f"{stats.duration * 1000:.2f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_query_stats.reset(token)
+            self._report(scope, stats)
+
+    @staticmethod
+    def _report(scope, stats: QueryStats) -> None:
+        offenders = stats.repeated(settings.DB_QUERY_REPEAT_THRESHOLD)
+        if not offenders:
+            return
+        route = getattr(scope.get("route"), "path", scope.get("path"))
+        for statement, times in offenders:
+            logger.warning(
+                "Possible N+1 on %s %s: statement executed %d times (%d queries, %.1f ms total): %s",
+                scope["method"], route, times, stats.count, stats.duration * 1000,
+                " ".join(statement.split())[:300],
+            )
@@ -0,0 +1,118 @@
+# app/core/serialization.py
+
+from datetime import date, datetime, time
+from decimal import Decimal
+from enum import Enum
+from types import UnionType
+from typing import Any, Iterable, Union, get_args, get_origin
+from uuid import UUID
+
+import msgpack
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.negotiation import MSGPACK_MEDIA_TYPE, response_format
+from setting import settings
+
+
+def _orjson_default(value: Any) -> Any:
+    """Types orjson does not encode by itself."""
+    if isinstance(value, Decimal):
+        # همان خروجی Pydantic (قیمت‌ها به صورت رشته) تا کلاینت‌ها تغییری نبینند
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _msgpack_default(value: Any) -> Any:
+    """Same values a JSON client would see (ISO dates, string decimals)."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, orjson.Fragment):
+        # بدنه‌های JSON آماده (مثلاً زیر-پاسخ‌های batch)
+        return orjson.loads(orjson.dumps(value))
+    return _orjson_default(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+    datetime/date/enum/uuid are encoded natively, Decimal through `_orjson_default`.
+
+    When the client sent `Accept: application/msgpack` (see ContentNegotiationMiddleware)
+    the same content is rendered as MessagePack instead.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if response_format.get() == MSGPACK_MEDIA_TYPE:
+            # init_headers بعد از render صدا زده می‌شود، پس Content-Type درست ست می‌شود
+            self.media_type = MSGPACK_MEDIA_TYPE
+            return msgpack.packb(content, default=_msgpack_default)
+        return orjson.dumps(content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+# ------------------------------------------------------------
+#  تبدیل مستقیم آبجکت‌های ORM به dict (بدون اعتبارسنجی Pydantic)
+# ------------------------------------------------------------
+
+# { schema: ((field_name, nested_schema | None, is_list), ...) }
+_PLANS: dict[type, tuple] = {}
+
+
+def _nested_schema(annotation: Any) -> tuple[type | None, bool]:
+    """Return (schema, is_list) when a field holds another schema (or a list of them)."""
+    origin = get_origin(annotation)
+    if origin in (Union, UnionType):
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        return _nested_schema(args[0]) if len(args) == 1 else (None, False)
+    if origin is list:
+        inner, _ = _nested_schema(get_args(annotation)[0])
+        return inner, True
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+def _plan(schema: type) -> tuple:
+    plan = _PLANS.get(schema)
+    if plan is None:
+        plan = tuple(
+            (name, *_nested_schema(info.annotation))
+            for name, info in schema.model_fields.items()
+        )
+        _PLANS[schema] = plan
+    return plan
+
+
+def dump_obj(obj: Any, schema: type) -> dict:
+    """
+    Shape a trusted ORM object like `schema` would, without validating it.
+    Relationships used by `schema` must already be loaded (selectinload).
+    """
+    out = {}
+    for name, nested, is_list in _plan(schema):
+        value = getattr(obj, name, None)
+        if nested is not None and value is not None:
+            value = [dump_obj(item, nested) for item in value] if is_list else dump_obj(value, nested)
+        out[name] = value
+    return out
+
+
+def fast_list_response(rows: Iterable[Any], schema: type, headers: dict[str, str] | None = None) -> Any:
+    """
+    Response for large list endpoints built from ORM rows.
+
+    With FAST_SERIALIZATION enabled the rows are shaped by `dump_obj` and encoded
+    with orjson directly, skipping the response_model validation of FastAPI.
+    Otherwise the rows are returned as-is and FastAPI validates them as usual;
+    in that case `headers` must be set on the injected `Response` by the caller.
+    """
+    if not settings.FAST_SERIALIZATION:
+        return rows
+    return FastJSONResponse([dump_obj(row, schema) for row in rows], headers=headers)
@@ -0,0 +1,210 @@
+# app/core/status_history.py
+
+import asyncio
+import logging
+import math
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy import func, text
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.change_log import STATUS_ENUMS
+from app.models.base import get_current_utc_naive
+from app.models.status_history import StatusHistory, StatusRollup
+from database import async_session_maker
+from setting import settings
+
+logger = logging.getLogger("app.status_history")
+
+# ============================================================
+#  زمان ماندن در هر وضعیت (SLA)
+# ============================================================
+# trigger ها هر تغییر وضعیت سفارش و بیمار را در tbl_StatusHistory می‌نویسند،
+# همراه با مدت ماندن در وضعیت قبلی. هر STATUS_ROLLUP_INTERVAL ثانیه روزها از
+# آخرین روز خلاصه‌شده تا امروز (دست‌کم STATUS_ROLLUP_DAYS روز اخیر) از روی همان
+# روزها دوباره خلاصه می‌شوند، پس روزهایی که worker خاموش بوده هم جا نمی‌افتند:
+# تعداد، میانگین، بیشینه، صدک‌های دقیق روز و یک histogram لگاریتمی. گزارش فقط از
+# tbl_StatusRollup می‌خواند؛ صدک چند روز از جمع histogram ها تخمین زده می‌شود.
+# مدت هر وضعیت به روزی تعلق دارد که از آن وضعیت خارج شده است.
+
+# bucket 0: کمتر از ۱ ثانیه؛ bucket b: [1s * 2^((b-1)/4), 1s * 2^(b/4)) یعنی دقت حدود ۱۹٪
+BUCKETS_PER_DOUBLING = 4
+BUCKET_COUNT = 100  # تا حدود ۲۷ سال؛ بزرگ‌ترها در آخرین bucket
+BUCKET_BASE_MS = 1000
+
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+# کلید advisory lock به‌روزرسانی rollup (عدد ثابت دلخواه)
+ROLLUP_LOCK_KEY = 4_505_001
+# جبران عقب‌ماندگی در چند دستور، هر کدام حداکثر این تعداد روز
+CATCH_UP_CHUNK_DAYS = 31
+
+_REFRESH_ROLLUPS = text(f"""
+INSERT INTO "tbl_StatusRollup" AS r
+    (entity, status, day, count, avg_ms, max_ms, p50_ms, p90_ms, p95_ms, p99_ms, histogram, refreshed_at)
+SELECT d.entity, d.status, d.day, d.count, d.avg_ms, d.max_ms,
+       d.p[1]::bigint, d.p[2]::bigint, d.p[3]::bigint, d.p[4]::bigint, h.histogram, :now
+FROM (
+    SELECT entity, from_status AS status, changed_at::date AS day, count(*) AS count,
+           avg(duration_ms)::bigint AS avg_ms, max(duration_ms) AS max_ms,
+           percentile_cont(ARRAY[{", ".join(map(str, PERCENTILES))}]) WITHIN GROUP (ORDER BY duration_ms) AS p
+    FROM "tbl_StatusHistory"
+    WHERE changed_at >= :start AND changed_at < :end AND duration_ms IS NOT NULL
+    GROUP BY 1, 2, 3
+) AS d
+JOIN (
+    SELECT entity, status, day, json_object_agg(bucket, n) AS histogram
+    FROM (
+        SELECT entity, from_status AS status, changed_at::date AS day,
+               CASE WHEN duration_ms < {BUCKET_BASE_MS} THEN 0
+                    ELSE least({BUCKET_COUNT - 1},
+                               floor({BUCKETS_PER_DOUBLING} * log(2.0, duration_ms / {BUCKET_BASE_MS}.0))::integer + 1)
+               END AS bucket,
+               count(*) AS n
+        FROM "tbl_StatusHistory"
+        WHERE changed_at >= :start AND changed_at < :end AND duration_ms IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    ) AS b
+    GROUP BY 1, 2, 3
+) AS h USING (entity, status, day)
+ON CONFLICT (entity, status, day) DO UPDATE SET
+    count = excluded.count, avg_ms = excluded.avg_ms, max_ms = excluded.max_ms,
+    p50_ms = excluded.p50_ms, p90_ms = excluded.p90_ms, p95_ms = excluded.p95_ms, p99_ms = excluded.p99_ms,
+    histogram = excluded.histogram, refreshed_at = excluded.refreshed_at
+""")
+
+
+async def refresh_rollups(start: date, end: date | None = None) -> int:
+    """
+    Recompute the rollups of days [start, end] (end defaults to today) from the
+    history of those days only. Skipped when another worker is already doing it.
+    Returns the number of rollup rows written.
+    """
+    now = get_current_utc_naive()
+    end = end or now.date()
+    async with async_session_maker() as session:
+        locked = (await session.exec(select(func.pg_try_advisory_xact_lock(ROLLUP_LOCK_KEY)))).one()
+        if not locked:
+            return 0
+        result = await session.execute(_REFRESH_ROLLUPS, {
+            "start": datetime.combine(start, time.min),
+            "end": datetime.combine(end + timedelta(days=1), time.min),
+            "now": now,
+        })
+        await session.commit()
+        return result.rowcount
+
+
+async def rollup_start(today: date) -> date:
+    """
+    First day to recompute: the last rolled-up day (or the first history day
+    when nothing is rolled up yet), but never later than the STATUS_ROLLUP_DAYS
+    window, which also catches history committed after that day's last refresh.
+    """
+    window_start = today - timedelta(days=settings.STATUS_ROLLUP_DAYS - 1)
+    async with async_session_maker() as session:
+        last_day = (await session.exec(select(func.max(StatusRollup.day)))).one()
+        if last_day is None:
+            first_change = (await session.exec(select(func.min(StatusHistory.changed_at)))).one()
+            last_day = first_change.date() if first_change is not None else window_start
+    return min(last_day, window_start)
+
+
+async def catch_up_rollups() -> int:
+    """Refresh every day from rollup_start() through today. Returns the number of rollup rows written."""
+    today = get_current_utc_naive().date()
+    start = await rollup_start(today)
+    written = 0
+    while start <= today:
+        end = min(start + timedelta(days=CATCH_UP_CHUNK_DAYS - 1), today)
+        written += await refresh_rollups(start, end)
+        start = end + timedelta(days=1)
+    return written
+
+
+async def run_status_rollups() -> None:
+    """Lifespan task: catch the rollups up to today periodically."""
+    while True:
+        try:
+            await catch_up_rollups()
+        except Exception:
+            logger.exception("Status rollup refresh failed")
+        await asyncio.sleep(settings.STATUS_ROLLUP_INTERVAL)
+
+
+# ------------------------------------------------------------
+#  گزارش
+# ------------------------------------------------------------
+
+def _bucket_bounds(bucket: int) -> tuple[float, float]:
+    if bucket == 0:
+        return 0.0, float(BUCKET_BASE_MS)
+    return (BUCKET_BASE_MS * 2 ** ((bucket - 1) / BUCKETS_PER_DOUBLING),
+            BUCKET_BASE_MS * 2 ** (bucket / BUCKETS_PER_DOUBLING))
+
+
+def histogram_percentile(histogram: dict[int, int], q: float, max_ms: int) -> int:
+    """Percentile estimated from merged buckets (geometric interpolation inside the bucket)."""
+    total = sum(histogram.values())
+    rank = q * total
+    seen = 0
+    for bucket in sorted(histogram):
+        count = histogram[bucket]
+        if seen + count >= rank:
+            low, high = _bucket_bounds(bucket)
+            high = min(high, max_ms)
+            fraction = (rank - seen) / count
+            if low <= 0:
+                value = high * fraction
+            else:
+                value = low * (max(high, low) / low) ** fraction
+            return int(min(value, max_ms))
+        seen += count
+    return max_ms
+
+
+@dataclass
+class StatusSla:
+    status: str
+    count: int
+    avg_ms: int
+    max_ms: int
+    p50_ms: int
+    p90_ms: int
+    p95_ms: int
+    p99_ms: int
+
+
+def _api_status(entity: str, name: str) -> str:
+    kind = STATUS_ENUMS[entity]
+    return kind[name].value if name in kind.__members__ else name
+
+
+def combine(entity: str, rollups: list[StatusRollup]) -> StatusSla:
+    """One summary for several days of the same status. A single day keeps its exact percentiles."""
+    status = _api_status(entity, rollups[0].status)
+    if len(rollups) == 1:
+        row = rollups[0]
+        return StatusSla(status=status, count=row.count, avg_ms=row.avg_ms, max_ms=row.max_ms, p50_ms=row.p50_ms,
+                         p90_ms=row.p90_ms, p95_ms=row.p95_ms, p99_ms=row.p99_ms)
+    count = sum(row.count for row in rollups)
+    max_ms = max(row.max_ms for row in rollups)
+    histogram: dict[int, int] = {}
+    for row in rollups:
+        for bucket, bucket_count in row.histogram.items():
+            histogram[int(bucket)] = histogram.get(int(bucket), 0) + bucket_count
+    p50, p90, p95, p99 = (histogram_percentile(histogram, q, max_ms) for q in PERCENTILES)
+    return StatusSla(status=status, count=count, avg_ms=math.floor(sum(r.avg_ms * r.count for r in rollups) / count),
+                     max_ms=max_ms, p50_ms=p50, p90_ms=p90, p95_ms=p95, p99_ms=p99)
+
+
+async def read_rollups(session: AsyncSession, entity: str, start: date, end: date,
+                       status_name: str | None = None) -> list[StatusRollup]:
+    statement = select(StatusRollup).where(StatusRollup.entity == entity, StatusRollup.day >= start,
+                                           StatusRollup.day <= end)
+    if status_name is not None:
+        statement = statement.where(StatusRollup.status == status_name)
+    statement = statement.order_by(StatusRollup.status, StatusRollup.day)
+    return list((await session.exec(statement)).all())
@@ -0,0 +1,84 @@
+# app/core/token_claims.py
+
+import zlib
+from dataclasses import dataclass
+
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import SnapshotCache
+from app.models import User, UserRole, UserRolePermission
+from setting import settings
+
+# ============================================================
+#  دسترسی‌های داخل توکن JWT + جدول نسخه دسترسی‌ها
+# ============================================================
+# توکن دسترسی شامل شناسه کاربر، نقش، دسترسی‌ها (فشرده) و «نسخه دسترسی» نقش است.
+# تا وقتی نسخه داخل توکن با جدول نسخه‌های درون حافظه یکی باشد، احراز هویت و
+# بررسی دسترسی بدون هیچ کوئری انجام می‌شود. با ویرایش نقش/دسترسی/کاربر جدول
+# در همان worker فوراً و در بقیه حداکثر بعد از PERMISSION_VERSION_CACHE_SECONDS
+# به‌روز می‌شود و توکن‌های قدیمی به مسیر کامل (کوئری دیتابیس) برمی‌گردند.
+
+# { action: bit } -> دسترسی‌های هر فرم در یک عدد: {"Patient": 15}
+PERMISSION_BITS = {"view": 1, "insert": 2, "update": 4, "delete": 8}
+
+
+def encode_permissions(permissions: list[UserRolePermission]) -> dict[str, int]:
+    encoded = {}
+    for perm in permissions:
+        mask = 0
+        for action, bit in PERMISSION_BITS.items():
+            if getattr(perm, action, False):
+                mask |= bit
+        encoded[perm.form_name] = mask
+    return encoded
+
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """
+    User authenticated from the claims of an access token, without loading
+    the `User` row. RoleChecker reads `permissions` instead of the role.
+    """
+    user_id: int
+    role_id: int | None
+    mobile_number: str
+    permissions: dict[str, int]
+    is_active: bool = True
+
+
+@dataclass(frozen=True)
+class PermissionVersions:
+    # { role_id: stamp }
+    roles: dict[int, int]
+    # { user_id: (role_id, is_active) }
+    users: dict[int, tuple[int | None, bool]]
+
+    def is_current(self, user_id: int, role_id: int | None, version: int) -> bool:
+        if self.users.get(user_id) != (role_id, True):
+            return False
+        return self.roles.get(role_id, 0) == version
+
+
+async def _load_versions(session: AsyncSession) -> PermissionVersions:
+    # نسخه هر نقش از آخرین تغییر و تعداد ردیف‌های دسترسی آن ساخته می‌شود، پس همه
+    # worker ها بدون هماهنگی به یک عدد می‌رسند (حذف یک ردیف هم تعداد را عوض می‌کند).
+    statement = (
+        select(UserRole.role_id, func.max(UserRolePermission.updated_at), func.count(UserRolePermission.permission_id))
+        .join(UserRolePermission, UserRolePermission.role_id == UserRole.role_id, isouter=True)
+        .group_by(UserRole.role_id)
+    )
+    roles = {
+        role_id: zlib.crc32(f"{last_change}|{count}".encode())
+        for role_id, last_change, count in (await session.exec(statement)).all()
+    }
+    users = {
+        user_id: (role_id, is_active)
+        for user_id, role_id, is_active in (await session.exec(select(User.user_id, User.role_id, User.is_active))).all()
+    }
+    return PermissionVersions(roles=roles, users=users)
+
+
+# روت‌های ویرایش کاربر/نقش/دسترسی بعد از commit آن را invalidate می‌کنند
+permission_versions = SnapshotCache("permission_version", _load_versions, settings.PERMISSION_VERSION_CACHE_SECONDS)
@@ -0,0 +1,105 @@
+# app/core/warmup.py
+
+import asyncio
+import logging
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.cache import ALL_CACHES
+from app.models.order import OrderStatusEnum
+from app.models import BotMessage, Message, Order, OrderList, Patient, PaymentList, User, UserRole
+from setting import settings
+
+logger = logging.getLogger("app.warmup")
+
+# ============================================================
+#  گرم کردن worker قبل از پذیرفتن ترافیک
+# ============================================================
+# اولین درخواست‌های بعد از deploy هزینه باز کردن اتصال، introspection نوع‌های
+# asyncpg (مثل enum ها) و کامپایل SQL را می‌پردازند. این مرحله در پس‌زمینه
+# lifespan اجرا می‌شود و تا پایانش /health/ready پاسخ 503 می‌دهد.
+
+# فاصله تلاش مجدد وقتی دیتابیس هنوز در دسترس نیست (ثانیه)
+RETRY_DELAYS = (1, 2, 5, 10, 30)
+
+
+class WarmupState:
+    """Readiness of this worker, read by /health/ready."""
+
+    def __init__(self):
+        self.ready = False
+        self.attempts = 0
+        self.last_error: str | None = None
+        self.duration: float | None = None
+
+
+warmup_state = WarmupState()
+
+
+# کوئری‌های داغ، با همان شکل روت‌ها تا cache کامپایل SQLAlchemy و prepared
+# statement های asyncpg روی هر اتصال از قبل پر شوند. پارامترها عمداً به هیچ
+# ردیفی نمی‌خورند.
+HOT_STATEMENTS = (
+    # security.get_current_user (همه درخواست‌های احراز هویت شده)
+    lambda: select(User).where(User.mobile_number == "").options(
+        selectinload(User.role).selectinload(UserRole.user_role_permission)),
+    # ربات: وضعیت بیمار، نقش کاربر و متن پیام
+    lambda: select(Patient).where(Patient.telegram_id == ""),
+    lambda: select(User).where(User.telegram_id == "").options(selectinload(User.role)),
+    lambda: select(BotMessage).where(BotMessage.message_key == ""),
+    # سفارش و پرداخت
+    lambda: select(Order).where(Order.order_id == -1).options(
+        selectinload(Order.order_list).selectinload(OrderList.drug), selectinload(Order.payment_list)),
+    lambda: select(Order).where(Order.patient_id == -1, Order.order_status == OrderStatusEnum.CREATED),
+    lambda: select(PaymentList).where(PaymentList.order_id == -1),
+    # تاریخچه پیام‌ها
+    lambda: select(Message).where(Message.patient_id == -1).order_by(Message.created_at.asc()),
+)
+
+
+async def _prime_connection(engine) -> None:
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        async with AsyncSession(bind=conn) as session:
+            for build in HOT_STATEMENTS:
+                await session.exec(build())
+
+
+async def warm_up(engine, connections: int) -> None:
+    """
+    Open `connections` pool connections at the same time, run the hot
+    statements on each of them, then load every snapshot cache.
+    """
+    # همزمان، تا pool واقعاً N اتصال جدا باز کند (نه یک اتصال N بار)
+    await asyncio.gather(*(_prime_connection(engine) for _ in range(max(connections, 1))))
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        for cache in ALL_CACHES:
+            cache.invalidate()
+            await cache.get(session)
+
+
+async def run_warmup(engine) -> None:
+    """Background task of the lifespan: retries until the worker is warm."""
+    while not warmup_state.ready:
+        warmup_state.attempts += 1
+        start = time.perf_counter()
+        try:
+            await warm_up(engine, settings.WARMUP_CONNECTIONS)
+        except Exception as exc:
+            warmup_state.last_error = f"{type(exc).__name__}: {exc}"
+            delay = RETRY_DELAYS[min(warmup_state.attempts, len(RETRY_DELAYS)) - 1]
+            logger.warning("Warm-up attempt %s failed (%s), retrying in %ss",
+                           warmup_state.attempts, warmup_state.last_error, delay)
+            await asyncio.sleep(delay)
+            continue
+
+        warmup_state.duration = time.perf_counter() - start
+        warmup_state.last_error = None
+        warmup_state.ready = True
+        logger.info("Warm-up finished in %.2fs (%s connections)", warmup_state.duration,
+                    settings.WARMUP_CONNECTIONS)
@@ -0,0 +1,41 @@
+# app/core/worker.py
+
+import os
+import random
+
+from app.core import metrics
+from app.core.cache import ALL_CACHES
+from app.core.middleware import REQUEST_HISTORY
+
+# ============================================================
+#  وضعیت مخصوص هر worker
+# ============================================================
+# uvicorn --workers هر worker را با spawn می‌سازد (ایمپورت تازه)، اما با
+# gunicorn --preload یا هر fork دیگری، حافظه پروسه والد کپی می‌شود. این تابع
+# در شروع lifespan هر worker صدا زده می‌شود تا چیزی از والد به ارث نرسد.
+
+_initialized_pid: int | None = None
+
+
+async def init_worker_state(engine) -> None:
+    """
+    Reset the in-memory state of this process after fork.
+
+    - connection pool: connections opened by the parent are dropped without
+      being closed (`close=False`), so the parent's sockets stay untouched and
+      this worker opens its own;
+    - rate limiter history, metrics registries and snapshot caches start empty;
+    - the `random` generator is reseeded so workers do not share a sequence.
+    """
+    global _initialized_pid
+    pid = os.getpid()
+    if _initialized_pid == pid:
+        return
+    _initialized_pid = pid
+
+    await engine.dispose(close=False)
+    REQUEST_HISTORY.clear()
+    metrics.reset_metrics()
+    for cache in ALL_CACHES:
+        cache.clear()
+    random.seed()
@@ -1,7 +1,8 @@
 # app/models/api_client.py
 
-from typing import Optional
-from sqlmodel import Field, SQLModel
+from typing import List, Optional
+from sqlalchemy import Column
+from sqlmodel import Field, SQLModel, JSON
 from app.models.base import BaseDates
 import secrets
 
@@ -21,6 +22,11 @@ class ApiClientBase(SQLModel):
         default=True,
         description="Whether this API key is currently active and can be used."
     )
+    scopes: List[str] = Field(
+        sa_column=Column(JSON, nullable=False, server_default="[]"),
+        default=[],
+        description="Granted permissions as 'Form:action' (e.g. 'Patient:view'); '*' matches any form or action"
+    )
 
 
 class ApiClient(ApiClientBase, BaseDates, table=True):
@@ -31,20 +37,21 @@ class ApiClient(ApiClientBase, BaseDates, table=True):
 
     id: Optional[int] = Field(default=None, primary_key=True)
 
-    # The API key itself. Should be long and random.
+    # Public prefix of the key, only to recognise it in lists and logs.
+    # The full key is shown once on creation and never stored.
     api_key: str = Field(
         unique=True,
         index=True,
         nullable=False,
         max_length=128,
-        description="The actual API key for authentication."
+        description="Public prefix of the API key (the full key is not stored)."
     )
 
-    # Hashed version of the key for secure storage and verification.
+    # HMAC-SHA256 of the full key (see app/core/api_key.py), used for lookup.
     hashed_api_key: str = Field(
         unique=True,
         index=True,
         nullable=False,
         max_length=255,
-        description="Hashed version of the API key for secure comparison."
+        description="HMAC digest of the API key for constant-time verification."
     )
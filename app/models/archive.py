@@ -0,0 +1,42 @@
+# app/models/archive.py
+
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, Column
+from sqlmodel import Field
+from app.models.base import BaseDates
+
+
+class ArchiveSegment(BaseDates, table=True):
+    """
+    One compressed JSONL file of archived cases (tbl_ArchiveSegment), written
+    by app/core/archive.py. sha256 is checked before the hot rows are deleted
+    and again before a case is restored from the file.
+    """
+    __tablename__ = "tbl_ArchiveSegment"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    # نسبت به ARCHIVE_DIR
+    file_name: str = Field(max_length=255, nullable=False, unique=True)
+    sha256: str = Field(max_length=64, nullable=False)
+    row_count: int = Field(nullable=False)
+    size_bytes: int = Field(sa_column=Column(BigInteger, nullable=False))
+    # ردیف‌هایی که بعد از این لحظه تغییر کرده‌اند حذف نمی‌شوند
+    snapshot_at: datetime = Field(nullable=False)
+    # None: ردیف‌های داغ هنوز (کامل) حذف نشده‌اند
+    purged_at: Optional[datetime] = Field(default=None)
+
+
+class ArchivedCase(BaseDates, table=True):
+    """The part of one patient's history stored in a segment (tbl_ArchivedCase)."""
+    __tablename__ = "tbl_ArchivedCase"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    patient_id: int = Field(foreign_key="tbl_Patient.patient_id", nullable=False, index=True)
+    segment_id: int = Field(foreign_key="tbl_ArchiveSegment.id", nullable=False, index=True)
+    orders: int = Field(default=0, nullable=False)
+    order_items: int = Field(default=0, nullable=False)
+    payments: int = Field(default=0, nullable=False)
+    messages: int = Field(default=0, nullable=False)
+    # بعد از بازگرداندن، پرونده تا ARCHIVE_AFTER_DAYS دوباره بایگانی نمی‌شود
+    restored_at: Optional[datetime] = Field(default=None)
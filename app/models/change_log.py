@@ -0,0 +1,96 @@
+# app/models/change_log.py
+
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import BigInteger, Column, DDL, Index, Sequence, event, text
+from sqlmodel import Field, SQLModel
+
+
+# مقدار seq فقط هنگام شماره‌گذاری (app/core/change_log.py) از این sequence گرفته می‌شود
+change_log_seq = Sequence("seq_tbl_ChangeLog", metadata=SQLModel.metadata)
+
+
+class ChangeLog(SQLModel, table=True):
+    """
+    One row per insert/update/delete on tbl_Order, tbl_PaymentList, tbl_Patient
+    and tbl_Message (tbl_ChangeLog), written by the triggers below and read by
+    GET /changes. See app/core/change_log.py.
+    """
+    __tablename__ = "tbl_ChangeLog"
+    __table_args__ = (
+        # فقط seq یکتا؛ ردیف‌های هنوز بی‌شماره با index جزئی پیدا می‌شوند
+        Index("ix_tbl_ChangeLog_seq", "seq", unique=True),
+        Index("ix_tbl_ChangeLog_unsequenced", "id", postgresql_where=text("seq IS NULL")),
+    )
+
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, primary_key=True))
+    # شماره ترتیبی که کلاینت‌ها با since دنبال می‌کنند؛ بعد از نهایی شدن تراکنش داده می‌شود
+    seq: Optional[int] = Field(default=None, sa_column=Column(BigInteger, nullable=True))
+    # تراکنشی که تغییر را نوشته (txid_current)
+    txid: Optional[int] = Field(default=None, sa_column=Column(BigInteger, nullable=False, server_default=text("txid_current()")))
+
+    entity: str = Field(max_length=20, nullable=False)  # order / payment / patient / message
+    entity_id: int = Field(nullable=False)
+    operation: str = Field(max_length=6, nullable=False)  # insert / update / delete
+    patient_id: Optional[int] = Field(default=None)
+    # وضعیت جدید (برای پیام‌ها None) تا کلاینت بیشتر وقت‌ها نیازی به خواندن ردیف نداشته باشد
+    status: Optional[str] = Field(default=None, max_length=50)
+    changed_at: Optional[datetime] = Field(
+        default=None, nullable=False, sa_column_kwargs={"server_default": text("(now() AT TIME ZONE 'utc')")})
+
+
+# ------------------------------------------------------------
+#  trigger ها (فقط PostgreSQL). migration همین SQL را دارد؛ این‌جا برای create_all
+# ------------------------------------------------------------
+
+CHANGE_LOG_FUNCTION = """
+CREATE OR REPLACE FUNCTION fn_record_change() RETURNS trigger AS $$
+DECLARE
+    rec jsonb;
+    patient integer;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        rec := to_jsonb(OLD);
+    ELSE
+        rec := to_jsonb(NEW);
+        IF TG_OP = 'UPDATE' AND rec = to_jsonb(OLD) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    IF TG_ARGV[0] = 'payment' THEN
+        SELECT o.patient_id INTO patient FROM "tbl_Order" o WHERE o.order_id = (rec->>'order_id')::integer;
+    ELSE
+        patient := (rec->>'patient_id')::integer;
+    END IF;
+    INSERT INTO "tbl_ChangeLog" (entity, entity_id, operation, patient_id, status)
+    VALUES (TG_ARGV[0], (rec->>TG_ARGV[1])::integer, lower(TG_OP), patient, rec->>TG_ARGV[2]);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# جدول: (entity، ستون کلید، ستون وضعیت)
+CHANGE_LOG_TABLES = {
+    "tbl_Order": ("order", "order_id", "order_status"),
+    "tbl_PaymentList": ("payment", "payment_list_id", "payment_status"),
+    "tbl_Patient": ("patient", "patient_id", "patient_status"),
+    "tbl_Message": ("message", "messages_id", ""),
+}
+
+
+def drop_change_log_trigger(table: str) -> str:
+    return f'DROP TRIGGER IF EXISTS trg_change_log ON "{table}"'
+
+
+def change_log_trigger(table: str) -> str:
+    entity, key, status = CHANGE_LOG_TABLES[table]
+    return (f'CREATE TRIGGER trg_change_log AFTER INSERT OR UPDATE OR DELETE ON "{table}" '
+            f"FOR EACH ROW EXECUTE FUNCTION fn_record_change('{entity}', '{key}', '{status}')")
+
+
+event.listen(SQLModel.metadata, "after_create", DDL(CHANGE_LOG_FUNCTION).execute_if(dialect="postgresql"))
+for _table in CHANGE_LOG_TABLES:
+    # create_all روی دیتابیس موجود هم دوباره اجرا می‌شود
+    event.listen(SQLModel.metadata, "after_create",
+                 DDL(drop_change_log_trigger(_table)).execute_if(dialect="postgresql"))
+    event.listen(SQLModel.metadata, "after_create", DDL(change_log_trigger(_table)).execute_if(dialect="postgresql"))
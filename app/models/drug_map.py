@@ -19,6 +19,7 @@ class DrugMapBase(SQLModel):
     )
     drugs_id: int = Field(
         foreign_key="tbl_Drug.drugs_id",
+        index=True,
         primary_key=True,
         nullable=False,
         description="Drug ID"
@@ -0,0 +1,31 @@
+# app/models/idempotency_key.py
+
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, LargeBinary, UniqueConstraint
+from sqlmodel import Field
+from app.models.base import BaseDates
+
+
+class IdempotencyKey(BaseDates, table=True):
+    """
+    Stored response of a mutating request sent with an `Idempotency-Key` header
+    (tbl_IdempotencyKey). See app/core/idempotency.py.
+    """
+    __tablename__ = "tbl_IdempotencyKey"
+    __table_args__ = (UniqueConstraint("principal", "key", name="uq_idempotency_principal_key"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # کلیدها برای هر کاربر/کلاینت جدا هستند: "user:12" یا "client:3"
+    principal: str = Field(max_length=32, nullable=False)
+    key: str = Field(max_length=255, nullable=False)
+    # sha256 از متد، مسیر و بدنه؛ همان کلید با درخواست دیگر پذیرفته نمی‌شود
+    request_hash: str = Field(max_length=64, nullable=False)
+
+    # تا وقتی درخواست اول در حال اجراست None است
+    status_code: Optional[int] = Field(default=None)
+    content_type: Optional[str] = Field(default=None, max_length=100)
+    response_body: Optional[bytes] = Field(default=None, sa_column=Column(LargeBinary, nullable=True))
+
+    expires_at: datetime = Field(index=True, nullable=False)
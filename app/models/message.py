@@ -1,6 +1,7 @@
 # app/models/message.py
 
 from typing import Optional, TYPE_CHECKING,List
+from sqlalchemy import Index, text
 from sqlmodel import Field, Relationship, SQLModel,Column
 from app.models.base import BaseDates
 from typing import Optional, TYPE_CHECKING, List
@@ -16,6 +17,7 @@ class MessageBase(SQLModel):
     """Base model for Message shared properties"""
     user_id: Optional[int] = Field(
         foreign_key="tbl_User.user_id",
+        index=True,
         nullable=True,
         description="User ID"
     )
@@ -47,8 +49,17 @@ class MessageBase(SQLModel):
 
 
 class Message(MessageBase, BaseDates, table=True):
-    """Database model for Message table (tbl_message)"""
+    """
+    Database model for Message table (tbl_message).
+    در production جدول بر اساس created_at ماهانه partition شده است (migration
+    d9f2a6c8e154 و app/core/partitions.py)؛ مدل و کوئری‌ها تغییری نمی‌کنند.
+    """
     __tablename__ = "tbl_Message"
+    __table_args__ = (
+        # تاریخچه گفتگوی یک بیمار و پیام‌های خوانده نشده
+        Index("ix_tbl_Message_patient_id_created_at", "patient_id", "created_at"),
+        Index("ix_tbl_Message_unseen", "created_at", postgresql_where=text("NOT messages_seen")),
+    )
 
     messages_id: Optional[int] = Field(
         default=None,
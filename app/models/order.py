@@ -30,11 +30,13 @@ class OrderBase(SQLModel):
 
     patient_id: int = Field(
         foreign_key="tbl_Patient.patient_id",
+        index=True,
         nullable=False,
         description="Patient ID"
     )
     user_id: int = Field(
         foreign_key="tbl_User.user_id",
+        index=True,
         nullable=False,
         description="User ID who created the order"
     )
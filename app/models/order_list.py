@@ -14,11 +14,13 @@ class OrderListBase(SQLModel):
     """Base model for OrderList shared properties"""
     order_id: int = Field(
         foreign_key="tbl_Order.order_id",
+        index=True,
         nullable=False,
         description="Order ID"
     )
     drug_id: int = Field(
         foreign_key="tbl_Drug.drugs_id",
+        index=True,
         nullable=False,
         description="Drug ID"
     )
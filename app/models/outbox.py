@@ -0,0 +1,34 @@
+# app/models/outbox.py
+
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import Column, Index, Text
+from sqlmodel import Field, JSON
+from app.models.base import BaseDates, get_current_utc_naive
+from app.core.enums import OutboxStatusEnum
+
+
+class OutboxEvent(BaseDates, table=True):
+    """
+    Side effect recorded in the same transaction as the change that caused it
+    (tbl_Outbox); delivered later by the workers of app/core/outbox.py.
+    """
+    __tablename__ = "tbl_Outbox"
+    # کوئری claim فقط ردیف‌های pending آماده را به ترتیب می‌خواند
+    __table_args__ = (Index("ix_tbl_Outbox_status_available_at", "status", "available_at"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+
+    # مثلاً "order.status_changed"
+    event_type: str = Field(max_length=100, nullable=False)
+    # جدول و کلید ردیفی که تغییر کرده: ("order", 12)
+    aggregate_type: str = Field(max_length=50, nullable=False)
+    aggregate_id: int = Field(nullable=False)
+    payload: dict = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+
+    status: OutboxStatusEnum = Field(default=OutboxStatusEnum.PENDING, nullable=False)
+    attempts: int = Field(default=0, nullable=False)
+    # زمان تلاش بعدی؛ در حین ارسال تا پایان lease جلو برده می‌شود
+    available_at: datetime = Field(default_factory=get_current_utc_naive, nullable=False)
+    last_error: Optional[str] = Field(default=None, sa_column=Column(Text, nullable=True))
+    processed_at: Optional[datetime] = Field(default=None)
@@ -3,8 +3,9 @@
 from typing import Optional, TYPE_CHECKING, List
 from sqlmodel import Field, Relationship, SQLModel, JSON
 
-from app.models.base import BaseDates
-from sqlalchemy import Column
+from datetime import datetime
+from app.models.base import BaseDates, get_current_utc_naive
+from sqlalchemy import Column, Index
 from sqlalchemy.types import Enum as SQLAlchemyEnum # ایمپورت Enum از SQLAlchemy
 from app.models.base import Base
 import sqlalchemy as sa
@@ -104,12 +105,21 @@ class PatientBase(SQLModel):
 class Patient(PatientBase, BaseDates, table=True):
     """Database model for Patient table (tbl_Patient)"""
     __tablename__ = "tbl_Patient"
+    # صف‌های هر وضعیت (مثلاً منتظر مشاوره) به ترتیب زمان ورود به آن وضعیت
+    __table_args__ = (Index("ix_tbl_Patient_status_changed_at", "patient_status", "status_changed_at"),)
 
     patient_id: Optional[int] = Field(
         default=None,
         primary_key=True,
         description="Auto-incremented patient ID"
     )
+    # فقط با تغییر patient_status عوض می‌شود (app/core/patient_status.py)، برخلاف updated_at
+    status_changed_at: datetime = Field(
+        default_factory=get_current_utc_naive,
+        nullable=False,
+        sa_column_kwargs={"server_default": sa.text("(now() AT TIME ZONE 'utc')")},
+        description="When patient_status last changed"
+    )
 
     # Relationships
     order: List["Order"] = Relationship(back_populates="patient")
@@ -22,11 +22,13 @@ class PaymentListBase(SQLModel):
     """Base model for PaymentList shared properties"""
     order_id: int = Field(
         foreign_key="tbl_Order.order_id",
+        index=True,
         nullable=False,
         description="Order ID"
     )
     user_id: Optional [int] = Field(
         foreign_key="tbl_User.user_id",
+        index=True,
         default=None,
         nullable=True,
         description="User ID who approve the payment ( casher)"
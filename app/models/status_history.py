@@ -0,0 +1,113 @@
+# app/models/status_history.py
+
+from datetime import date, datetime
+from typing import Optional
+from sqlalchemy import BigInteger, Column, DDL, Index, PrimaryKeyConstraint, event, text
+from sqlmodel import Field, JSON, SQLModel
+
+
+class StatusHistory(SQLModel, table=True):
+    """
+    Append-only log of order_status / patient_status transitions
+    (tbl_StatusHistory), written by the triggers below. duration_ms is the time
+    spent in from_status; None for the first row of a new order or patient.
+    """
+    __tablename__ = "tbl_StatusHistory"
+    __table_args__ = (
+        # آخرین ورود هر سفارش/بیمار به وضعیت فعلی (در trigger)
+        Index("ix_tbl_StatusHistory_entity", "entity", "entity_id", "changed_at"),
+        # محاسبه rollup روزانه
+        Index("ix_tbl_StatusHistory_changed_at", "changed_at"),
+    )
+
+    id: Optional[int] = Field(default=None, sa_column=Column(BigInteger, primary_key=True))
+    entity: str = Field(max_length=20, nullable=False)  # order / patient
+    entity_id: int = Field(nullable=False)
+    # نام ذخیره شده enum (مثل AWAITING_PAYMENT)، مثل خود ستون وضعیت
+    from_status: Optional[str] = Field(default=None, max_length=50)
+    to_status: str = Field(max_length=50, nullable=False)
+    changed_at: Optional[datetime] = Field(
+        default=None, nullable=False, sa_column_kwargs={"server_default": text("(now() AT TIME ZONE 'utc')")})
+    duration_ms: Optional[int] = Field(default=None, sa_column=Column(BigInteger, nullable=True))
+
+
+class StatusRollup(SQLModel, table=True):
+    """
+    Time spent in each status, per day the status was left (tbl_StatusRollup).
+    Maintained by app/core/status_history.py; the SLA report reads only this.
+    """
+    __tablename__ = "tbl_StatusRollup"
+    __table_args__ = (PrimaryKeyConstraint("entity", "status", "day"),)
+
+    entity: str = Field(max_length=20)
+    status: str = Field(max_length=50)
+    day: date
+    count: int = Field(nullable=False)
+    avg_ms: int = Field(sa_column=Column(BigInteger, nullable=False))
+    max_ms: int = Field(sa_column=Column(BigInteger, nullable=False))
+    p50_ms: int = Field(sa_column=Column(BigInteger, nullable=False))
+    p90_ms: int = Field(sa_column=Column(BigInteger, nullable=False))
+    p95_ms: int = Field(sa_column=Column(BigInteger, nullable=False))
+    p99_ms: int = Field(sa_column=Column(BigInteger, nullable=False))
+    # {"شماره bucket": تعداد}؛ برای ترکیب چند روز (صدک‌ها قابل جمع نیستند)
+    histogram: dict = Field(default_factory=dict, sa_column=Column(JSON, nullable=False))
+    refreshed_at: datetime = Field(nullable=False)
+
+
+# ------------------------------------------------------------
+#  trigger ها (فقط PostgreSQL). migration همین SQL را دارد؛ این‌جا برای create_all
+# ------------------------------------------------------------
+
+STATUS_HISTORY_FUNCTION = """
+CREATE OR REPLACE FUNCTION fn_record_status_history() RETURNS trigger AS $$
+DECLARE
+    rec jsonb := to_jsonb(NEW);
+    old_rec jsonb;
+    entered timestamp;
+    changed timestamp := now() AT TIME ZONE 'utc';
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO "tbl_StatusHistory" (entity, entity_id, from_status, to_status, changed_at)
+        VALUES (TG_ARGV[0], (rec->>TG_ARGV[1])::integer, NULL, rec->>TG_ARGV[2], changed);
+        RETURN NULL;
+    END IF;
+    old_rec := to_jsonb(OLD);
+    IF old_rec->>TG_ARGV[2] IS NOT DISTINCT FROM rec->>TG_ARGV[2] THEN
+        RETURN NULL;
+    END IF;
+    SELECT max(h.changed_at) INTO entered FROM "tbl_StatusHistory" h
+    WHERE h.entity = TG_ARGV[0] AND h.entity_id = (rec->>TG_ARGV[1])::integer;
+    -- ردیف‌های قدیمی‌تر از این جدول: status_changed_at (بیمار) یا created_at
+    entered := coalesce(entered, (old_rec->>'status_changed_at')::timestamp, (old_rec->>'created_at')::timestamp);
+    INSERT INTO "tbl_StatusHistory" (entity, entity_id, from_status, to_status, changed_at, duration_ms)
+    VALUES (TG_ARGV[0], (rec->>TG_ARGV[1])::integer, old_rec->>TG_ARGV[2], rec->>TG_ARGV[2], changed,
+            greatest(0, (extract(epoch FROM changed - entered) * 1000)::bigint));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+# جدول: (entity، ستون کلید، ستون وضعیت)
+STATUS_HISTORY_TABLES = {
+    "tbl_Order": ("order", "order_id", "order_status"),
+    "tbl_Patient": ("patient", "patient_id", "patient_status"),
+}
+
+
+def drop_status_history_trigger(table: str) -> str:
+    return f'DROP TRIGGER IF EXISTS trg_status_history ON "{table}"'
+
+
+def status_history_trigger(table: str) -> str:
+    entity, key, status = STATUS_HISTORY_TABLES[table]
+    return (f'CREATE TRIGGER trg_status_history AFTER INSERT OR UPDATE OF {status} ON "{table}" '
+            f"FOR EACH ROW EXECUTE FUNCTION fn_record_status_history('{entity}', '{key}', '{status}')")
+
+
+event.listen(SQLModel.metadata, "after_create", DDL(STATUS_HISTORY_FUNCTION).execute_if(dialect="postgresql"))
+for _table in STATUS_HISTORY_TABLES:
+    # create_all روی دیتابیس موجود هم دوباره اجرا می‌شود
+    event.listen(SQLModel.metadata, "after_create",
+                 DDL(drop_status_history_trigger(_table)).execute_if(dialect="postgresql"))
+    event.listen(SQLModel.metadata, "after_create",
+                 DDL(status_history_trigger(_table)).execute_if(dialect="postgresql"))
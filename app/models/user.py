@@ -104,6 +104,7 @@ class User(UserBase, BaseDates, table=True):
     role_id: Optional[int] = Field(
         default=None,
         foreign_key="tbl_UserRole.role_id",
+        index=True,
         description="Reference to user's role"
     )
 
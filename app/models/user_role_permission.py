@@ -14,6 +14,7 @@ class UserRolePermissionBase(SQLModel):
     """Base model for UserRolePermission shared properties"""
     role_id: int = Field(
         foreign_key="tbl_UserRole.role_id",
+        index=True,
         nullable=False,
         description="Reference to role"
     )
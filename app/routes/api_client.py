@@ -0,0 +1,148 @@
+# app/routes/api_client.py
+
+from typing import List, Any
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
+
+from app.core.api_key import api_client_cache, generate_api_key
+from app.core.permission import FormName, PermissionAction, RoleChecker
+from database import get_session
+from app.models.api_client import ApiClient
+from app.schemas.api_client import ApiClientCreate, ApiClientCreated, ApiClientRead, ApiClientUpdate
+from security import get_current_active_user
+from app.models.user import User
+
+
+router = APIRouter()
+
+
+@router.post("/", status_code=status.HTTP_201_CREATED, response_model=ApiClientCreated)
+async def create_api_client(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.API_CLIENT, required_permission=PermissionAction.INSERT)),
+
+        client_in: ApiClientCreate,
+) -> Any:
+    """
+    ساخت کلاینت جدید (مثلاً ربات تلگرام). کلید کامل فقط در همین پاسخ نمایش داده می‌شود.
+    """
+    key, public_prefix, digest = generate_api_key()
+    db_client = ApiClient.model_validate(client_in, update={"api_key": public_prefix, "hashed_api_key": digest})
+    session.add(db_client)
+    try:
+        await session.commit()
+    except IntegrityError:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="API client with this name already exists.",
+        )
+    await session.refresh(db_client)
+    api_client_cache.invalidate()
+    return ApiClientCreated(**db_client.model_dump(), key=key)
+
+
+@router.get("/", response_model=List[ApiClientRead])
+async def read_api_clients(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.API_CLIENT, required_permission=PermissionAction.VIEW)),
+) -> Any:
+    """
+    لیست کلاینت‌ها (بدون کلید).
+    """
+    clients = (await session.exec(select(ApiClient).order_by(ApiClient.id))).all()
+    return clients
+
+
+@router.patch("/{client_id}", response_model=ApiClientRead)
+async def update_api_client(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.API_CLIENT, required_permission=PermissionAction.UPDATE)),
+
+        client_id: int,
+        client_in: ApiClientUpdate,
+) -> Any:
+    """
+    فعال/غیرفعال کردن کلید یا تغییر scope ها. در همین worker فوراً اعمال می‌شود و
+    در بقیه worker ها حداکثر بعد از API_CLIENT_CACHE_SECONDS.
+    """
+    db_client = await session.get(ApiClient, client_id)
+    if not db_client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"API client with ID {client_id} not found",
+        )
+
+    db_client.sqlmodel_update(client_in.model_dump(exclude_unset=True))
+    session.add(db_client)
+    await session.commit()
+    await session.refresh(db_client)
+    api_client_cache.invalidate()
+    return db_client
+
+
+@router.post("/{client_id}/rotate", response_model=ApiClientCreated)
+async def rotate_api_client_key(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.API_CLIENT, required_permission=PermissionAction.UPDATE)),
+
+        client_id: int,
+) -> Any:
+    """
+    ساخت کلید جدید برای کلاینت؛ کلید قبلی باطل می‌شود.
+    """
+    db_client = await session.get(ApiClient, client_id)
+    if not db_client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"API client with ID {client_id} not found",
+        )
+
+    key, public_prefix, digest = generate_api_key()
+    db_client.api_key = public_prefix
+    db_client.hashed_api_key = digest
+    session.add(db_client)
+    await session.commit()
+    await session.refresh(db_client)
+    api_client_cache.invalidate()
+    return ApiClientCreated(**db_client.model_dump(), key=key)
+
+
+@router.delete("/{client_id}")
+async def delete_api_client(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.API_CLIENT, required_permission=PermissionAction.DELETE)),
+
+        client_id: int,
+):
+    """
+    حذف کلاینت (ابطال دائمی کلید).
+    """
+    db_client = await session.get(ApiClient, client_id)
+    if not db_client:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"API client with ID {client_id} not found",
+        )
+
+    await session.delete(db_client)
+    await session.commit()
+    api_client_cache.invalidate()
+    return {"ok": True, "message": "API client deleted successfully"}
@@ -0,0 +1,63 @@
+# app/routes/archive.py
+
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlmodel import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.archive import ArchiveIntegrityError, CaseNotReady, rehydrate_patient
+from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.models.archive import ArchivedCase
+from app.schemas.archive import ArchivedCaseRead, RehydrateResult
+from database import get_session
+from security import get_current_active_user
+from app.models.user import User
+
+
+router = APIRouter()
+
+
+@router.get("/patients/{patient_id}", response_model=List[ArchivedCaseRead])
+async def read_archived_cases(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.ARCHIVE, required_permission=PermissionAction.VIEW)),
+
+        patient_id: int,
+) -> Any:
+    """
+    پرونده‌های بایگانی شده یک بیمار (بازگردانده شده‌ها با restored_at).
+    """
+    statement = select(ArchivedCase).where(ArchivedCase.patient_id == patient_id).order_by(ArchivedCase.id)
+    return (await session.exec(statement)).all()
+
+
+@router.post("/patients/{patient_id}/rehydrate", response_model=RehydrateResult)
+async def rehydrate_archived_case(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.ARCHIVE, required_permission=PermissionAction.UPDATE)),
+
+        patient_id: int,
+) -> Any:
+    """
+    برگرداندن سفارش‌ها، اقلام، پرداخت‌ها و پیام‌های بایگانی شده بیمار به جدول‌ها.
+    """
+    try:
+        restored = await rehydrate_patient(session, patient_id)
+    except CaseNotReady as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    except ArchiveIntegrityError as exc:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+    if restored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No archived case for patient with ID {patient_id}",
+        )
+    cases = restored.pop("cases")
+    await session.commit()
+    return RehydrateResult(patient_id=patient_id, cases=cases, **restored)
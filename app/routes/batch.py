@@ -0,0 +1,168 @@
+# app/routes/batch.py
+
+import asyncio
+import logging
+from typing import Any
+from urllib.parse import unquote
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+
+from app.core.serialization import FastJSONResponse
+from app.models.user import User
+from app.schemas.batch import BatchRequest, BatchResponse, BatchSubRequest
+from security import BATCH_PRINCIPAL_STATE, get_current_active_user
+from setting import settings
+
+logger = logging.getLogger("app.batch")
+
+router = APIRouter()
+
+READ_METHODS = {"GET"}
+
+# هدرهایی که از زیر-درخواست پذیرفته نمی‌شوند (احراز هویت مشترک است، بدنه را خودمان می‌سازیم
+# و بدنه زیر-پاسخ‌ها باید JSON خام و فشرده‌نشده باشد؛ با Accept ممکن بود msgpack دودویی برگردد)
+IGNORED_HEADERS = {"authorization", "x-api-key", "content-length", "host", "accept", "accept-encoding"}
+
+
+async def _dispatch(app, parent_scope: dict, principal, item: BatchSubRequest) -> dict:
+    """Run one sub-request through the whole ASGI app (middleware included) and collect its response."""
+    path, _, query = item.url.partition("?")
+    body = b"" if item.body is None else orjson.dumps(item.body)
+
+    headers = [(b"host", dict(parent_scope["headers"]).get(b"host", b"localhost"))]
+    headers += [(k.lower().encode(), v.encode()) for k, v in item.headers.items() if k.lower() not in IGNORED_HEADERS]
+    if body:
+        headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+
+    scope = {
+        "type": "http",
+        "asgi": parent_scope.get("asgi", {"version": "3.0"}),
+        "http_version": parent_scope.get("http_version", "1.1"),
+        "method": item.method,
+        "scheme": parent_scope.get("scheme", "http"),
+        "path": unquote(path),
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": parent_scope.get("root_path", ""),
+        "headers": headers,
+        "client": parent_scope.get("client"),
+        "server": parent_scope.get("server"),
+        # کاربر batch؛ get_current_user آن را به جای توکن برمی‌گرداند
+        "state": {BATCH_PRINCIPAL_STATE: principal},
+    }
+
+    response = {"status": 500, "headers": [], "body": []}
+    body_sent = False
+    response_complete = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # مثل یک کلاینت واقعی: بعد از پایان پاسخ، اتصال بسته می‌شود
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    try:
+        await app(scope, receive, send)
+    except Exception:
+        # ServerErrorMiddleware پاسخ 500 را فرستاده و خطا را دوباره raise می‌کند
+        logger.exception("Batch sub-request %s %s failed", item.method, item.url)
+    finally:
+        response_complete.set()
+
+    raw = b"".join(response["body"])
+    headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in response["headers"] if k.lower() != b"content-length"}
+    content_type = headers.get("content-type", "")
+    if not raw:
+        parsed = None
+    elif content_type.startswith("application/json"):
+        # بدون decode/encode دوباره: بایت‌های JSON مستقیم داخل پاسخ batch قرار می‌گیرند
+        parsed = orjson.Fragment(raw)
+    else:
+        parsed = raw.decode("utf-8", errors="replace")
+    return {"id": item.id, "status": response["status"], "headers": headers, "body": parsed}
+
+
+def _validate(batch: BatchRequest) -> None:
+    if len(batch.requests) > settings.BATCH_MAX_REQUESTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"A batch may contain at most {settings.BATCH_MAX_REQUESTS} requests.",
+        )
+    seen = set()
+    for item in batch.requests:
+        if item.id in seen:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Duplicate request id '{item.id}'.")
+        if not item.url.startswith("/") or item.url.split("?")[0].rstrip("/") == "/batch":
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid url for request '{item.id}'.")
+        unknown = [dep for dep in item.depends_on if dep not in seen]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Request '{item.id}' depends on unknown or later requests: {unknown}.",
+            )
+        seen.add(item.id)
+
+
+@router.post("", response_model=BatchResponse)
+async def run_batch(
+        *,
+        request: Request,
+        current_user: User = Depends(get_current_active_user),
+        batch: BatchRequest,
+) -> Any:
+    """
+    اجرای چند درخواست API در یک رفت و برگشت HTTP.
+
+    هر زیر-درخواست از تمام میدل‌ورها و بررسی دسترسی‌های مسیر خودش عبور می‌کند؛
+    فقط احراز هویت یک بار (برای خود batch) انجام می‌شود.
+
+    ترتیب اجرا:
+    - درخواست‌های GET با هم و همزمان اجرا می‌شوند؛
+    - هر درخواست نوشتنی (POST/PUT/PATCH/DELETE) منتظر همه درخواست‌های قبل از خودش
+      می‌ماند و درخواست‌های بعدی هم منتظر آن می‌مانند؛
+    - `depends_on` صریحاً منتظر درخواست‌های نام برده می‌ماند و اگر یکی از آن‌ها
+      موفق نبوده باشد، این درخواست اجرا نمی‌شود (status 424).
+    """
+    _validate(batch)
+
+    app = request.scope["app"]
+    semaphore = asyncio.Semaphore(max(settings.BATCH_CONCURRENCY, 1))
+    tasks: dict[str, asyncio.Task] = {}
+    last_write: asyncio.Task | None = None
+
+    async def run(item: BatchSubRequest, wait_for: list[asyncio.Task]) -> dict:
+        if wait_for:
+            await asyncio.wait(wait_for)
+        failed = [dep for dep in item.depends_on if tasks[dep].result()["status"] >= 400]
+        if failed:
+            return {"id": item.id, "status": status.HTTP_424_FAILED_DEPENDENCY, "headers": {},
+                    "body": {"detail": f"Skipped because {failed} did not succeed."}}
+        async with semaphore:
+            return await _dispatch(app, request.scope, current_user, item)
+
+    for item in batch.requests:
+        wait_for = [tasks[dep] for dep in item.depends_on]
+        if item.method in READ_METHODS:
+            if last_write is not None:
+                wait_for.append(last_write)
+            task = asyncio.create_task(run(item, wait_for))
+        else:
+            task = asyncio.create_task(run(item, list(tasks.values())))
+            last_write = task
+        tasks[item.id] = task
+
+    responses = await asyncio.gather(*tasks.values())
+    return FastJSONResponse({"responses": responses})
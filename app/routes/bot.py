@@ -0,0 +1,107 @@
+# app/routes/bot.py
+
+import asyncio
+from typing import Any
+from fastapi import APIRouter, Depends
+from sqlmodel import select, func
+from sqlalchemy.orm import selectinload
+
+from app.core.cache import bot_message_cache
+from app.models.order import OrderStatusEnum
+from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.serialization import FastJSONResponse, dump_obj
+from database import async_session_maker
+from app.models import Message, Order, OrderList, Patient, User, UserRole
+from app.schemas.bot import BotBootstrapRead
+from app.schemas.order import OrderReadWithDetails
+from app.schemas.patient import PatientRead
+from security import get_current_active_user
+from setting import settings
+
+router = APIRouter()
+
+# سفارش‌هایی که دیگر برای ربات اهمیتی ندارند
+CLOSED_ORDER_STATUSES = (OrderStatusEnum.REJECTED, OrderStatusEnum.DELIVERED)
+
+
+async def _patient(session, telegram_id: str):
+    return (await session.exec(select(Patient).where(Patient.telegram_id == telegram_id))).one_or_none()
+
+
+async def _staff_role(session, telegram_id: str):
+    statement = (
+        select(UserRole.role_name)
+        .join(User, User.role_id == UserRole.role_id)
+        .where(User.telegram_id == telegram_id)
+    )
+    return (await session.exec(statement)).first()
+
+
+async def _active_orders(session, telegram_id: str):
+    # join با بیمار تا منتظر پیدا شدن patient_id نمانیم (همزمان با بقیه کوئری‌ها)
+    statement = (
+        select(Order)
+        .join(Patient, Patient.patient_id == Order.patient_id)
+        .where(Patient.telegram_id == telegram_id, Order.order_status.not_in(CLOSED_ORDER_STATUSES))
+        .order_by(Order.created_at.desc())
+        .options(selectinload(Order.order_list).selectinload(OrderList.drug), selectinload(Order.payment_list))
+    )
+    return (await session.exec(statement)).all()
+
+
+async def _unread_count(session, telegram_id: str) -> int:
+    # messages_sender == False یعنی پیام از طرف پرسنل است
+    statement = (
+        select(func.count(Message.messages_id))
+        .join(Patient, Patient.patient_id == Message.patient_id)
+        .where(Patient.telegram_id == telegram_id, Message.messages_seen == False,  # noqa: E712
+               Message.messages_sender == False)  # noqa: E712
+    )
+    return (await session.exec(statement)).one()
+
+
+async def _bot_message_version(session, telegram_id: str) -> str:
+    return (await bot_message_cache.get(session)).version
+
+
+async def _on_own_connection(query, telegram_id: str):
+    async with async_session_maker() as session:
+        return await query(session, telegram_id)
+
+
+@router.get("/bootstrap/{telegram_id}", response_model=BotBootstrapRead)
+async def bot_bootstrap(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        _patient_check: None = Depends(
+            RoleChecker(form_name=FormName.PATIENT, required_permission=PermissionAction.VIEW)),
+        _order_check: None = Depends(
+            RoleChecker(form_name=FormName.ORDER, required_permission=PermissionAction.VIEW)),
+        _payment_check: None = Depends(
+            RoleChecker(form_name=FormName.PAYMENT_LIST, required_permission=PermissionAction.VIEW)),
+        telegram_id: str,
+) -> Any:
+    """
+    همه اطلاعات لازم ربات برای یک telegram_id در یک درخواست:
+    بیمار، نقش پرسنل (اگر باشد)، سفارش‌های باز با اقلام و پرداخت‌ها،
+    تعداد پیام‌های خوانده نشده و نسخه کاتالوگ پیام‌های ربات.
+
+    کوئری‌ها به هم وابسته نیستند و هر کدام روی اتصال جداگانه همزمان اجرا می‌شوند.
+    """
+    patient, staff_role, orders, unread, version = await asyncio.gather(
+        *(_on_own_connection(query, telegram_id)
+          for query in (_patient, _staff_role, _active_orders, _unread_count, _bot_message_version)))
+
+    body = {
+        "patient": patient,
+        "staff_role": staff_role,
+        "active_orders": orders,
+        "unread_messages": unread,
+        "bot_message_version": version,
+    }
+    if not settings.FAST_SERIALIZATION:
+        return body
+
+    body["patient"] = dump_obj(patient, PatientRead) if patient else None
+    body["active_orders"] = [dump_obj(order, OrderReadWithDetails) for order in orders]
+    return FastJSONResponse(body)
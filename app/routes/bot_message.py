@@ -7,10 +7,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
 # ایمپورت‌های پروژه شما
-from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.cache import bot_message_cache
+from app.core.permission import ApiClientScope, FormName, PermissionAction, RoleChecker
 from database import get_session
 from app.models.bot_message import BotMessage
-from app.schemas.bot_message import BotMessageCreate, BotMessageRead, BotMessageUpdate
+from app.schemas.bot_message import BotMessageCatalogRead, BotMessageCreate, BotMessageRead, BotMessageUpdate
 from security import get_current_active_user
 from app.models.user import User
 
@@ -30,9 +31,9 @@ async def read_message_by_key(
     """
     دریافت متن پیام بر اساس کلید (مخصوص استفاده در ربات).
     """
-    statement = select(BotMessage).where(BotMessage.message_key == key)
-    result = await session.exec(statement)
-    bot_message = result.first()
+    # همه پیام‌ها از کش درون حافظه (بدون کوئری در حالت عادی)
+    catalog = await bot_message_cache.get(session)
+    bot_message = catalog.messages.get(key)
 
     if not bot_message:
         raise HTTPException(
@@ -42,6 +43,18 @@ async def read_message_by_key(
     return bot_message
 
 
+@router.get("/catalog", response_model=BotMessageCatalogRead)
+async def read_message_catalog(
+        session: AsyncSession = Depends(get_session),
+) -> Any:
+    """
+    همه پیام‌ها در یک پاسخ به همراه نسخه کاتالوگ (مخصوص کش سمت ربات).
+    ربات تا وقتی نسخه (مثلاً از /bot/bootstrap) تغییر نکرده، دوباره آن را نمی‌گیرد.
+    """
+    catalog = await bot_message_cache.get(session)
+    return {"version": catalog.version, "messages": catalog.messages}
+
+
 # ==============================================================================
 # 2. روت‌های مدیریتی (CRUD) - مشابه disease_type.py
 # ==============================================================================
@@ -54,6 +67,8 @@ async def create_bot_message(
         # فرض بر اینکه FormName.BOT_MESSAGE را دارید، اگر نه، این خط را کامنت کنید یا اضافه کنید
         # _permission_check: None = Depends(
         #    RoleChecker(form_name="bot_message", required_permission=PermissionAction.INSERT)),
+        _client_scope: None = Depends(
+            ApiClientScope(form_name=FormName.BOT_MESSAGE, required_permission=PermissionAction.INSERT)),
         bot_message_in: BotMessageCreate,
 ) -> Any:
     """
@@ -70,6 +85,7 @@ async def create_bot_message(
             detail="Message key already exists.",
         )
     await session.refresh(db_message)
+    bot_message_cache.invalidate()
     return db_message
 
 
@@ -78,6 +94,8 @@ async def read_all_messages(
         *,
         current_user: User = Depends(get_current_active_user),
         session: AsyncSession = Depends(get_session),
+        _client_scope: None = Depends(
+            ApiClientScope(form_name=FormName.BOT_MESSAGE, required_permission=PermissionAction.VIEW)),
         skip: int = 0,
         limit: int = 100,
 ) -> Any:
@@ -94,6 +112,8 @@ async def update_bot_message(
         *,
         current_user: User = Depends(get_current_active_user),
         session: AsyncSession = Depends(get_session),
+        _client_scope: None = Depends(
+            ApiClientScope(form_name=FormName.BOT_MESSAGE, required_permission=PermissionAction.UPDATE)),
         message_id: int,
         message_in: BotMessageUpdate,
 ) -> Any:
@@ -113,4 +133,5 @@ async def update_bot_message(
     session.add(db_message)
     await session.commit()
     await session.refresh(db_message)
+    bot_message_cache.invalidate()
     return db_message
@@ -0,0 +1,48 @@
+# app/routes/change_log.py
+
+from typing import Any, List, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.change_log import ChangesExpired, api_status, assign_sequence, read_changes
+from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.schemas.change_log import ChangeFeedRead, ChangeRead
+from database import get_session
+from security import get_current_active_user
+from app.models.user import User
+
+
+router = APIRouter()
+
+
+@router.get("/", response_model=ChangeFeedRead)
+async def read_change_feed(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.CHANGE_LOG, required_permission=PermissionAction.VIEW)),
+
+        since: int = Query(default=0, ge=0),
+        limit: int = Query(default=100, ge=1, le=1000),
+        entity: Optional[List[Literal["order", "payment", "patient", "message"]]] = Query(default=None),
+        patient_id: Optional[int] = None,
+) -> Any:
+    """
+    تغییرات سفارش، پرداخت، بیمار و پیام بعد از since (به ترتیب seq).
+    کلاینت next_since را نگه می‌دارد و دفعه بعد با همان درخواست می‌دهد؛ 410 یعنی
+    تغییرات قدیمی‌تر از since پاک شده‌اند و باید وضعیت کامل را دوباره بخواند.
+    """
+    await assign_sequence()
+    try:
+        changes, next_since, has_more = await read_changes(session, since, limit, entity, patient_id)
+    except ChangesExpired:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Changes after this sequence were purged. Reload the full state and start again from next_since=0.",
+        )
+    return ChangeFeedRead(
+        changes=[ChangeRead.model_validate(change, update={"status": api_status(change)}) for change in changes],
+        next_since=next_since,
+        has_more=has_more,
+    )
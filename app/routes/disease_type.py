@@ -1,11 +1,13 @@
 # app/routes/disease_type.py
 
 from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
+from app.core.cache import drug_catalog_cache
+from app.core.conditional import collection_validators
 from app.core.permission import FormName, PermissionAction, RoleChecker
 from database import get_session
 from app.models.disease_type import DiseaseType
@@ -34,6 +36,7 @@ async def create_disease_type(
     session.add(db_disease_type)
     try:
         await session.commit()
+        drug_catalog_cache.invalidate()
     except IntegrityError:
         await session.rollback()
         raise HTTPException(
@@ -52,14 +55,22 @@ async def read_disease_types(
         _permission_check: None = Depends(
             RoleChecker(form_name=FormName.DISEASE_TYPE, required_permission=PermissionAction.VIEW)),
 
+        request: Request,
+        response: Response,
         skip: int = 0,
         limit: int = 100,
 ) -> Any:
     """
     دریافت لیست تمام انواع بیماری‌ها.
+    با If-None-Match در صورت عدم تغییر جدول، 304 برمی‌گردد.
     """
+    validators = await collection_validators(session, request, DiseaseType)
+    if validators.matches(request):
+        return validators.not_modified()
+
     statement = select(DiseaseType).offset(skip).limit(limit)
     disease_types = (await session.exec(statement)).all()
+    validators.apply(response)
     return disease_types
 
 
@@ -114,6 +125,7 @@ async def update_disease_type(
     session.add(db_disease_type)
     try:
         await session.commit()
+        drug_catalog_cache.invalidate()
     except IntegrityError:
         await session.rollback()
         raise HTTPException(
@@ -146,4 +158,5 @@ async def delete_disease_type(
 
     await session.delete(disease_type)
     await session.commit()
+    drug_catalog_cache.invalidate()
     return {"ok": True, "message": "Disease type deleted successfully"}
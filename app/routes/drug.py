@@ -1,12 +1,15 @@
 # app/routes/drug.py
 
 from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.cache import drug_catalog_cache
+from app.core.conditional import collection_validators, row_validators
 from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.serialization import FastJSONResponse, fast_list_response
 from app.models import DrugMap
 from database import get_session
 from app.models.drug import Drug
@@ -16,6 +19,7 @@ from security import get_current_active_user
 from app.models.user import User
 from app.schemas.drug_map import DrugMapCreate
 from sqlalchemy.exc import IntegrityError
+from setting import settings
 
 
 router = APIRouter()
@@ -60,6 +64,7 @@ async def create_drug(
     session.add(db_mapping)
     try:
         await session.commit()
+        drug_catalog_cache.invalidate()
     except IntegrityError:
         await session.rollback()
         raise HTTPException(
@@ -80,15 +85,23 @@ async def read_drugs(
         _permission_check: None = Depends(
             RoleChecker(form_name=FormName.DRUG, required_permission=PermissionAction.VIEW)),
 
+        request: Request,
+        response: Response,
         skip: int = 0,
         limit: int = 100,
 ) -> Any:
     """
     دریافت لیست داروها همراه با اطلاعات نوع بیماری.
+    با If-None-Match در صورت عدم تغییر جدول، 304 برمی‌گردد.
     """
+    validators = await collection_validators(session, request, Drug)
+    if validators.matches(request):
+        return validators.not_modified()
+
     statement = select(Drug).options(selectinload(Drug.disease_type)).offset(skip).limit(limit)
     drugs = (await session.exec(statement)).all()
-    return drugs
+    validators.apply(response)
+    return fast_list_response(drugs, DrugRead, headers=validators.headers)
 
 
 @router.get("/{drug_id}", response_model=DrugRead)
@@ -99,11 +112,23 @@ async def read_drug_by_id(
             RoleChecker(form_name=FormName.DRUG, required_permission=PermissionAction.VIEW)),
 
         drug_id: int,
+        request: Request,
+        response: Response,
         session: AsyncSession = Depends(get_session),
 ) -> Any:
     """
     دریافت اطلاعات یک دارو با شناسه (ID) به همراه نوع بیماری.
+    با If-None-Match / If-Modified-Since در صورت عدم تغییر، 304 برمی‌گردد.
     """
+    validators = await row_validators(session, Drug.drugs_id, Drug.updated_at, where=Drug.drugs_id == drug_id)
+    if validators is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Drug with ID {drug_id} not found",
+        )
+    if validators.matches(request):
+        return validators.not_modified()
+
     statement = select(Drug).where(Drug.drugs_id == drug_id).options(selectinload(Drug.disease_type))
     drug = (await session.exec(statement)).one_or_none()
 
@@ -112,6 +137,7 @@ async def read_drug_by_id(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Drug with ID {drug_id} not found",
         )
+    validators.apply(response)
     return drug
 
 
@@ -147,6 +173,7 @@ async def update_drug(
     db_drug.sqlmodel_update(update_data)
     session.add(db_drug)
     await session.commit()
+    drug_catalog_cache.invalidate()
     await session.refresh(db_drug)
     return db_drug
 
@@ -173,6 +200,7 @@ async def delete_drug(
 
     await session.delete(drug)
     await session.commit()
+    drug_catalog_cache.invalidate()
     return {"ok": True, "message": "Drug deleted successfully"}
 
 
@@ -190,26 +218,16 @@ async def read_drug_by_id(
     این اندپوینت `disease_type_id` را به عنوان ورودی می‌گیرد و با استفاده از جدول واسط `drug_map`،
     تمام داروهای مرتبط را از جدول `drug` استخراج کرده و به صورت یک لیست برمی‌گرداند.
     """
-    # مرحله 1: ابتدا بررسی می‌کنیم که آیا بیماری با این ID اصلاً وجود دارد یا خیر.
-    # این کار برای ارائه خطای 404 مناسب است.
-
-    disease_type = await session.get(DiseaseType, disease_type_id)
-    if not disease_type:
+    # کاتالوگ (نوع بیماری -> داروها) از کش درون حافظه خوانده می‌شود؛
+    # نبودن کلید یعنی بیماری با این ID وجود ندارد.
+    catalog = await drug_catalog_cache.get(session)
+    related_drugs = catalog.get(disease_type_id)
+    if related_drugs is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"بیماری با ID '{disease_type_id}' یافت نشد."
         )
 
-    # مرحله 2: پیدا کردن تمام داروهای مرتبط با استفاده از JOIN
-    # Drug <--- DrugMap ---> DiseaseType
-    statement = (
-        select(Drug)
-        .join(DrugMap, Drug.drugs_id == DrugMap.drugs_id)
-        .where(DrugMap.diseases_type_id == disease_type_id)
-    )
-
-    result = await session.exec(statement)
-    related_drugs = result.all()
-
     # اگر دارویی مرتبط پیدا نشد، یک لیست خالی برمی‌گردد که رفتار درستی است.
-    return related_drugs
\ No newline at end of file
+    # آیتم‌ها از قبل به شکل DrugRead (JSON) هستند
+    return FastJSONResponse(related_drugs) if settings.FAST_SERIALIZATION else related_drugs
\ No newline at end of file
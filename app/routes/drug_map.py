@@ -6,6 +6,7 @@ from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 
+from app.core.cache import drug_catalog_cache
 from app.core.permission import FormName, PermissionAction, RoleChecker
 from database import get_session
 from app.models.drug_map import DrugMap
@@ -50,6 +51,7 @@ async def create_drug_disease_mapping(
     session.add(db_mapping)
     try:
         await session.commit()
+        drug_catalog_cache.invalidate()
     except IntegrityError:
         await session.rollback()
         raise HTTPException(
@@ -103,4 +105,5 @@ async def delete_drug_disease_mapping(
 
     await session.delete(mapping)
     await session.commit()
+    drug_catalog_cache.invalidate()
     return {"ok": True, "message": "Mapping deleted successfully"}
@@ -0,0 +1,32 @@
+# app/routes/health.py
+
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+
+from app.core.warmup import warmup_state
+
+router = APIRouter()
+
+
+@router.get("/live")
+async def liveness() -> dict:
+    """
+    پروسه زنده است و event loop پاسخ می‌دهد (بدون دسترسی به دیتابیس).
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def readiness() -> JSONResponse:
+    """
+    آماده دریافت ترافیک: تا پایان warm-up این worker پاسخ 503 برمی‌گرداند
+    تا load balancer درخواستی به worker سرد نفرستد.
+    """
+    body = {
+        "status": "ready" if warmup_state.ready else "warming_up",
+        "attempts": warmup_state.attempts,
+        "warmup_seconds": warmup_state.duration,
+        "last_error": warmup_state.last_error,
+    }
+    code = status.HTTP_200_OK if warmup_state.ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(body, status_code=code)
@@ -8,8 +8,11 @@ from typing import Any
 
 from database import get_session
 from app.models.user import User
-from app.schemas.token import Token, LoginRequest  # ما از LoginRequest که ساختیم استفاده می‌کنیم
-from security import create_access_token, verify_password
+from app.schemas.token import Token, LoginRequest, RefreshRequest, TokenPayload  # ما از LoginRequest که ساختیم استفاده می‌کنیم
+from security import ALGORITHM, issue_tokens, verify_password
+from jose import jwt, JWTError
+from pydantic import ValidationError
+from setting import settings
 
 # یک روتر جدید برای مسیرهای مربوط به احراز هویت ایجاد می‌کنیم
 router = APIRouter()
@@ -45,14 +48,37 @@ async def login_for_access_token(
     if not db_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
 
-    # 4. ایجاد توکن دسترسی
-    # همانطور که شما خواستید، شماره موبایل کاربر را به عنوان 'subject' در توکن قرار می‌دهیم
-    access_token = create_access_token(
-        subject=db_user.mobile_number
+    # 4. ایجاد توکن دسترسی (کوتاه‌مدت، همراه دسترسی‌های نقش) و توکن refresh
+    # شماره موبایل کاربر همچنان 'subject' توکن است
+    return await issue_tokens(db_user, session)
+
+
+@router.post("/refresh-token", response_model=Token)
+async def refresh_access_token(
+        *,
+        session: AsyncSession = Depends(get_session),
+        refresh_in: RefreshRequest,
+) -> Any:
+    """
+    دریافت توکن دسترسی جدید با توکن refresh (بدون رمز عبور).
+    وضعیت کاربر و دسترسی‌های نقش دوباره از دیتابیس خوانده می‌شود.
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
     )
+    try:
+        payload = jwt.decode(refresh_in.refresh_token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+        token_data = TokenPayload(**payload)
+    except (JWTError, ValidationError):
+        raise credentials_exception
+
+    if token_data.typ != "refresh" or token_data.uid is None:
+        raise credentials_exception
+
+    db_user = await session.get(User, token_data.uid)
+    if not db_user or not db_user.is_active:
+        raise credentials_exception
 
-    # 5. برگرداندن توکن در قالب اسکیمای Token
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-    }
+    return await issue_tokens(db_user, session)
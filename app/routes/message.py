@@ -10,6 +10,7 @@ from datetime import date
 
 
 from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.serialization import fast_list_response
 from database import get_session
 from app.models.message import Message
 from app.models.patient import Patient  # برای اعتبارسنجی
@@ -72,7 +73,7 @@ async def read_messages(
     statement = select(Message).order_by(Message.created_at.desc()).offset(
         skip).limit(limit)
     messages = (await session.exec(statement)).all()
-    return messages
+    return fast_list_response(messages, MessageRead)
 
 
 @router.get("/{message_id}", response_model=MessageRead)
@@ -201,5 +202,5 @@ async def read_history_by_id(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Message for patient with ID {patient_id} not found",
         )
-    return response
+    return fast_list_response(response, MessageRead)
 
@@ -0,0 +1,40 @@
+# app/routes/metrics.py
+
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import render_prometheus
+from database import engine
+from setting import settings
+
+router = APIRouter()
+
+
+def verify_metrics_token(authorization: str | None = Header(default=None)) -> None:
+    """
+    دسترسی به متریک‌ها فقط با توکن ثابت METRICS_TOKEN (برای Prometheus).
+    اگر توکن تنظیم نشده باشد، اندپوینت غیرفعال است.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not authorization or not hmac.compare_digest(authorization, expected):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("", response_class=PlainTextResponse, include_in_schema=False)
+async def read_metrics(_token_check: None = Depends(verify_metrics_token)) -> PlainTextResponse:
+    """
+    متریک‌های این worker با فرمت متنی Prometheus.
+    """
+    return PlainTextResponse(
+        render_prometheus(engine),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
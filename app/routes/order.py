@@ -1,23 +1,31 @@
 # app/routes/order.py
 
 from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlmodel import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
-from sqlalchemy import sql
+from sqlalchemy import sql, func
 from datetime import datetime, timezone
 
+import orjson
+
+from app.core.conditional import row_validators
 from app.core.enums import OrderStatusEnum
+from app.core.idempotency import Idempotent
 from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.order_detail import read_order_detail_json, read_orders_detail_json
+from app.core.serialization import FastJSONResponse, fast_list_response
 from database import get_session
 from app.models.order import Order
 from app.models.patient import Patient
 from app.models.user import User
 from app.schemas.order import OrderCreate, OrderRead, OrderUpdate, OrderReadWithDetails, OrderComprehensiveUpdate
 from security import get_current_active_user
+from setting import settings
 from app.models.drug import Drug
 from app.models.order_list import OrderList
+from app.models.payment_list import PaymentList
 
 router = APIRouter()
 
@@ -29,6 +37,7 @@ async def create_order(
         session: AsyncSession = Depends(get_session),
         _permission_check: None = Depends(
             RoleChecker(form_name=FormName.ORDER, required_permission=PermissionAction.INSERT)),
+        _idempotency: None = Depends(Idempotent()),
         order_in: OrderCreate,
 ) -> Any:
     """
@@ -111,7 +120,23 @@ async def read_orders(
     """
     statement = select(Order).offset(skip).limit(limit)
     orders = (await session.exec(statement)).all()
-    return orders
+    return fast_list_response(orders, OrderRead)
+
+
+def _order_detail_stamps():
+    """
+    نسخه جزئیات سفارش فقط به updated_at خود سفارش بستگی ندارد: اقلام، داروی هر قلم
+    و پرداخت‌ها هم در پاسخ هستند. تعداد ردیف‌ها برای تشخیص حذف لازم است.
+    """
+    items = OrderList.order_id == Order.order_id
+    payments = PaymentList.order_id == Order.order_id
+    return (
+        select(func.count(OrderList.order_list_id)).where(items).scalar_subquery(),
+        select(func.max(OrderList.updated_at)).where(items).scalar_subquery(),
+        select(func.max(Drug.updated_at)).join(OrderList, OrderList.drug_id == Drug.drugs_id).where(items).scalar_subquery(),
+        select(func.count(PaymentList.payment_list_id)).where(payments).scalar_subquery(),
+        select(func.max(PaymentList.updated_at)).where(payments).scalar_subquery(),
+    )
 
 
 @router.get("/{order_id}", response_model=OrderReadWithDetails)
@@ -121,11 +146,34 @@ async def read_order_by_id(
         _permission_check: None = Depends(
             RoleChecker(form_name=FormName.ORDER, required_permission=PermissionAction.VIEW)),
         order_id: int,
+        request: Request,
+        response: Response,
         session: AsyncSession = Depends(get_session),
 ) -> Any:
     """
     دریافت اطلاعات یک سفارش با شناسه (ID) به همراه تمام اقلام آن.
+    با If-None-Match / If-Modified-Since در صورت عدم تغییر، 304 برمی‌گردد.
     """
+    validators = await row_validators(
+        session, Order.order_id, Order.updated_at, *_order_detail_stamps(), where=Order.order_id == order_id)
+    if validators is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Order with ID {order_id} not found",
+        )
+    if validators.matches(request):
+        return validators.not_modified()
+
+    if settings.FAST_SERIALIZATION:
+        # JSON کامل در یک کوئری (app/core/order_detail.py)
+        detail = await read_order_detail_json(session, order_id)
+        if detail is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Order with ID {order_id} not found",
+            )
+        return FastJSONResponse(orjson.Fragment(detail), headers=validators.headers)
+
     # از selectinload برای Eager Loading اقلام سفارش استفاده می‌کنیم.
     statement = (
         select(Order)
@@ -140,6 +188,7 @@ async def read_order_by_id(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Order with ID {order_id} not found",
         )
+    validators.apply(response)
     return order
 
 
@@ -160,11 +209,15 @@ async def comprehensive_update_order(
     """
     # 1. Get the order with its current items using selectinload
     # <<< CRITICAL CHANGE: Use selectinload to prevent session conflicts
+    # با FAST_SERIALIZATION پاسخ از مدل خواندنی ساخته می‌شود و فقط اقلام (برای جایگزینی) لازم است
+    if settings.FAST_SERIALIZATION:
+        options = [selectinload(Order.order_list)]
+    else:
+        options = [selectinload(Order.order_list).selectinload(OrderList.drug), selectinload(Order.payment_list)]
     statement = (
         select(Order)
         .where(Order.order_id == order_id)
-        .options(selectinload(Order.order_list).selectinload(OrderList.drug),selectinload(Order.payment_list))  # <--- این خط اضافه شده است
-
+        .options(*options)
     )
     result = await session.exec(statement)
     db_order = result.one_or_none() # Use one_or_none for safety
@@ -217,8 +270,11 @@ async def comprehensive_update_order(
         # session.add(db_order) # This is usually not needed for an update
 
         await session.commit()
-        await session.refresh(db_order)
+        if not settings.FAST_SERIALIZATION:
+            await session.refresh(db_order)
 
+    if settings.FAST_SERIALIZATION:
+        return FastJSONResponse(orjson.Fragment(await read_order_detail_json(session, order_id)))
     return db_order
 @router.delete("/{order_id}")
 async def delete_order(
@@ -260,20 +316,25 @@ async def get_orders_by_patient_and_status(
     """
     ایجاد یک سفارش جدید برای یک بیمار توسط یک کاربر.
     """
-    # 1. بررسی وجود بیمار (Patient)
-    patient = await session.get(Patient , patient_id)
-    if not patient:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Patient with ID {patient_id} not found."
-        )
-
-    statement = (select(Order)
-                 .where(Order.patient_id == patient_id ,Order.order_status == order_status)
-                 .options(selectinload(Order.order_list).selectinload(OrderList.drug),selectinload(Order.payment_list)))
-    result = await session.exec(statement)
-    orders = result.all()
-
-
+    if settings.FAST_SERIALIZATION:
+        orders = await read_orders_detail_json(
+            session, Order.patient_id == patient_id, Order.order_status == order_status)
+    else:
+        statement = (select(Order)
+                     .where(Order.patient_id == patient_id ,Order.order_status == order_status)
+                     .options(selectinload(Order.order_list).selectinload(OrderList.drug),selectinload(Order.payment_list)))
+        result = await session.exec(statement)
+        orders = result.all()
+
+    # وجود بیمار فقط وقتی چک می‌شود که سفارشی پیدا نشده باشد (یک کوئری کمتر در مسیر اصلی)
+    if not orders:
+        patient = await session.get(Patient , patient_id)
+        if not patient:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Patient with ID {patient_id} not found."
+            )
+
+    if settings.FAST_SERIALIZATION:
+        return FastJSONResponse([orjson.Fragment(order) for order in orders])
     return orders
-
@@ -0,0 +1,72 @@
+# app/routes/outbox.py
+
+from typing import List, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlmodel import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.enums import OutboxStatusEnum
+from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.models.base import get_current_utc_naive
+from app.models.outbox import OutboxEvent
+from app.schemas.outbox import OutboxEventRead
+from database import get_session
+from security import get_current_active_user
+from app.models.user import User
+
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[OutboxEventRead])
+async def read_outbox_events(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.OUTBOX, required_permission=PermissionAction.VIEW)),
+
+        event_status: OutboxStatusEnum = Query(default=OutboxStatusEnum.DEAD, alias="status"),
+        offset: int = 0,
+        limit: int = Query(default=50, le=500),
+) -> Any:
+    """
+    رویدادهای صف خروجی با وضعیت داده شده (پیش‌فرض: dead)، جدیدترین اول.
+    """
+    statement = (
+        select(OutboxEvent)
+        .where(OutboxEvent.status == event_status)
+        .order_by(OutboxEvent.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return (await session.exec(statement)).all()
+
+
+@router.post("/{event_id}/retry", response_model=OutboxEventRead)
+async def retry_outbox_event(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.OUTBOX, required_permission=PermissionAction.UPDATE)),
+
+        event_id: int,
+) -> Any:
+    """
+    برگرداندن یک رویداد dead به صف، با شمارنده تلاش صفر (مثلاً بعد از رفع توکن ربات).
+    """
+    db_event = await session.get(OutboxEvent, event_id)
+    if not db_event:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Outbox event not found")
+    if db_event.status != OutboxStatusEnum.DEAD:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Only dead events can be retried.")
+
+    db_event.status = OutboxStatusEnum.PENDING
+    db_event.attempts = 0
+    db_event.available_at = get_current_utc_naive()
+    db_event.last_error = None
+    session.add(db_event)
+    await session.commit()
+    await session.refresh(db_event)
+    return db_event
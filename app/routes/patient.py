@@ -1,19 +1,22 @@
 # In file: app/routes/patient.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlmodel import Session, select, or_,func,Date
-from typing import List,Any
-from datetime import date
+from typing import Dict, List, Any
+from datetime import date, datetime, time, timedelta
 
 # برای استفاده از AsyncSession، باید آن را از کتابخانه مربوطه import کنید
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from app.core.conditional import row_validators
+from app.core.patient_status import TRANSITIONS, bulk_transition, transition
 from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.serialization import fast_list_response
 # مسیر get_session باید به نسخه async اشاره کند
 from database import get_session
 from app.models.patient import Patient
 from app.schemas.patient import PatientCreate, PatientRead, PatientUpdate, WaitingForConsultantDatesResponse, \
-    AwaitingForConsultationPatientsResponse
+    AwaitingForConsultationPatientsResponse, PatientStatusTransition, PatientStatusTransitionResult
 from security import get_current_active_user
 from app.models.user import User
 from app.core.enums import PatientStatus
@@ -77,13 +80,13 @@ async def read_patients(
             RoleChecker(form_name=FormName.PATIENT, required_permission=PermissionAction.VIEW)),
         offset: int = 0,
         limit: int = Query(default=10, le=100)  # مقدار پیش‌فرض معقول‌تر و محدودیت روی 100
-) -> List[Patient]:
+) -> Any:
     """
     دریافت لیست بیماران با قابلیت صفحه‌بندی (pagination).
     """
     statement = select(Patient).offset(offset).limit(limit)
     patients = (await session.exec(statement)).all()
-    return patients
+    return fast_list_response(patients, PatientRead)
 
 
 # ===================================================================
@@ -96,17 +99,28 @@ async def read_patient(
         session: AsyncSession = Depends(get_session),
         _permission_check: None = Depends(
             RoleChecker(form_name=FormName.PATIENT, required_permission=PermissionAction.VIEW)),
+        request: Request,
+        response: Response,
         telegram_id: str
-) -> Patient:
+) -> Any:
     """
     دریافت اطلاعات یک بیمار خاص با استفاده از شناسه (ID).
+    با If-None-Match / If-Modified-Since در صورت عدم تغییر، 304 برمی‌گردد.
     """
+    validators = await row_validators(
+        session, Patient.patient_id, Patient.updated_at, where=Patient.telegram_id == telegram_id)
+    if validators is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found")
+    if validators.matches(request):
+        return validators.not_modified()
+
     statement = select(Patient).where(Patient.telegram_id == telegram_id)
 
     db_patient = (await session.exec(statement)).one_or_none()
 
     if not db_patient:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found")
+    validators.apply(response)
     return db_patient
 
 
@@ -136,11 +150,15 @@ async def update_patient(
     # استراتژی آپدیت مشابه فایل user.py
     # تبدیل داده‌های ورودی به دیکشنری و حذف مقادیر None یا ارسال نشده
     update_data = patient_in.model_dump(exclude_unset=True)
+    # وضعیت فقط از یال‌های مجاز تغییر می‌کند (409 در غیر این صورت)
+    new_status = update_data.pop("patient_status", None)
 
     # # به‌روزرسانی فیلدهای مدل با داده‌های جدید
     # for key, value in update_data.items():
     #     setattr(db_patient, key, value)
     db_patient.sqlmodel_update(update_data)
+    if new_status is not None:
+        transition(db_patient, new_status)
 
     session.add(db_patient)
     await session.commit()
@@ -192,10 +210,10 @@ async def waiting_for_consultation_by(
     """
 
     statement = (
-        select(func.cast(Patient.updated_at, Date))
+        select(func.cast(Patient.status_changed_at, Date))
         .where(Patient.patient_status == PatientStatus.AWAITING_CONSULTATION)
         .distinct()
-        .order_by(func.cast(Patient.updated_at, Date).desc())
+        .order_by(func.cast(Patient.status_changed_at, Date).desc())
     )
     results = await session.exec(statement)
     db_dates = results.all()
@@ -224,9 +242,13 @@ async def get_awaiting_for_consultation_by_date(
 
         # اعمال فیلترها
         .where(Patient.patient_status == PatientStatus.AWAITING_CONSULTATION)
-        .where(func.cast(Patient.updated_at, Date) == target_date)
+        # بازه به جای cast تا ix_tbl_Patient_status_changed_at استفاده شود
+        .where(Patient.status_changed_at >= datetime.combine(target_date, time.min),
+               Patient.status_changed_at < datetime.combine(target_date + timedelta(days=1), time.min))
         # گروه‌بندی برای اطمینان از نتایج منحصر به فرد برای هر بیمار
         .group_by(Patient.telegram_id, Patient.full_name)
+        # ترتیب صف: زودتر وارد صف شده، اول
+        .order_by(func.min(Patient.status_changed_at))
     )
     results = await session.exec(statement)
 
@@ -257,3 +279,38 @@ async def read_patient(
     if not db_patient:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Patient not found")
     return db_patient
+
+
+# ===================================================================
+# STATUS TRANSITIONS
+# ===================================================================
+@router.get("/status-transitions/", response_model=Dict[PatientStatus, List[PatientStatus]])
+async def read_status_transitions(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.PATIENT, required_permission=PermissionAction.VIEW)),
+) -> Any:
+    """
+    یال‌های مجاز ماشین وضعیت بیمار: {وضعیت فعلی: [وضعیت‌های بعدی]}.
+    """
+    return {current: sorted(targets, key=list(PatientStatus).index) for current, targets in TRANSITIONS.items()}
+
+
+@router.post("/status-transitions/", response_model=PatientStatusTransitionResult)
+async def transition_patients(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.PATIENT, required_permission=PermissionAction.UPDATE)),
+        transition_in: PatientStatusTransition,
+) -> Any:
+    """
+    انتقال دسته‌ای با یک UPDATE، مثلاً همه PAYMENT_CONFIRMED ها به AWAITING_SHIPMENT.
+    فقط بیمارانی که هنوز در from_status هستند جابجا می‌شوند؛ یال غیرمجاز 409 می‌گیرد.
+    """
+    moved = await bulk_transition(session, transition_in.from_status, transition_in.to_status,
+                                  transition_in.patient_ids)
+    await session.commit()
+    return PatientStatusTransitionResult(moved=len(moved), patient_ids=moved)
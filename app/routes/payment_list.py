@@ -15,7 +15,9 @@ from app.schemas.payment_list import PaymentListCreate, PaymentListRead, Payment
 from security import get_current_active_user
 
 #  for role check - this is the name define in database
+from app.core.idempotency import Idempotent
 from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.serialization import fast_list_response, dump_obj, FastJSONResponse
 from app.core.enums import PaymentStatusEnum
 from datetime import date
 
@@ -31,6 +33,7 @@ async def create_payment(
         current_user: User = Depends(get_current_active_user),
         _permission_check: None = Depends(
             RoleChecker(form_name=FormName.PAYMENT_LIST, required_permission=PermissionAction.INSERT)),
+        _idempotency: None = Depends(Idempotent()),
 
         session: AsyncSession = Depends(get_session),
         payment_in: PaymentListCreate,
@@ -70,7 +73,7 @@ async def read_payments(
     """
     statement = select(PaymentList).offset(skip).limit(limit)
     payments = (await session.exec(statement)).all()
-    return payments
+    return fast_list_response(payments, PaymentListRead)
 
 
 @router.get("/{payment_id}", response_model=PaymentListRead)
@@ -225,8 +228,8 @@ async def get_pending_payments_by_date(
             full_name_str = f"کاربر {tg_id}" if tg_id else "ناشناس"
 
         # 3. تبدیل آبجکت دیتابیس به دیکشنری و اضافه کردن فیلدهای دستی
-        # model_dump() اطلاعات خودِ جدول PaymentList را دیکشنری می‌کند
-        pay_dict = pay.model_dump()
+        # dump_obj فقط فیلدهای اسکیمای خروجی را بدون اعتبارسنجی Pydantic می‌خواند
+        pay_dict = dump_obj(pay, DatePaymentListRead)
 
         # فیلدهای اضافه مدل DatePaymentListRead را پر می‌کنیم
         pay_dict["full_name"] = full_name_str
@@ -235,7 +238,8 @@ async def get_pending_payments_by_date(
         # اضافه کردن به لیست خروجی
         output_list.append(pay_dict)
 
-    return output_list
+    # دیکشنری‌ها از دیتابیس ساخته شده‌اند؛ بدون اعتبارسنجی دوباره مستقیماً encode می‌شوند
+    return FastJSONResponse(output_list)
 
 
 @router.get("/by-order/{order_id}", response_model=List[PaymentListRead])
@@ -256,7 +260,7 @@ async def read_payments_by_order_id(
     payments = result.all()  # <--- تغییر مهم: دریافت لیست نتایج از Result
 
     # اگر می‌خواهید در صورت نبودن هیچ پرداختی، لیست خالی برگردد (توصیه می‌شود):
-    return payments
+    return fast_list_response(payments, PaymentListRead)
 
     # اگر حتماً می‌خواهید ارور 404 بدهد (وقتی هیچ پرداختی نیست):
     # if not payments:
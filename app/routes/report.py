@@ -0,0 +1,67 @@
+# app/routes/report.py
+
+from dataclasses import asdict
+from datetime import date, timedelta
+from itertools import groupby
+from typing import Any, Literal, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.change_log import STATUS_ENUMS
+from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.status_history import combine, read_rollups
+from app.models.base import get_current_utc_naive
+from app.schemas.report import StatusSlaDayRead, StatusSlaRead, StatusSlaReport
+from database import get_session
+from security import get_current_active_user
+from app.models.user import User
+
+
+router = APIRouter()
+
+
+@router.get("/status-sla", response_model=StatusSlaReport)
+async def read_status_sla(
+        *,
+        current_user: User = Depends(get_current_active_user),
+        session: AsyncSession = Depends(get_session),
+        _permission_check: None = Depends(
+            RoleChecker(form_name=FormName.REPORT, required_permission=PermissionAction.VIEW)),
+
+        entity: Literal["order", "patient"],
+        status_value: Optional[str] = Query(default=None, alias="status"),
+        date_from: Optional[date] = None,
+        date_to: Optional[date] = None,
+        daily: bool = False,
+) -> Any:
+    """
+    مدت ماندن سفارش/بیمار در هر وضعیت (میانگین، بیشینه و صدک‌ها به میلی‌ثانیه)
+    در بازه date_from تا date_to (پیش‌فرض: ۳۰ روز اخیر)، از روی خلاصه‌های روزانه.
+    مثال: entity=patient&status=awaiting_consultation یعنی زمان انتظار برای مشاوره.
+    """
+    date_to = date_to or get_current_utc_naive().date()
+    date_from = date_from or date_to - timedelta(days=29)
+    if date_from > date_to:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="date_from must not be after date_to.")
+
+    status_name = None
+    if status_value is not None:
+        kind = STATUS_ENUMS[entity]
+        try:
+            status_name = kind(status_value).name
+        except ValueError:
+            allowed = ", ".join(member.value for member in kind)
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                detail=f"Unknown {entity} status '{status_value}'. Allowed: {allowed}.")
+
+    rollups = await read_rollups(session, entity, date_from, date_to, status_name)
+    by_status = [list(rows) for _, rows in groupby(rollups, key=lambda row: row.status)]
+    report = StatusSlaReport(entity=entity, date_from=date_from, date_to=date_to,
+                             statuses=[StatusSlaRead(**asdict(combine(entity, rows))) for rows in by_status])
+    if daily:
+        report.days = [
+            StatusSlaDayRead(day=row.day, **asdict(combine(entity, [row])))
+            for rows in by_status for row in rows
+        ]
+    return report
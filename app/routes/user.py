@@ -3,7 +3,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import selectinload
-from sqlmodel import select
+from sqlmodel import select, or_
 from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List
 
@@ -16,7 +16,8 @@ from security import get_password_hash,get_current_active_user
 
 
 #  for role check - this is the name define in database
-from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.permission import ApiClientScope, FormName, PermissionAction, RoleChecker
+from app.core.token_claims import permission_versions
 
 
 # Create an API router for user-related endpoints
@@ -34,31 +35,31 @@ async def create_user(
     """
     Create a new user in the database.
     """
-    # Check if a user with the same telegram_id already exists
-    db_user = await session.exec(select(User).where(User.telegram_id == user_in.telegram_id))
-    if db_user.first():
+    # Check for duplicate telegram_id, national_code and mobile_number with a single query
+    duplicate_conditions = [User.telegram_id == user_in.telegram_id]
+    if user_in.national_code:
+        duplicate_conditions.append(User.national_code == user_in.national_code)
+    if user_in.mobile_number:
+        duplicate_conditions.append(User.mobile_number == user_in.mobile_number)
+
+    statement = select(User.telegram_id, User.national_code, User.mobile_number).where(or_(*duplicate_conditions))
+    existing_users = (await session.exec(statement)).all()
+
+    if any(row.telegram_id == user_in.telegram_id for row in existing_users):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="A user with this Telegram ID already exists."
         )
-
-    # Check for duplicate national_code
-    if user_in.national_code:
-        existing_user = await session.exec(select(User).where(User.national_code == user_in.national_code))
-        if existing_user.first():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="A user with this national code already exists."
-            )
-
-    # Check for duplicate mobile_number
-    if user_in.mobile_number:
-        existing_user = await session.exec(select(User).where(User.mobile_number == user_in.mobile_number))
-        if existing_user.first():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="A user with this mobile number already exists."
-            )
+    if user_in.national_code and any(row.national_code == user_in.national_code for row in existing_users):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A user with this national code already exists."
+        )
+    if user_in.mobile_number and any(row.mobile_number == user_in.mobile_number for row in existing_users):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A user with this mobile number already exists."
+        )
 
     # Hash the plain password from the input schema
     hashed_password = get_password_hash(user_in.password)
@@ -72,6 +73,7 @@ async def create_user(
     # Add the new user to the session and commit to the database
     session.add(db_user_obj)
     await session.commit()
+    permission_versions.invalidate()
     await session.refresh(db_user_obj)
 
     return db_user_obj
@@ -162,6 +164,7 @@ async def update_user(
     # Commit the changes to the database
     session.add(user_instance)
     await session.commit()
+    permission_versions.invalidate()
     await session.refresh(user_instance)
 
     return user_instance
@@ -190,6 +193,7 @@ async def delete_user(
     # Delete the user from the database
     await session.delete(user)
     await session.commit()
+    permission_versions.invalidate()
 
     return None
 
@@ -201,8 +205,9 @@ async def get_user_role_by_telegram_id(
         session: AsyncSession = Depends(get_session),
         # نکته: این اندپوینت باید توسط ربات (یک کاربر معتبر) فراخوانی شود،
         # پس آن را با get_current_active_user محافظت می‌کنیم.
-        # ربات خودش لاگین می‌کند و توکن می‌گیرد.
-        current_user: User = Depends(get_current_active_user)
+        # ربات با هدر X-API-Key (scope: User:view) یا با توکن کاربر فراخوانی می‌کند.
+        current_user: User = Depends(get_current_active_user),
+        _client_scope: None = Depends(ApiClientScope(form_name=FormName.USER, required_permission=PermissionAction.VIEW)),
 ):
     """
     Retrieve a user's role name by their Telegram ID.
@@ -14,6 +14,7 @@ from security import get_current_active_user
 
 #  for role check - this is the name define in database
 from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.token_claims import permission_versions
 
 
 router = APIRouter()
@@ -44,6 +45,7 @@ async def create_role(
     db_role = UserRole.model_validate(role_in)
     session.add(db_role)
     await session.commit()
+    permission_versions.invalidate()
     await session.refresh(db_role)
     return db_role
 
@@ -115,6 +117,7 @@ async def update_role(
 
     session.add(db_role)
     await session.commit()
+    permission_versions.invalidate()
     await session.refresh(db_role)
     return db_role
 
@@ -141,4 +144,5 @@ async def delete_role(
 
     await session.delete(role)
     await session.commit()
+    permission_versions.invalidate()
     return {"ok": True, "message": "Role deleted successfully"}
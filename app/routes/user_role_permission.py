@@ -14,6 +14,7 @@ from security import get_current_active_user
 
 #  for role check - this is the name define in database
 from app.core.permission import FormName, PermissionAction, RoleChecker
+from app.core.token_claims import permission_versions
 
 
 router = APIRouter()
@@ -47,6 +48,7 @@ async def create_permission(
     db_permission = UserRolePermission.model_validate(permission_in)
     session.add(db_permission)
     await session.commit()
+    permission_versions.invalidate()
     await session.refresh(db_permission)
     return db_permission
 
@@ -118,6 +120,7 @@ async def update_permission(
 
     session.add(db_permission)
     await session.commit()
+    permission_versions.invalidate()
     await session.refresh(db_permission)
     return db_permission
 
@@ -144,5 +147,6 @@ async def delete_permission(
 
     await session.delete(permission)
     await session.commit()
+    permission_versions.invalidate()
     # طبق الگوی patient.py، برای حذف موفقیت آمیز، پاسخ ۲۰۰ با یک پیام مناسب برمیگردانیم
     return {"ok": True, "message": "Permission deleted successfully"}
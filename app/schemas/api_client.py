@@ -0,0 +1,30 @@
+# app/schemas/api_client.py
+
+from datetime import datetime
+from typing import List, Optional
+from sqlmodel import SQLModel
+from app.models.api_client import ApiClientBase
+
+
+# برای ساختن (Create) - کلید توسط سرور ساخته می‌شود
+class ApiClientCreate(ApiClientBase):
+    pass
+
+
+# برای آپدیت (Update) - غیرفعال کردن یا تغییر scope ها
+class ApiClientUpdate(SQLModel):
+    is_active: Optional[bool] = None
+    scopes: Optional[List[str]] = None
+
+
+# برای خواندن (Read) - فقط پیشوند عمومی کلید
+class ApiClientRead(ApiClientBase):
+    id: int
+    api_key: str
+    created_at: datetime
+    updated_at: datetime
+
+
+# پاسخ ایجاد: کلید کامل فقط همین یک بار برگردانده می‌شود
+class ApiClientCreated(ApiClientRead):
+    key: str
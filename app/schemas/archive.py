@@ -0,0 +1,28 @@
+# app/schemas/archive.py
+
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel
+
+
+# برای خواندن (Read) - پرونده‌های بایگانی شده یک بیمار
+class ArchivedCaseRead(SQLModel):
+    id: int
+    patient_id: int
+    segment_id: int
+    orders: int
+    order_items: int
+    payments: int
+    messages: int
+    created_at: datetime
+    restored_at: Optional[datetime] = None
+
+
+# نتیجه بازگرداندن: تعداد ردیف‌هایی که به جدول‌ها برگشتند
+class RehydrateResult(SQLModel):
+    patient_id: int
+    cases: int
+    orders: int
+    order_items: int
+    payments: int
+    messages: int
@@ -0,0 +1,34 @@
+# app/schemas/batch.py
+
+from typing import Any, Dict, List, Literal, Optional
+from sqlmodel import SQLModel, Field
+
+
+# ---------------------------------------------------------------------------
+# ورودی /batch
+# ---------------------------------------------------------------------------
+class BatchSubRequest(SQLModel):
+    id: str = Field(description="Unique within the batch; used in depends_on and in the result")
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"] = "GET"
+    url: str = Field(description="Path and query string, e.g. '/order/12' or '/drug/?limit=20'")
+    body: Optional[Any] = Field(default=None, description="JSON body of POST/PUT/PATCH")
+    headers: Dict[str, str] = {}
+    depends_on: List[str] = Field(default=[], description="ids of earlier sub-requests that must succeed first")
+
+
+class BatchRequest(SQLModel):
+    requests: List[BatchSubRequest]
+
+
+# ---------------------------------------------------------------------------
+# خروجی /batch
+# ---------------------------------------------------------------------------
+class BatchSubResponse(SQLModel):
+    id: str
+    status: int
+    headers: Dict[str, str] = {}
+    body: Optional[Any] = None
+
+
+class BatchResponse(SQLModel):
+    responses: List[BatchSubResponse]
@@ -0,0 +1,18 @@
+# app/schemas/bot.py
+
+from typing import List, Optional
+from sqlmodel import SQLModel
+
+from app.schemas.order import OrderReadWithDetails
+from app.schemas.patient import PatientRead
+
+
+# ---------------------------------------------------------------------------
+# خروجی /bot/bootstrap: همه چیزی که ربات در هر تعامل لازم دارد
+# ---------------------------------------------------------------------------
+class BotBootstrapRead(SQLModel):
+    patient: Optional[PatientRead] = None  # None یعنی این telegram_id بیمار ثبت شده نیست
+    staff_role: Optional[str] = None  # نام نقش اگر صاحب telegram_id کاربر (پرسنل) باشد
+    active_orders: List[OrderReadWithDetails] = []
+    unread_messages: int = 0  # پیام‌های پرسنل که بیمار هنوز ندیده
+    bot_message_version: str  # اگر با نسخه کش ربات فرق دارد، /bot-message/catalog را دوباره بگیرد
@@ -1,6 +1,6 @@
 # app/schemas/bot_message.py
 
-from typing import Optional
+from typing import Dict, Optional
 from sqlmodel import SQLModel
 from app.models.bot_message import BotMessageBase
 
@@ -17,3 +17,9 @@ class BotMessageUpdate(SQLModel):
 # برای خواندن (Read) - شامل ID هم می‌شود
 class BotMessageRead(BotMessageBase):
     id: int
+
+
+# کاتالوگ کامل پیام‌ها برای کش سمت ربات
+class BotMessageCatalogRead(SQLModel):
+    version: str
+    messages: Dict[str, BotMessageRead]
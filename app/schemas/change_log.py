@@ -0,0 +1,23 @@
+# app/schemas/change_log.py
+
+from datetime import datetime
+from typing import List, Optional
+from sqlmodel import SQLModel
+
+
+# یک تغییر: کلاینت با entity و entity_id تصمیم می‌گیرد ردیف را دوباره بخواند یا نه
+class ChangeRead(SQLModel):
+    seq: int
+    entity: str
+    entity_id: int
+    operation: str
+    patient_id: Optional[int] = None
+    status: Optional[str] = None
+    changed_at: datetime
+
+
+# خروجی /changes؛ درخواست بعدی با since=next_since
+class ChangeFeedRead(SQLModel):
+    changes: List[ChangeRead]
+    next_since: int
+    has_more: bool  # اگر True است بلافاصله صفحه بعد را بگیرید
@@ -0,0 +1,21 @@
+# app/schemas/outbox.py
+
+from datetime import datetime
+from typing import Optional
+from sqlmodel import SQLModel
+from app.core.enums import OutboxStatusEnum
+
+
+# برای خواندن (Read) - بررسی رویدادهای dead و تلاش دوباره
+class OutboxEventRead(SQLModel):
+    id: int
+    event_type: str
+    aggregate_type: str
+    aggregate_id: int
+    payload: dict
+    status: OutboxStatusEnum
+    attempts: int
+    available_at: datetime
+    last_error: Optional[str] = None
+    processed_at: Optional[datetime] = None
+    created_at: datetime
@@ -21,6 +21,7 @@ class PatientCreate(PatientBase):
 class PatientRead(PatientBase):
     patient_id: int
     patient_status : PatientStatus
+    status_changed_at: datetime
     created_at: datetime
     updated_at: datetime
 
@@ -46,6 +47,20 @@ class PatientUpdate(SQLModel):
 
 
 
+# ------------------- STATUS TRANSITION SCHEMAS -------------------
+# انتقال دسته‌ای: همه بیماران from_status (یا فقط patient_ids) به to_status
+class PatientStatusTransition(SQLModel):
+    from_status: PatientStatus
+    to_status: PatientStatus
+    patient_ids: Optional[List[int]] = None  # None یعنی همه بیماران from_status
+
+
+class PatientStatusTransitionResult(SQLModel):
+    moved: int
+    patient_ids: List[int]
+
+
+
 class WaitingForConsultantDatesResponse(SQLModel):
     dates: Optional[List[date]] = None
 
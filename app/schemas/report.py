@@ -0,0 +1,30 @@
+# app/schemas/report.py
+
+from datetime import date
+from typing import List, Optional
+from sqlmodel import SQLModel
+
+
+# زمان ماندن در یک وضعیت (همه مقادیر به میلی‌ثانیه)
+class StatusSlaRead(SQLModel):
+    status: str
+    count: int  # تعداد خروج از این وضعیت در بازه
+    avg_ms: int
+    max_ms: int
+    p50_ms: int
+    p90_ms: int
+    p95_ms: int
+    p99_ms: int
+
+
+class StatusSlaDayRead(StatusSlaRead):
+    day: date
+
+
+# خروجی /report/status-sla
+class StatusSlaReport(SQLModel):
+    entity: str
+    date_from: date
+    date_to: date
+    statuses: List[StatusSlaRead]
+    days: Optional[List[StatusSlaDayRead]] = None  # فقط با daily=true
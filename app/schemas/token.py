@@ -9,6 +9,8 @@ class Token(BaseModel):
     """
     access_token: str
     token_type: str = "bearer"  # نوع توکن که طبق استاندارد OAuth2 معمولاً "bearer" است
+    refresh_token: str | None = None  # برای گرفتن توکن دسترسی جدید از /login/refresh-token
+    expires_in: int | None = None  # عمر توکن دسترسی به ثانیه
 
 class TokenPayload(BaseModel):
     """
@@ -16,6 +18,12 @@ class TokenPayload(BaseModel):
     این برای اعتبارسنجی محتوای توکن پس از decode کردن آن استفاده می‌شود.
     """
     sub: str | None = None # subject یا همان شناسه کاربر
+    typ: str = "access"  # "access" یا "refresh"
+    # فقط در توکن‌های دسترسی جدید (توکن‌های قدیمی فقط sub دارند)
+    uid: int | None = None  # user_id
+    rid: int | None = None  # role_id
+    perms: dict[str, int] | None = None  # {form_name: بیت‌های view=1,insert=2,update=4,delete=8}
+    pv: int | None = None  # نسخه دسترسی‌های نقش هنگام صدور توکن
 
 class LoginRequest(BaseModel):
     """
@@ -24,3 +32,10 @@ class LoginRequest(BaseModel):
     """
     username: str # ما از شماره موبایل به عنوان نام کاربری استفاده می‌کنیم
     password: str
+
+
+class RefreshRequest(BaseModel):
+    """
+    ورودی /login/refresh-token
+    """
+    refresh_token: str
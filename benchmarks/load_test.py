@@ -0,0 +1,216 @@
+# benchmarks/load_test.py
+"""
+Scenario-driven async load generator for the Fazel Pharma API.
+
+Start the API against the seeded database (see benchmarks.seed), then run:
+
+    python -m benchmarks.load_test --scenario bot --concurrency 50 --duration 60
+    python -m benchmarks.load_test --scenario mixed --base-url http://127.0.0.1:8000 --json report.json
+
+Every virtual user logs in once, then loops until the deadline, picking the next
+request from the scenario's weighted mix. Latencies are grouped by endpoint
+template and reported as throughput and p50/p95/p99.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+# Written by benchmarks.seed; the load generator itself does not import the app
+MANIFEST_PATH = Path(__file__).resolve().parent / "dataset.json"
+
+
+@dataclass
+class EndpointStats:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class Dataset:
+    """Random ids drawn from the ranges recorded in the seed manifest."""
+
+    def __init__(self, manifest: dict, rng: random.Random):
+        self.m = manifest
+        self.rng = rng
+        self.seeded_at = datetime.fromisoformat(manifest["created_at"]).date()
+
+    def _pick(self, key: str) -> int:
+        low, high = self.m[key]
+        return self.rng.randint(low, high)
+
+    def patient_id(self) -> int:
+        return self._pick("patients")
+
+    def telegram_id(self) -> str:
+        return f"{self.m['telegram_prefix']}{self.patient_id()}"
+
+    def order_id(self) -> int:
+        return self._pick("orders")
+
+    def payment_id(self) -> int:
+        return self._pick("payments")
+
+    def disease_type_id(self) -> int:
+        return self._pick("disease_types")
+
+    def bot_message_key(self) -> str:
+        return self.rng.choice(self.m["bot_message_keys"])
+
+    def recent_date(self, days: int = 30) -> date:
+        return self.seeded_at - timedelta(days=self.rng.randint(0, days))
+
+
+# Each entry: (weight, endpoint label, request builder(dataset) -> (method, url, json body))
+SCENARIOS = {
+    # پیام‌های ربات تلگرام: بیشتر خواندن وضعیت بیمار و متن پیام‌ها
+    "bot": [
+        (30, "GET /patient/{telegram_id}", lambda d: ("GET", f"/patient/{d.telegram_id()}", None)),
+        (15, "GET /user/role-by-telegram-id/{telegram_id}",
+         lambda d: ("GET", f"/user/role-by-telegram-id/{d.telegram_id()}", None)),
+        (25, "GET /bot-message/key/{key}", lambda d: ("GET", f"/bot-message/key/{d.bot_message_key()}", None)),
+        (10, "GET /order/get-order-by-status-by-patient-id/",
+         lambda d: ("GET", f"/order/get-order-by-status-by-patient-id/?patient_id={d.patient_id()}"
+                           f"&order_status=Created", None)),
+        (10, "GET /payment/by-order/{order_id}", lambda d: ("GET", f"/payment/by-order/{d.order_id()}", None)),
+        (10, "POST /message/", lambda d: ("POST", "/message/", {
+            "patient_id": d.patient_id(), "messages": "پیام آزمایشی بار", "messages_sender": True})),
+    ],
+    # پنل مشاور: صف مشاوره، تاریخچه پیام‌ها و جزئیات سفارش
+    "consultant": [
+        (10, "GET /patient/waiting-for-consultation-dates/",
+         lambda d: ("GET", "/patient/waiting-for-consultation-dates/", None)),
+        (15, "GET /patient/awaiting-for-consultation-by-date/{target_date}",
+         lambda d: ("GET", f"/patient/awaiting-for-consultation-by-date/{d.recent_date()}", None)),
+        (10, "GET /message/unread-message-dates/", lambda d: ("GET", "/message/unread-message-dates/", None)),
+        (30, "GET /message/history/{patient_id}", lambda d: ("GET", f"/message/history/{d.patient_id()}", None)),
+        (15, "GET /drug/read-drug-by-type/{disease_type_id}",
+         lambda d: ("GET", f"/drug/read-drug-by-type/{d.disease_type_id()}", None)),
+        (20, "GET /order/{order_id}", lambda d: ("GET", f"/order/{d.order_id()}", None)),
+    ],
+    # صندوق‌دار: پرداخت‌های دیده نشده و بررسی سفارش
+    "cashier": [
+        (15, "GET /payment/not-seen/", lambda d: ("GET", "/payment/not-seen/", None)),
+        (30, "GET /payment/not-seen/by-date/{date_str}",
+         lambda d: ("GET", f"/payment/not-seen/by-date/{d.recent_date()}", None)),
+        (25, "GET /payment/by-order/{order_id}", lambda d: ("GET", f"/payment/by-order/{d.order_id()}", None)),
+        (20, "GET /order/{order_id}", lambda d: ("GET", f"/order/{d.order_id()}", None)),
+        (10, "PATCH /payment/{payment_id}", lambda d: ("PATCH", f"/payment/{d.payment_id()}", {
+            "payment_status_explain": "load-test"})),
+    ],
+}
+# همان تعامل‌های ربات با اندپوینت ترکیبی /bot/bootstrap (برای مقایسه با "bot")
+SCENARIOS["bot-bootstrap"] = [
+    (70, "GET /bot/bootstrap/{telegram_id}", lambda d: ("GET", f"/bot/bootstrap/{d.telegram_id()}", None)),
+    (20, "GET /bot-message/key/{key}", lambda d: ("GET", f"/bot-message/key/{d.bot_message_key()}", None)),
+    (10, "POST /message/", lambda d: ("POST", "/message/", {
+        "patient_id": d.patient_id(), "messages": "پیام آزمایشی بار", "messages_sender": True})),
+]
+SCENARIOS["mixed"] = SCENARIOS["bot"] * 3 + SCENARIOS["consultant"] + SCENARIOS["cashier"]
+
+
+async def _login(client: httpx.AsyncClient, manifest: dict) -> str:
+    response = await client.post("/login/access-token", json=manifest["login"])
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+async def _virtual_user(client, token, scenario, dataset, deadline, stats: dict[str, EndpointStats]):
+    weights = [w for w, _, _ in scenario]
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        _, label, build = dataset.rng.choices(scenario, weights=weights)[0]
+        method, url, body = build(dataset)
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, json=body, headers=headers)
+            # 429 از rate limiter هم خطا حساب می‌شود (RATE_LIMIT_COUNT را برای تست بالا ببرید)
+            failed = response.status_code >= 500 or response.status_code == 429
+        except httpx.HTTPError:
+            failed = True
+        entry = stats.setdefault(label, EndpointStats())
+        entry.latencies.append(time.perf_counter() - start)
+        if failed:
+            entry.errors += 1
+
+
+def _report(stats: dict[str, EndpointStats], elapsed: float) -> list[dict]:
+    rows = []
+    for label, entry in sorted(stats.items(), key=lambda item: -len(item[1].latencies)):
+        rows.append({
+            "endpoint": label,
+            "requests": len(entry.latencies),
+            "errors": entry.errors,
+            "rps": len(entry.latencies) / elapsed,
+            "p50_ms": entry.percentile(50) * 1000,
+            "p95_ms": entry.percentile(95) * 1000,
+            "p99_ms": entry.percentile(99) * 1000,
+        })
+
+    total = sum(r["requests"] for r in rows)
+    print(f"\n{'endpoint':<62}{'reqs':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for r in rows:
+        print(f"{r['endpoint']:<62}{r['requests']:>8}{r['errors']:>6}{r['rps']:>9.1f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+    print(f"\nTotal: {total} requests in {elapsed:.1f}s -> {total / elapsed:.1f} req/s (latencies in ms)")
+    return rows
+
+
+async def run(args) -> list[dict]:
+    manifest = json.loads(MANIFEST_PATH.read_text(encoding="utf-8"))
+    scenario = SCENARIOS[args.scenario]
+    stats: dict[str, EndpointStats] = {}
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        token = await _login(client, manifest)
+
+        # Warm-up requests are not recorded
+        if args.warmup:
+            warmup_deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(
+                _virtual_user(client, token, scenario, Dataset(manifest, random.Random(i)), warmup_deadline, {})
+                for i in range(args.concurrency)))
+
+        start = time.perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*(
+            _virtual_user(client, token, scenario, Dataset(manifest, random.Random(args.seed + i)), deadline, stats)
+            for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return _report(stats, elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drive the API with a scenario mix and report latencies.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="mixed")
+    parser.add_argument("--concurrency", type=int, default=20, help="number of virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before the run")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"scenario": args.scenario, "concurrency": args.concurrency, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# benchmarks/order_detail.py
+"""
+Order detail: ORM path versus the single-query read model of
+app.core.order_detail, against the database of the usual .env (Postgres).
+
+    python -m benchmarks.order_detail                  # 1, 5, 10, 25, 50 items, 200 repeats
+    python -m benchmarks.order_detail --items 1 50 --repeat 500
+
+"orm" is what read_order_by_id did: select Order with selectinload of
+order_list -> drug and payment_list (4 queries), validate into
+OrderReadWithDetails and render. "read model" is one json_agg/LATERAL query
+whose text goes into the response as-is. Both run on the same connection,
+inside a transaction that is rolled back at the end, so no data is left behind.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from decimal import Decimal
+
+import orjson
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.order_detail import read_order_detail_json
+from app.core.query_stats import QueryStats, current_query_stats, install_query_stats
+from app.core.serialization import FastJSONResponse
+from app.models import Drug, Order, OrderList, Patient, PaymentList, User, UserRole
+from app.schemas.order import OrderReadWithDetails
+from database import engine
+
+PAYMENTS_PER_ORDER = 2
+
+AMOUNT_FIELDS = {"price", "payment_value"}
+
+
+def _amounts_as_decimal(value):
+    """
+    asyncpg decodes numeric 10000 as Decimal('1E+4'), which the ORM path sends
+    as "1E+4"; the read model sends "10000". Compare amounts by value.
+    """
+    if isinstance(value, list):
+        return [_amounts_as_decimal(item) for item in value]
+    if isinstance(value, dict):
+        return {key: Decimal(item) if key in AMOUNT_FIELDS and item is not None else _amounts_as_decimal(item)
+                for key, item in value.items()}
+    return value
+
+
+async def _create_orders(session: AsyncSession, sizes: list[int]) -> dict[int, int]:
+    """One order per size, with `size` items and a couple of payments. Returns {size: order_id}."""
+    role = UserRole(role_name="bench-order-detail", role_type=2)
+    session.add(role)
+    await session.flush()
+    user = User(full_name="bench", mobile_number="09990009999", national_code="bench-od", telegram_id="bench-od",
+                role_id=role.role_id, hashed_password="-")
+    patient = Patient(full_name="بیمار نمونه", telegram_id="bench-order-detail")
+    drugs = [Drug(drug_pname=f"داروی {i}", drug_lname=f"Drug {i}", drug_explain="توضیحات دارو",
+                  drug_how_to_use="روزی دو بار", unit="عدد", price=Decimal(10_000 + i)) for i in range(max(sizes))]
+    session.add_all([user, patient, *drugs])
+    await session.flush()
+
+    order_ids = {}
+    for size in sizes:
+        order = Order(patient_id=patient.patient_id, user_id=user.user_id)
+        session.add(order)
+        await session.flush()
+        session.add_all([
+            OrderList(order_id=order.order_id, drug_id=drug.drugs_id, qty=2, price=drug.price)
+            for drug in drugs[:size]
+        ])
+        session.add_all([
+            PaymentList(order_id=order.order_id, payment_value=Decimal(50_000), payment_refer_code=f"REF{p}")
+            for p in range(PAYMENTS_PER_ORDER)
+        ])
+        order_ids[size] = order.order_id
+    await session.flush()
+    session.expunge_all()
+    return order_ids
+
+
+async def orm_path(session: AsyncSession, order_id: int, field) -> bytes:
+    statement = (
+        select(Order)
+        .where(Order.order_id == order_id)
+        .options(selectinload(Order.order_list).selectinload(OrderList.drug), selectinload(Order.payment_list))
+    )
+    order = (await session.exec(statement)).one()
+    body = FastJSONResponse(await serialize_response(field=field, response_content=order)).body
+    # هر بار از دیتابیس، نه از identity map
+    session.expunge_all()
+    return body
+
+
+async def read_model_path(session: AsyncSession, order_id: int, field) -> bytes:
+    return FastJSONResponse(orjson.Fragment(await read_order_detail_json(session, order_id))).body
+
+
+async def measure(fn, session, order_id: int, field, repeat: int) -> tuple[float, int]:
+    """Median wall time in milliseconds and queries per call."""
+    samples = []
+    stats = QueryStats()
+    token = current_query_stats.set(stats)
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await fn(session, order_id, field)
+            samples.append(time.perf_counter() - start)
+    finally:
+        current_query_stats.reset(token)
+    return statistics.median(samples) * 1000, stats.count // repeat
+
+
+async def run(args) -> None:
+    install_query_stats(engine)
+    field = create_model_field(name="Response", type_=OrderReadWithDetails, mode="serialization")
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        session = AsyncSession(bind=conn, expire_on_commit=False)
+        try:
+            order_ids = await _create_orders(session, args.items)
+
+            print(f"Order detail, median of {args.repeat} calls ({PAYMENTS_PER_ORDER} payments per order)")
+            print(f"{'items':>6}{'orm ms':>10}{'queries':>9}{'read model ms':>15}{'queries':>9}{'speedup':>10}")
+            for size, order_id in order_ids.items():
+                orm_body = await orm_path(session, order_id, field)
+                fast_body = await read_model_path(session, order_id, field)
+                assert _amounts_as_decimal(json.loads(orm_body)) == _amounts_as_decimal(json.loads(fast_body)), \
+                    f"{size} items: outputs differ"
+
+                slow, slow_queries = await measure(orm_path, session, order_id, field, args.repeat)
+                fast, fast_queries = await measure(read_model_path, session, order_id, field, args.repeat)
+                print(f"{size:>6}{slow:>10.2f}{slow_queries:>9}{fast:>15.2f}{fast_queries:>9}{slow / fast:>9.1f}x")
+        finally:
+            await session.close()
+            await transaction.rollback()
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the order detail read model against the ORM path.")
+    parser.add_argument("--items", type=int, nargs="+", default=[1, 5, 10, 25, 50], help="items per order")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+# benchmarks/query_plans.py
+"""
+Query-plan regression check for the hot handlers, against the seeded database
+of the usual .env (see benchmarks.seed).
+
+    python -m benchmarks.query_plans             # compare with query_plans.json, exit code 1 on regression
+    python -m benchmarks.query_plans --update    # accept the current plans as the new baseline
+    python -m benchmarks.query_plans --case order_detail --verbose
+
+Every case calls its endpoint in-process (auth bypassed) and records the SQL
+the handler actually sent, with its parameters. Each SELECT is then run again
+under EXPLAIN (ANALYZE, BUFFERS) and compared with the stored baseline:
+
+- shape: the plan's node types (with the table of each scan, in plan order)
+  must match the baseline, so Nested Loop -> Hash Join or Index Scan -> Sort
+  over a Bitmap Heap Scan fails; a new Seq Scan is reported on its own too;
+- statements: more queries than the baseline (e.g. a new N+1), or a query
+  whose SQL is not in the baseline, fails (run --update after a deliberate
+  change);
+- buffers: shared hit + read may not exceed the baseline by more than
+  BUFFER_TOLERANCE (plus BUFFER_SLACK pages for small plans).
+
+Partitions (tbl_Message_p202610, tbl_Message_default) count as their parent;
+empty partitions that are seq-scanned without reading a page are ignored, and
+partitions with the same plan appear once, so a new month does not change the
+shape.
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import sys
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+from sqlalchemy import event, text
+
+from app.core.api_key import ApiClientPrincipal, parse_scopes
+from app.core.cache import ALL_CACHES
+from config import app
+from database import engine
+from security import get_current_active_user
+
+BASELINE_PATH = Path(__file__).resolve().parent / "query_plans.json"
+
+BUFFER_TOLERANCE = 1.5
+BUFFER_SLACK = 50
+
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Heap Scan", "Bitmap Index Scan"}
+_PARTITION = re.compile(r"^(?P<parent>.+)_(p\d{6}|default)$")
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    path: str
+    # کوئری انتخاب پارامتر مسیر از داده seed شده (ستون‌های آن در path جایگزین می‌شوند)
+    params_sql: str | None = None
+
+
+CASES = (
+    Case("patient_by_telegram_id", "/patient/{telegram_id}",
+         'SELECT telegram_id FROM "tbl_Patient" WHERE telegram_id IS NOT NULL ORDER BY patient_id OFFSET 5000 LIMIT 1'),
+    Case("bot_bootstrap", "/bot/bootstrap/{telegram_id}",
+         'SELECT telegram_id FROM "tbl_Patient" WHERE telegram_id IS NOT NULL ORDER BY patient_id OFFSET 5000 LIMIT 1'),
+    Case("order_detail", "/order/{order_id}",
+         'SELECT order_id FROM "tbl_Order" ORDER BY order_id OFFSET 1000 LIMIT 1'),
+    Case("orders_by_patient_and_status", "/order/get-order-by-status-by-patient-id/?patient_id={patient_id}"
+                                         "&order_status={order_status}",
+         'SELECT patient_id, \'Confirm\' AS order_status FROM "tbl_Order" WHERE order_status = \'CONFIRM\' '
+         'ORDER BY order_id OFFSET 1000 LIMIT 1'),
+    Case("unread_message_dates", "/message/unread-message-dates/"),
+    Case("message_history", "/message/history/{patient_id}",
+         'SELECT patient_id FROM "tbl_Message" WHERE patient_id IS NOT NULL ORDER BY messages_id OFFSET 1000 LIMIT 1'),
+    Case("pending_payment_dates", "/payment/not-seen/"),
+    Case("pending_payments_by_date", "/payment/not-seen/by-date/{day}",
+         'SELECT o.created_at::date AS day FROM "tbl_PaymentList" p JOIN "tbl_Order" o USING (order_id) '
+         "WHERE p.payment_status = 'NOT_SEEN' ORDER BY o.created_at DESC LIMIT 1"),
+    Case("drugs_by_disease", "/drug/read-drug-by-type/{diseases_type_id}",
+         'SELECT min(diseases_type_id) AS diseases_type_id FROM "tbl_DrugMap"'),
+)
+
+_capture: ContextVar[list | None] = ContextVar("query_plans_capture", default=None)
+
+
+def _install_capture() -> None:
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements = _capture.get()
+        if statements is not None and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+
+def _relation(name: str) -> str:
+    match = _PARTITION.match(name)
+    return match.group("parent") if match else name
+
+
+def _empty_partition(node: dict) -> bool:
+    # partition های خالی (ماه‌های آینده) همیشه seq scan می‌شوند و چیزی نمی‌خوانند
+    blocks = node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0)
+    return node["Node Type"] == "Seq Scan" and blocks == 0 and bool(_PARTITION.match(node.get("Relation Name", "")))
+
+
+def plan_shape(node: dict) -> list[str]:
+    """Node types in plan order, scans with their table ("Index Scan on tbl_Order")."""
+    if _empty_partition(node):
+        return []
+    name = node.get("Relation Name")
+    shape = [node["Node Type"] if name is None else f"{node['Node Type']} on {_relation(name)}"]
+    children = [plan_shape(child) for child in node.get("Plans", ())]
+    if node["Node Type"] in ("Append", "Merge Append"):
+        children = [child for index, child in enumerate(children) if child not in children[:index]]
+    for child in children:
+        shape += child
+    return shape
+
+
+def plan_summary(plan: dict) -> dict:
+    """Access method per table ("index" / "seq"), plan shape and total shared buffers."""
+    access: dict[str, set[str]] = {}
+
+    def walk(node: dict) -> None:
+        name = node.get("Relation Name")
+        if name is not None and not _empty_partition(node):
+            kind = "seq" if node["Node Type"] == "Seq Scan" else "index" if node["Node Type"] in INDEX_NODES else "other"
+            access.setdefault(_relation(name), set()).add(kind)
+        for child in node.get("Plans", ()):
+            walk(child)
+
+    root = plan["Plan"]
+    walk(root)
+    return {
+        "access": {relation: sorted(kinds) for relation, kinds in sorted(access.items())},
+        "nodes": plan_shape(root),
+        "buffers": root.get("Shared Hit Blocks", 0) + root.get("Shared Read Blocks", 0),
+        "ms": round(plan.get("Execution Time", 0.0), 3),
+    }
+
+
+async def _path_params(conn, case: Case) -> dict:
+    if case.params_sql is None:
+        return {}
+    row = (await conn.execute(text(case.params_sql))).mappings().first()
+    if row is None:
+        raise RuntimeError(f"{case.name}: no data for the path parameters; seed the database first")
+    return {key: str(value) for key, value in row.items()}
+
+
+async def run_case(client: httpx.AsyncClient, case: Case) -> list[dict]:
+    async with engine.connect() as conn:
+        path = case.path.format(**await _path_params(conn, case))
+    # کش‌های درون حافظه خالی، تا کوئری بارگذاری آن‌ها هم سنجیده شود
+    for cache in ALL_CACHES:
+        cache.clear()
+    statements: list = []
+    token = _capture.set(statements)
+    try:
+        response = await client.get(path)
+    finally:
+        _capture.reset(token)
+    if response.status_code != 200:
+        raise RuntimeError(f"{case.name}: GET {path} returned {response.status_code}: {response.text[:200]}")
+
+    summaries = []
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            for statement, parameters in statements:
+                result = await conn.exec_driver_sql(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters)
+                plan = result.scalar_one()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                summaries.append({"sql": " ".join(statement.split()), **plan_summary(plan[0])})
+        finally:
+            await transaction.rollback()
+    return summaries
+
+
+def compare(name: str, baseline: list[dict], current: list[dict]) -> list[str]:
+    problems = []
+    if len(current) > len(baseline):
+        problems.append(f"{name}: {len(current)} statements (baseline {len(baseline)})")
+    # جفت کردن بر اساس متن SQL و نه ترتیب؛ handler هایی مثل bot bootstrap کوئری‌ها را همزمان اجرا می‌کنند
+    remaining: dict[str, list[dict]] = {}
+    for old in baseline:
+        remaining.setdefault(old["sql"], []).append(old)
+    for index, new in enumerate(current, start=1):
+        label = f"{name}#{index}"
+        if not remaining.get(new["sql"]):
+            problems.append(f"{label}: statement not in the baseline: {new['sql'][:120]}")
+            continue
+        old = remaining[new["sql"]].pop(0)
+        for relation, kinds in new["access"].items():
+            before = old["access"].get(relation)
+            if "seq" in kinds and (before is None or "seq" not in before):
+                problems.append(f"{label}: Seq Scan on {relation} (baseline: {', '.join(before or ['not read'])})")
+        if new["nodes"] != old["nodes"]:
+            problems.append(f"{label}: plan shape {' > '.join(new['nodes'])} (baseline {' > '.join(old['nodes'])})")
+        limit = old["buffers"] * BUFFER_TOLERANCE + BUFFER_SLACK
+        if new["buffers"] > limit:
+            problems.append(f"{label}: {new['buffers']} shared buffers (baseline {old['buffers']}, limit {limit:.0f})")
+    return problems
+
+
+async def run(args) -> int:
+    # همه دسترسی‌ها، بدون کوئری احراز هویت
+    principal = ApiClientPrincipal(id=0, client_name="query-plans", scopes=parse_scopes(["*"]), digest="")
+    app.dependency_overrides[get_current_active_user] = lambda: principal
+    _install_capture()
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    cases = [case for case in CASES if not args.case or case.name in args.case]
+    results: dict[str, list[dict]] = {}
+    problems: list[str] = []
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://query-plans") as client:
+            for case in cases:
+                current = await run_case(client, case)
+                results[case.name] = current
+                old = baseline.get(case.name)
+                case_problems = [] if args.update or old is None else compare(case.name, old, current)
+                problems += case_problems
+                status = "NEW" if old is None else "FAIL" if case_problems else "ok"
+                buffers = sum(item["buffers"] for item in current)
+                old_buffers = sum(item["buffers"] for item in old) if old else "-"
+                print(f"{case.name:<32}{len(current):>4} stmt{buffers:>9} buf (baseline {old_buffers}){status:>6}")
+                if args.verbose:
+                    for item in current:
+                        print(f"    {item['buffers']:>7} buf {item['ms']:>9.3f} ms  {item['access']}  {item['sql'][:120]}")
+    finally:
+        app.dependency_overrides.pop(get_current_active_user, None)
+        await engine.dispose()
+
+    if args.update:
+        BASELINE_PATH.write_text(json.dumps({**baseline, **results}, indent=2, ensure_ascii=False) + "\n")
+        print(f"Baseline written to {BASELINE_PATH}")
+        return 0
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    missing = [case.name for case in cases if case.name not in baseline]
+    if missing:
+        print(f"No baseline for {', '.join(missing)}; run with --update", file=sys.stderr)
+    return 1 if problems else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the plans of the hot queries against stored baselines.")
+    parser.add_argument("--update", action="store_true", help="store the current plans as the baseline")
+    parser.add_argument("--case", nargs="+", choices=[case.name for case in CASES], help="run only these cases")
+    parser.add_argument("--verbose", action="store_true", help="print every statement with its plan summary")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+# benchmarks/seed.py
+"""
+Seed a local Postgres with a realistic synthetic dataset for load testing.
+
+Rows are streamed with asyncpg's binary COPY (copy_records_to_table), which is
+orders of magnitude faster than ORM inserts. Ids are assigned client side,
+starting after the current max id of every table, and the serial sequences
+are moved forward at the end, so the seed can run on a non-empty database.
+
+Usage (from the project root, with the usual .env):
+
+    python -m benchmarks.seed                      # 100k patients, 1M messages, ...
+    python -m benchmarks.seed --patients 1000 --messages 10000 --orders 1500
+    python -m benchmarks.seed --reset              # TRUNCATE the tables first
+
+A manifest with the generated id ranges and the benchmark login is written to
+benchmarks/dataset.json and read by benchmarks.load_test.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from app.core.enums import GenderEnum, PackageTypeEnum, PatientStatus, OrderStatusEnum, PaymentStatusEnum
+from app.core.permission import FormName
+from app.models.base import get_current_utc_naive
+from database import engine
+from security import get_password_hash
+
+MANIFEST_PATH = Path(__file__).resolve().parent / "dataset.json"
+
+BATCH_SIZE = 20_000
+
+BENCH_USER_MOBILE = "09990000000"
+BENCH_USER_PASSWORD = "bench-password"
+
+BOT_MESSAGE_KEYS = [
+    "welcome_start", "ask_full_name", "ask_age", "ask_weight", "ask_height", "ask_mobile",
+    "ask_address", "profile_completed", "consultation_requested", "invoice_ready",
+    "payment_received", "payment_rejected", "order_shipped", "help",
+]
+
+PERSIAN_SAMPLES = [
+    "سلام، وقت بخیر. داروها را طبق دستور مصرف کنید.",
+    "لطفا تصویر آزمایش خود را ارسال کنید.",
+    "آیا حساسیت دارویی خاصی دارید؟",
+    "سفارش شما ثبت شد و پس از پرداخت ارسال می‌شود.",
+    "ممنون از پاسخ شما، مشاور به زودی پیام می‌دهد.",
+    "دوز مصرفی را روزی دو بار بعد از غذا رعایت کنید.",
+]
+
+# Tables in dependency order (children last); used for --reset and id offsets
+TABLE_IDS = {
+    "tbl_DiseaseType": "diseases_type_id",
+    "tbl_Drug": "drugs_id",
+    "tbl_UserRole": "role_id",
+    "tbl_UserRolePermission": "permission_id",
+    "tbl_User": "user_id",
+    "tbl_BotMessage": "id",
+    "tbl_Patient": "patient_id",
+    "tbl_Order": "order_id",
+    "tbl_OrderList": "order_list_id",
+    "tbl_PaymentList": "payment_list_id",
+    "tbl_Message": "messages_id",
+}
+
+
+def _random_moment(rng: random.Random, now, days: int):
+    return now - timedelta(seconds=rng.randint(0, days * 86400))
+
+
+def _batched(rows, size: int = BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _copy(apg, table: str, columns: list[str], rows) -> int:
+    total = 0
+    for batch in _batched(rows):
+        await apg.copy_records_to_table(table, records=batch, columns=columns)
+        total += len(batch)
+    return total
+
+
+async def _max_ids(apg) -> dict[str, int]:
+    return {
+        table: await apg.fetchval(f'SELECT coalesce(max("{pk}"), 0) FROM "{table}"')
+        for table, pk in TABLE_IDS.items()
+    }
+
+
+async def _sync_sequences(apg) -> None:
+    for table, pk in TABLE_IDS.items():
+        await apg.execute(
+            f"SELECT setval(pg_get_serial_sequence('\"{table}\"', '{pk}'), "
+            f'coalesce((SELECT max("{pk}") FROM "{table}"), 0) + 1, false)'
+        )
+
+
+async def seed(args) -> dict:
+    rng = random.Random(args.seed)
+    now = get_current_utc_naive().replace(microsecond=0)
+    manifest: dict = {"created_at": now.isoformat(), "login": {
+        "username": BENCH_USER_MOBILE, "password": BENCH_USER_PASSWORD}}
+
+    async with engine.connect() as conn:
+        # asyncpg connection in autocommit mode: every COPY batch commits on its own
+        raw = await conn.get_raw_connection()
+        apg = raw.driver_connection
+
+        if args.reset:
+            tables = ", ".join(f'"{t}"' for t in list(TABLE_IDS) + ["tbl_DrugMap"])
+            await apg.execute(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
+
+        base = await _max_ids(apg)
+
+        async def timed(label, coro):
+            start = time.perf_counter()
+            count = await coro
+            print(f"  {label:<22} {count:>10,} rows  {time.perf_counter() - start:7.2f}s")
+            return count
+
+        print("Seeding benchmark dataset ...")
+
+        # --- catalog: disease types, drugs, drug map -------------------------
+        disease_ids = [base["tbl_DiseaseType"] + i for i in range(1, args.disease_types + 1)]
+        await timed("tbl_DiseaseType", _copy(
+            apg, "tbl_DiseaseType",
+            ["diseases_type_id", "diseases_name", "diseases_explain", "created_at", "updated_at"],
+            ((d, f"بیماری {d}", "توضیحات نمونه", now, now) for d in disease_ids)))
+
+        drug_ids = [base["tbl_Drug"] + i for i in range(1, args.drugs + 1)]
+        drug_prices = {d: Decimal(rng.randrange(50_000, 5_000_000, 1000)) for d in drug_ids}
+        await timed("tbl_Drug", _copy(
+            apg, "tbl_Drug",
+            ["drugs_id", "drug_pname", "drug_lname", "drug_explain", "drug_how_to_use", "unit", "price",
+             "created_at", "updated_at"],
+            ((d, f"داروی {d}", f"Drug {d}", "توضیحات دارو", "روزی دو بار", "عدد", drug_prices[d], now, now)
+             for d in drug_ids)))
+
+        def drug_map_rows():
+            for d in drug_ids:
+                for disease_id in rng.sample(disease_ids, k=min(len(disease_ids), rng.randint(1, 3))):
+                    yield disease_id, d, now, now
+
+        await timed("tbl_DrugMap", _copy(
+            apg, "tbl_DrugMap", ["diseases_type_id", "drugs_id", "created_at", "updated_at"], drug_map_rows()))
+
+        # --- staff: one role with every permission + benchmark users ---------
+        role_id = base["tbl_UserRole"] + 1
+        await timed("tbl_UserRole", _copy(
+            apg, "tbl_UserRole", ["role_id", "role_name", "role_type", "created_at", "updated_at"],
+            [(role_id, "bench", 2, now, now)]))
+        await timed("tbl_UserRolePermission", _copy(
+            apg, "tbl_UserRolePermission",
+            ["permission_id", "role_id", "form_name", "view", "insert", "update", "delete", "created_at",
+             "updated_at"],
+            ((base["tbl_UserRolePermission"] + i, role_id, form.value, True, True, True, True, now, now)
+             for i, form in enumerate(FormName, start=1))))
+
+        hashed_password = get_password_hash(BENCH_USER_PASSWORD)
+        user_ids = [base["tbl_User"] + i for i in range(1, args.users + 1)]
+        login_exists = await apg.fetchval(
+            'SELECT count(*) FROM "tbl_User" WHERE mobile_number = $1', BENCH_USER_MOBILE)
+
+        def user_rows():
+            for n, u in enumerate(user_ids):
+                mobile = BENCH_USER_MOBILE if n == 0 and not login_exists else f"0998{u:07d}"
+                yield (u, f"bench-user-{u}", f"کارمند {u}", mobile, True, True, hashed_password, 0, role_id, now, now)
+
+        await timed("tbl_User", _copy(
+            apg, "tbl_User",
+            ["user_id", "telegram_id", "full_name", "mobile_number", "is_active", "is_verified",
+             "hashed_password", "login_attempts", "role_id", "created_at", "updated_at"],
+            user_rows()))
+
+        existing_keys = {r["message_key"] for r in await apg.fetch('SELECT message_key FROM "tbl_BotMessage"')}
+        new_keys = [k for k in BOT_MESSAGE_KEYS if k not in existing_keys]
+        await timed("tbl_BotMessage", _copy(
+            apg, "tbl_BotMessage", ["id", "message_key", "message_text", "description", "created_at", "updated_at"],
+            ((base["tbl_BotMessage"] + i, k, f"متن پیام {k}", "bench", now, now)
+             for i, k in enumerate(new_keys, start=1))))
+
+        # --- patients ---------------------------------------------------------
+        patient_ids = range(base["tbl_Patient"] + 1, base["tbl_Patient"] + args.patients + 1)
+        statuses = [s.name for s in PatientStatus]
+        status_weights = [5, 5, 15, 8, 8, 6, 6, 6, 10, 25, 6]
+
+        def patient_rows():
+            for p in patient_ids:
+                created = _random_moment(rng, now, args.days)
+                status_changed = created + timedelta(hours=rng.randint(0, 240))
+                yield (
+                    p, f"بیمار {p}", rng.choice([GenderEnum.MALE.name, GenderEnum.FEMALE.name]),
+                    rng.choice([PackageTypeEnum.ECONOMIC.name, PackageTypeEnum.PREMIUM.name]),
+                    rng.randint(18, 80), round(rng.uniform(45, 130), 1), round(rng.uniform(150, 200), 1),
+                    f"09{rng.randint(0, 999_999_999):09d}", f"{rng.randint(0, 9_999_999_999):010d}",
+                    "تهران، خیابان نمونه", f"bench{p}",
+                    rng.choices(statuses, weights=status_weights)[0], status_changed,
+                    "[]", created, status_changed + timedelta(hours=rng.randint(0, 48)),
+                )
+
+        await timed("tbl_Patient", _copy(
+            apg, "tbl_Patient",
+            ["patient_id", "full_name", "sex", "package_type", "age", "weight", "height", "mobile_number",
+             "postal_code", "address", "telegram_id", "patient_status", "status_changed_at", "photo_paths",
+             "created_at", "updated_at"],
+            patient_rows()))
+
+        # --- orders, items and payments --------------------------------------
+        order_ids = range(base["tbl_Order"] + 1, base["tbl_Order"] + args.orders + 1)
+        order_statuses = [s.name for s in OrderStatusEnum]
+        order_rows, item_rows, payment_rows = [], [], []
+        item_id = base["tbl_OrderList"]
+        payment_id = base["tbl_PaymentList"]
+        for o in order_ids:
+            created = _random_moment(rng, now, args.days)
+            order_rows.append((o, rng.choice(patient_ids), rng.choice(user_ids),
+                               rng.choice(order_statuses), created, created))
+            total = Decimal(0)
+            for _ in range(rng.randint(1, args.max_items)):
+                item_id += 1
+                drug_id = rng.choice(drug_ids)
+                qty = rng.randint(1, 4)
+                total += drug_prices[drug_id] * qty
+                item_rows.append((item_id, o, drug_id, qty, drug_prices[drug_id], created, created))
+            for _ in range(rng.choice([0, 1, 1, 1, 2])):
+                payment_id += 1
+                paid = created + timedelta(hours=rng.randint(1, 72))
+                payment_rows.append((payment_id, o, None, paid, f"REF{payment_id}", None, total,
+                                     rng.choice([s.name for s in PaymentStatusEnum]), paid, paid))
+
+        await timed("tbl_Order", _copy(
+            apg, "tbl_Order", ["order_id", "patient_id", "user_id", "order_status", "created_at", "updated_at"],
+            order_rows))
+        await timed("tbl_OrderList", _copy(
+            apg, "tbl_OrderList", ["order_list_id", "order_id", "drug_id", "qty", "price", "created_at", "updated_at"],
+            item_rows))
+        await timed("tbl_PaymentList", _copy(
+            apg, "tbl_PaymentList",
+            ["payment_list_id", "order_id", "user_id", "payment_date", "payment_refer_code", "payment_path_file",
+             "payment_value", "payment_status", "created_at", "updated_at"],
+            payment_rows))
+
+        # --- messages ---------------------------------------------------------
+        def message_rows():
+            for m in range(base["tbl_Message"] + 1, base["tbl_Message"] + args.messages + 1):
+                created = _random_moment(rng, now, args.days)
+                from_patient = rng.random() < 0.5
+                yield (m, None if from_patient else rng.choice(user_ids), rng.choice(patient_ids),
+                       rng.choice(PERSIAN_SAMPLES), rng.random() < 0.9 or not from_patient, from_patient,
+                       "[]", created, created)
+
+        await timed("tbl_Message", _copy(
+            apg, "tbl_Message",
+            ["messages_id", "user_id", "patient_id", "messages", "messages_seen", "messages_sender",
+             "attachment_path", "created_at", "updated_at"],
+            message_rows()))
+
+        await _sync_sequences(apg)
+        await apg.execute("ANALYZE")
+
+    manifest.update({
+        "patients": [patient_ids.start, patient_ids.stop - 1],
+        "orders": [order_ids.start, order_ids.stop - 1],
+        "payments": [base["tbl_PaymentList"] + 1, payment_id],
+        "drugs": [drug_ids[0], drug_ids[-1]],
+        "disease_types": [disease_ids[0], disease_ids[-1]],
+        "bot_message_keys": BOT_MESSAGE_KEYS,
+        "telegram_prefix": "bench",
+    })
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    print(f"Manifest written to {MANIFEST_PATH}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the database with a synthetic benchmark dataset.")
+    parser.add_argument("--patients", type=int, default=100_000)
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--orders", type=int, default=150_000)
+    parser.add_argument("--max-items", type=int, default=5, help="max items per order")
+    parser.add_argument("--drugs", type=int, default=500)
+    parser.add_argument("--disease-types", type=int, default=40)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--days", type=int, default=180, help="spread created_at over this many days")
+    parser.add_argument("--seed", type=int, default=42, help="random seed (the dataset is reproducible)")
+    parser.add_argument("--reset", action="store_true", help="TRUNCATE the seeded tables first")
+    args = parser.parse_args()
+
+    async def run():
+        try:
+            await seed(args)
+        finally:
+            await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
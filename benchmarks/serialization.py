@@ -0,0 +1,125 @@
+# benchmarks/serialization.py
+"""
+CPU cost of serializing list responses: FastAPI's default path versus the
+fast path of app.core.serialization.
+
+    python -m benchmarks.serialization                # 1000 rows, 20 repeats
+    python -m benchmarks.serialization --rows 5000 --repeat 10
+
+"before" is what FastAPI does for `response_model=List[Schema]`: validate the
+ORM objects into the schema (from_attributes), serialize in JSON mode, then
+json.dumps in JSONResponse. "after" is `fast_list_response`: dump_obj + orjson.
+Objects are built in memory, so no database is needed.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.enums import OrderStatusEnum, PaymentStatusEnum
+from app.core.serialization import FastJSONResponse, dump_obj
+from app.models import Drug, Message, Order, OrderList, PaymentList
+from app.models.base import get_current_utc_naive
+from app.schemas.message import MessageRead
+from app.schemas.order import OrderReadWithDetails
+from app.schemas.payment_list import PaymentListRead
+
+
+def build_orders(n: int, rng: random.Random) -> list[Order]:
+    now = get_current_utc_naive()
+    drugs = [
+        Drug(drugs_id=i, drug_pname=f"داروی {i}", drug_lname=f"Drug {i}", unit="عدد",
+             price=Decimal(rng.randrange(50_000, 5_000_000, 1000)), created_at=now, updated_at=now)
+        for i in range(1, 51)
+    ]
+    orders = []
+    for o in range(1, n + 1):
+        order = Order(order_id=o, patient_id=o, user_id=1, order_status=OrderStatusEnum.CREATED,
+                      created_at=now, updated_at=now)
+        items = []
+        for i in range(rng.randint(1, 5)):
+            drug = rng.choice(drugs)
+            items.append(OrderList(order_list_id=o * 10 + i, order_id=o, drug_id=drug.drugs_id,
+                                   qty=rng.randint(1, 4), price=drug.price, drug=drug))
+        order.order_list = items
+        order.payment_list = build_payments(1, rng, order_id=o)
+        orders.append(order)
+    return orders
+
+
+def build_payments(n: int, rng: random.Random, order_id: int | None = None) -> list[PaymentList]:
+    now = get_current_utc_naive()
+    return [
+        PaymentList(payment_list_id=p, order_id=order_id or p, payment_date=now - timedelta(hours=p),
+                    payment_refer_code=f"REF{p}", payment_value=Decimal(rng.randrange(100_000, 9_000_000, 1000)),
+                    payment_status=PaymentStatusEnum.NOT_SEEN, created_at=now, updated_at=now)
+        for p in range(1, n + 1)
+    ]
+
+
+def build_messages(n: int, rng: random.Random) -> list[Message]:
+    now = get_current_utc_naive()
+    return [
+        Message(messages_id=m, patient_id=m, user_id=None, messages="سلام، داروها را طبق دستور مصرف کنید.",
+                messages_seen=rng.random() < 0.5, messages_sender=True, attachment_path=[],
+                created_at=now, updated_at=now)
+        for m in range(1, n + 1)
+    ]
+
+
+_loop = asyncio.new_event_loop()
+
+
+def before(rows, field) -> bytes:
+    content = _loop.run_until_complete(serialize_response(field=field, response_content=rows))
+    return JSONResponse(content).body
+
+
+def after(rows, schema) -> bytes:
+    return FastJSONResponse([dump_obj(row, schema) for row in rows]).body
+
+
+def measure(fn, *args, repeat: int) -> float:
+    """Best CPU time of `repeat` runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn(*args)
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list-response serialization.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    cases = [
+        ("orders (with items+payments)", build_orders(args.rows, rng), OrderReadWithDetails),
+        ("payments", build_payments(args.rows, rng), PaymentListRead),
+        ("messages", build_messages(args.rows, rng), MessageRead),
+    ]
+
+    print(f"CPU time per {args.rows} rows (best of {args.repeat})")
+    print(f"{'payload':<32}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for label, rows, schema in cases:
+        field = create_model_field(name="Response", type_=List[schema], mode="serialization")
+        assert json.loads(before(rows, field)) == json.loads(after(rows, schema)), f"{label}: outputs differ"
+        slow = measure(before, rows, field, repeat=args.repeat)
+        fast = measure(after, rows, schema, repeat=args.repeat)
+        print(f"{label:<32}{slow:>12.2f}{fast:>12.2f}{slow / fast:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/startup.py
+"""
+Cold-start profile of the API for every ADMIN_MODE.
+
+    python -m benchmarks.startup            # import time + RSS per mode, top imports
+    python -m benchmarks.startup --top 25
+
+Each mode runs `import config` in a fresh interpreter with `-X importtime`,
+so numbers include everything a new uvicorn worker pays before serving.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+MODES = ("eager", "lazy", "off")
+
+PROBE = (
+    "import time, resource\n"
+    "start = time.perf_counter()\n"
+    "import config\n"
+    "elapsed = time.perf_counter() - start\n"
+    "rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+    "print(f'{elapsed:.6f} {rss}')\n"
+)
+
+
+def profile(mode: str) -> tuple[float, int, list[tuple[int, str]]]:
+    env = {**os.environ, "ADMIN_MODE": mode}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    elapsed, rss_kb = proc.stdout.split()
+
+    # "import time: self [us] | cumulative | imported package"
+    imports = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imports.append((int(cumulative), name.rstrip()))
+    return float(elapsed), int(rss_kb), imports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure API cold-start cost per ADMIN_MODE.")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list per mode")
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'import config (ms)':>20}{'max RSS (MB)':>15}")
+    reports = {}
+    for mode in MODES:
+        elapsed, rss_kb, imports = profile(mode)
+        reports[mode] = imports
+        print(f"{mode:<8}{elapsed * 1000:>20.1f}{rss_kb / 1024:>15.1f}")
+
+    for mode, imports in reports.items():
+        print(f"\nSlowest imports ({mode}), cumulative ms:")
+        for cumulative, name in sorted(imports, reverse=True)[:args.top]:
+            print(f"  {cumulative / 1000:>9.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
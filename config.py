@@ -1,4 +1,17 @@
 from app.core.middleware import global_rate_limit_middleware
+from app.core.change_log import run_change_log_cleanup
+from app.core.status_history import run_status_rollups
+from app.core.partitions import run_partition_maintenance
+from app.core.archive import run_archive
+from app.core.negotiation import ContentNegotiationMiddleware
+from app.core.idempotency import IdempotencyMiddleware, IdempotentReplay, replay_stored_response, run_idempotency_cleanup
+from app.core.metrics import MetricsMiddleware
+from app.core.notifications import close_telegram_client
+from app.core.outbox import outbox_dispatcher
+from app.core.query_stats import QueryStatsMiddleware, install_query_stats
+from app.core.serialization import FastJSONResponse
+from app.core.warmup import run_warmup
+from app.core.worker import init_worker_state
 from app.routes import user
 from app.routes import patient
 from app.routes import user_role_permission
@@ -12,31 +25,36 @@ from app.routes import drug_map
 from app.routes import message
 from app.routes import login
 from app.routes import bot_message
+from app.routes import api_client
+from app.routes import bot
+from app.routes import batch
+from app.routes import outbox
+from app.routes import change_log
+from app.routes import report
+from app.routes import archive
+from app.routes import metrics
+from app.routes import health
 
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 
-# -------------تست
-from dotenv import load_dotenv
-import os
-
-from fastapi.staticfiles import StaticFiles
-from admin_panel.setup import init_admin
+from admin_panel.mount import mount_admin
 
 from starlette.middleware.sessions import SessionMiddleware # برای فعال کردن session
 from fastapi import FastAPI
 from database import engine  # engine را از فایل دیتابیس خود ایمپورت کنید
+from setting import settings
 
 
 
 import logging
-from app.core.logging_config import setup_logging
-
+from app.core.logging_config import setup_logging, shutdown_logging
 
 
-load_dotenv()  # این تابع متغیرها را از فایل .env بارگذاری می‌کند
 
-SECRET_KEY = os.getenv("SECRET_KEY")
+# متغیرهای .env فقط یک بار و توسط setting.Settings خوانده می‌شوند
+SECRET_KEY = settings.SECRET_KEY
 
 # ------------- mange life span ------------------
 
@@ -50,13 +68,38 @@ async def event_life_span(app: FastAPI):
     logger = logging.getLogger("app")
     logger.info("Application startup......................................")
     # setup_admin(app, engine)
+    await init_worker_state(engine)  # pool/rate-limit/metrics مخصوص همین worker
+    # warm-up در پس‌زمینه؛ سرور بلافاصله گوش می‌دهد ولی /health/ready تا پایانش 503 است
+    warmup_task = asyncio.create_task(run_warmup(engine))
+    # حذف دوره‌ای کلیدهای Idempotency منقضی شده
+    cleanup_task = asyncio.create_task(run_idempotency_cleanup())
+    change_log_task = asyncio.create_task(run_change_log_cleanup())
+    # خلاصه روزانه زمان ماندن در هر وضعیت (گزارش SLA)
+    rollup_task = asyncio.create_task(run_status_rollups())
+    # partition های ماه‌های بعد tbl_Message و جدا کردن ماه‌های قدیمی
+    partition_task = asyncio.create_task(run_partition_maintenance())
+    # بایگانی سرد پرونده‌های بسته
+    archive_task = asyncio.create_task(run_archive())
+    # ارسال رویدادهای tbl_Outbox (اطلاع‌رسانی ربات و ...)
+    outbox_dispatcher.start()
 
     yield
+    await outbox_dispatcher.stop()
+    await close_telegram_client()
+    for task in (warmup_task, cleanup_task, change_log_task, rollup_task, partition_task,
+                 archive_task):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    # uvicorn تا GRACEFUL_TIMEOUT منتظر درخواست‌های در حال اجرا می‌ماند و بعد به اینجا می‌رسد
     logger.info("Application shutdown.....................................")
+    await engine.dispose()  # بستن تمیز اتصال‌های دیتابیس
+    shutdown_logging()  # خالی کردن صف لاگ قبل از خروج
 
 app = FastAPI(
     lifespan=event_life_span,
     title="Fazel Pharma API",
+    default_response_class=FastJSONResponse,  # encode با orjson
     # ------ جدید: این بخش را به تنظیمات FastAPI اضافه کنید ------
     swagger_ui_init_oauth={
         "usePkceWithAuthorizationCodeGrant": False,
@@ -68,6 +111,16 @@ app = FastAPI(
 app.middleware("http")(global_rate_limit_middleware)
 
 app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
+# شمارش کوئری‌ها و تشخیص N+1 برای هر درخواست
+install_query_stats(engine)
+app.add_middleware(QueryStatsMiddleware)
+# ذخیره پاسخ درخواست‌های دارای Idempotency-Key (داخل فشرده‌سازی تا بدنه خام ذخیره شود)
+app.add_middleware(IdempotencyMiddleware)
+app.add_exception_handler(IdempotentReplay, replay_stored_response)
+# Accept: application/msgpack و فشرده‌سازی br/gzip بدنه‌های بزرگ
+app.add_middleware(ContentNegotiationMiddleware)
+# آخرین میدل‌ور = بیرونی‌ترین لایه؛ زمان کل درخواست (حتی پاسخ‌های 429) را اندازه می‌گیرد
+app.add_middleware(MetricsMiddleware)
 
 
 
@@ -86,6 +139,15 @@ app.include_router(message.router, prefix="/message", tags=["Messages"])
 app.include_router(login.router, prefix="/login", tags=["login"])
 
 app.include_router(bot_message.router, prefix="/bot-message", tags=["BotContent"])
+app.include_router(bot.router, prefix="/bot", tags=["Bot"])
+app.include_router(batch.router, prefix="/batch", tags=["Batch"])
+app.include_router(change_log.router, prefix="/changes", tags=["Changes"])
+app.include_router(report.router, prefix="/report", tags=["Reports"])
+app.include_router(outbox.router, prefix="/outbox", tags=["Outbox"])
+app.include_router(archive.router, prefix="/archive", tags=["Archive"])
+app.include_router(api_client.router, prefix="/api-client", tags=["ApiClients"])
+app.include_router(metrics.router, prefix="/metrics", tags=["Monitoring"])
+app.include_router(health.router, prefix="/health", tags=["Monitoring"])
 
 
 
@@ -96,5 +158,6 @@ app.include_router(bot_message.router, prefix="/bot-message", tags=["BotContent"
 
 # app.mount("/admin_panel/static", StaticFiles(directory="static"), name="static")
 
-init_admin(app, engine)
+# پنل ادمین: eager / lazy (در اولین درخواست /admin) / off (فقط API)
+mount_admin(app, engine, settings.ADMIN_MODE)
 
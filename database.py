@@ -16,7 +16,9 @@ from setting import settings
 DATABASE_URL = settings.ASYNC_DATABASE_URI
 
 # Create the async engine with the URL
-engine = create_async_engine(DATABASE_URL, echo=True, future=True)
+# SQL logging is controlled by the "sqlalchemy.engine" logger (see app/core/logging_config.py),
+# so statements go through the logging queue instead of a blocking stdout handler.
+engine = create_async_engine(DATABASE_URL, echo=False, future=True)
 
 
 async_session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
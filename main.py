@@ -1,7 +1,47 @@
+# main.py
+"""
+Server entry point.
+
+    python main.py                 # production: settings.WORKERS processes, no reload
+    python main.py --workers 4
+    python main.py --reload        # development (single process, auto-reload)
+
+Every value comes from setting.Settings (.env), see the "Server" section there.
+On SIGTERM/SIGINT uvicorn stops accepting connections, waits up to
+GRACEFUL_TIMEOUT seconds for in-flight requests, then runs the lifespan
+shutdown (log queue flush, engine.dispose()).
+"""
+
+import argparse
+
 import uvicorn
 
+from setting import settings
 
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description="Run the Fazel Pharma API.")
+    parser.add_argument("--reload", action="store_true", help="development mode with auto-reload")
+    parser.add_argument("--workers", type=int, default=settings.WORKERS)
+    parser.add_argument("--host", default=settings.HOST)
+    parser.add_argument("--port", type=int, default=settings.PORT)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        "config:app",
+        host=args.host,
+        port=args.port,
+        reload=args.reload,
+        # reload فقط با یک پروسه کار می‌کند
+        workers=1 if args.reload else args.workers,
+        loop=settings.SERVER_LOOP,
+        http=settings.SERVER_HTTP,
+        timeout_keep_alive=settings.KEEP_ALIVE_TIMEOUT,
+        backlog=settings.BACKLOG,
+        timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT,
+        limit_max_requests=settings.LIMIT_MAX_REQUESTS,
+    )
 
-    uvicorn.run("config:app", host="0.0.0.0", port=8000, reload=True) # in production set reload to False
+
+if __name__ == "__main__":
+    main()
@@ -25,6 +25,13 @@ from app.models.order import Order
 from app.models.order_list import OrderList
 from app.models.payment_list import PaymentList
 from app.models.api_client import ApiClient
+from app.models.idempotency_key import IdempotencyKey
+from app.models.outbox import OutboxEvent
+from app.models.change_log import ChangeLog
+from app.models.status_history import StatusHistory, StatusRollup
+from app.models.archive import ArchiveSegment, ArchivedCase
+
+from migrations import online
 
 
 
@@ -51,6 +58,12 @@ target_metadata = SQLModel.metadata
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
 
+# محافظ قفل برای همه migration ها (migrations/online.py)؛ قابل تغییر با
+#   alembic -x lock_timeout=10s -x statement_timeout=0 upgrade head
+x_arguments = context.get_x_argument(as_dictionary=True)
+lock_timeout = x_arguments.get("lock_timeout", online.LOCK_TIMEOUT)
+statement_timeout = x_arguments.get("statement_timeout", online.STATEMENT_TIMEOUT)
+
 
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
@@ -70,8 +83,10 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
     )
 
+    online.set_timeouts(None, lock_timeout, statement_timeout)
     with context.begin_transaction():
         context.run_migrations()
 
@@ -90,8 +105,12 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
+        online.set_timeouts(connection, lock_timeout, statement_timeout)
+        connection.commit()
+        # هر revision تراکنش خودش را دارد تا قفل‌ها تا پایان کل upgrade نگه داشته نشوند
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            transaction_per_migration=True,
         )
 
         with context.begin_transaction():
@@ -0,0 +1,290 @@
+# migrations/online.py
+"""
+Lock-safe helpers for migrations on the large tables (tbl_Message, tbl_Order,
+tbl_OrderList, tbl_PaymentList, tbl_Patient), so a deploy does not stall the API.
+
+    from migrations import online
+
+    def upgrade() -> None:
+        op.add_column('tbl_Order', sa.Column('channel', sa.String(20), nullable=True))  # بدون default: فوری
+        online.backfill('tbl_Order', "channel = 'bot'", key='order_id', where='channel IS NULL')
+        online.set_not_null('tbl_Order', 'channel')
+        online.create_index('ix_tbl_Order_channel', 'tbl_Order', ['channel'])
+        online.add_foreign_key('fk_tbl_Order_channel', 'tbl_Order', 'tbl_Channel', ['channel'], ['code'])
+
+env.py sets the lock_timeout / statement_timeout guards for every migration
+(-x lock_timeout=... -x statement_timeout=... to override) and runs each
+revision in its own transaction.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+from typing import Callable, Sequence
+
+import sqlalchemy as sa
+from alembic import context, op
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger("alembic.online")
+
+# DDL ای که قفل نمی‌گیرد پشت یک تراکنش طولانی صف نمی‌کشد (و API را پشت خودش صف نمی‌کند)
+LOCK_TIMEOUT = "5s"
+# هیچ دستور migration بیشتر از این طول نمی‌کشد؛ ساخت index همزمان و VALIDATE از آن معاف‌اند
+STATEMENT_TIMEOUT = "15min"
+
+BACKFILL_BATCH_SIZE = 5_000
+BACKFILL_PAUSE = 0.1  # ثانیه مکث بین batch ها تا replication و autovacuum عقب نمانند
+
+LOCK_RETRIES = 5
+LOCK_RETRY_DELAY = 2.0
+
+_LOCK_NOT_AVAILABLE = "55P03"
+
+
+def _offline() -> bool:
+    return context.is_offline_mode()
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _columns(columns: Sequence[str]) -> str:
+    return ", ".join(_quote(column) for column in columns)
+
+
+# ------------------------------------------------------------
+#  timeout ها
+# ------------------------------------------------------------
+
+# مقادیر سطح session که env.py تنظیم کرده؛ در حالت offline بعد از timeouts() به همین‌ها برمی‌گردیم
+_session_timeouts = {"lock_timeout": LOCK_TIMEOUT, "statement_timeout": STATEMENT_TIMEOUT}
+
+
+def set_timeouts(connection=None, lock_timeout: str = LOCK_TIMEOUT, statement_timeout: str = STATEMENT_TIMEOUT) -> None:
+    """Session-level guards, set by env.py before the migrations run (no connection: offline script)."""
+    _session_timeouts.update(lock_timeout=lock_timeout, statement_timeout=statement_timeout)
+    for name, value in _session_timeouts.items():
+        if connection is None:
+            context.execute(f"SET {name} = '{value}'")
+        else:
+            connection.exec_driver_sql(f"SET {name} = '{value}'")
+
+
+@contextmanager
+def timeouts(lock_timeout: str | None = None, statement_timeout: str | None = None):
+    """Override the guards for one step: `with online.timeouts(statement_timeout='0'): ...`."""
+    wanted = {"lock_timeout": lock_timeout, "statement_timeout": statement_timeout}
+    wanted = {name: value for name, value in wanted.items() if value is not None}
+    if _offline():
+        for name, value in wanted.items():
+            op.execute(f"SET {name} = '{value}'")
+        yield
+        for name in wanted:
+            op.execute(f"SET {name} = '{_session_timeouts[name]}'")
+        return
+    bind = op.get_bind()
+    previous = {name: bind.execute(sa.text("SELECT current_setting(:name)"), {"name": name}).scalar_one()
+                for name in wanted}
+    for name, value in wanted.items():
+        bind.execute(sa.text("SELECT set_config(:name, :value, false)"), {"name": name, "value": value})
+    yield
+    # بعد از خطا تراکنش abort شده و migration به هر حال متوقف می‌شود؛ فقط در مسیر موفق برمی‌گردانیم
+    for name, value in previous.items():
+        bind.execute(sa.text("SELECT set_config(:name, :value, false)"), {"name": name, "value": value})
+
+
+def retry_on_lock_timeout(step: Callable[[], None], attempts: int = LOCK_RETRIES,
+                          delay: float = LOCK_RETRY_DELAY) -> None:
+    """
+    Run `step` (e.g. an op.add_column) in a savepoint and retry it when it hits
+    lock_timeout, instead of failing the deploy on the first busy moment.
+    """
+    if _offline():
+        step()
+        return
+    bind = op.get_bind()
+    for attempt in range(1, attempts + 1):
+        try:
+            with bind.begin_nested():
+                step()
+            return
+        except OperationalError as error:
+            if getattr(error.orig, "pgcode", None) != _LOCK_NOT_AVAILABLE or attempt == attempts:
+                raise
+            logger.warning("lock_timeout (attempt %d/%d), retrying in %.1fs", attempt, attempts, delay)
+            time.sleep(delay)
+            delay *= 2
+
+
+# ------------------------------------------------------------
+#  index ها
+# ------------------------------------------------------------
+
+def partitions(table: str) -> list[str]:
+    """Partitions of a partitioned table (tbl_Message); empty for a plain table or in offline mode."""
+    if _offline():
+        return []
+    return list(op.get_bind().execute(
+        sa.text("SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(:name) ORDER BY 1"),
+        {"name": _quote(table)},
+    ).scalars())
+
+
+def drop_invalid_index(name: str) -> None:
+    """A CONCURRENTLY build that failed leaves an invalid index behind; IF NOT EXISTS would keep it."""
+    if _offline():
+        return
+    invalid = op.get_bind().execute(
+        sa.text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+        {"name": _quote(name)},
+    ).scalar()
+    if invalid:
+        op.execute(f"DROP INDEX CONCURRENTLY {_quote(name)}")
+
+
+def create_index(name: str, table: str, columns: Sequence[str], unique: bool = False,
+                 where: str | None = None) -> None:
+    """
+    CREATE INDEX CONCURRENTLY outside the migration transaction; the table
+    stays writable. Safe to re-run after a failed build. On a partitioned
+    table the index is built on every partition and attached to the parent.
+    """
+    unique_sql = "UNIQUE " if unique else ""
+    where_sql = f" WHERE {where}" if where else ""
+    with op.get_context().autocommit_block(), timeouts(statement_timeout="0"):
+        table_partitions = partitions(table)
+        if not table_partitions:
+            drop_invalid_index(name)
+            op.execute(f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {_quote(name)} "
+                       f"ON {_quote(table)} ({_columns(columns)}){where_sql}")
+            return
+        # CONCURRENTLY روی والد ممکن نیست؛ index خالی روی والد، ساخت همزمان روی هر
+        # partition و attach (والد وقتی همه attach شوند valid می‌شود)
+        op.execute(f"CREATE {unique_sql}INDEX IF NOT EXISTS {_quote(name)} "
+                   f"ON ONLY {_quote(table)} ({_columns(columns)}){where_sql}")
+        for partition in table_partitions:
+            partition_index = f"{partition}_{'_'.join(columns)}_idx"
+            drop_invalid_index(partition_index)
+            op.execute(f"CREATE {unique_sql}INDEX CONCURRENTLY IF NOT EXISTS {_quote(partition_index)} "
+                       f"ON {_quote(partition)} ({_columns(columns)}){where_sql}")
+            op.execute(f"ALTER INDEX {_quote(name)} ATTACH PARTITION {_quote(partition_index)}")
+
+
+def drop_index(name: str, table: str) -> None:
+    with op.get_context().autocommit_block():
+        if partitions(table):
+            # DROP INDEX CONCURRENTLY روی index جدول partition شده ممکن نیست
+            op.execute(f"DROP INDEX IF EXISTS {_quote(name)}")
+        else:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(name)}")
+
+
+# ------------------------------------------------------------
+#  constraint ها: NOT VALID و بعد VALIDATE
+# ------------------------------------------------------------
+
+def validate_constraint(table: str, name: str) -> None:
+    """
+    VALIDATE scans the table under SHARE UPDATE EXCLUSIVE (reads and writes
+    continue); it runs in its own transaction so the short lock of ADD
+    CONSTRAINT ... NOT VALID is already released.
+    """
+    with op.get_context().autocommit_block(), timeouts(statement_timeout="0"):
+        op.execute(f"ALTER TABLE {_quote(table)} VALIDATE CONSTRAINT {_quote(name)}")
+
+
+def _constraint_exists(table: str, name: str) -> bool:
+    if _offline():
+        return False
+    return op.get_bind().execute(
+        sa.text("SELECT EXISTS (SELECT 1 FROM pg_constraint WHERE conrelid = to_regclass(:table) AND conname = :name)"),
+        {"table": _quote(table), "name": name},
+    ).scalar_one()
+
+
+def add_foreign_key(name: str, source: str, referent: str, local_cols: Sequence[str], remote_cols: Sequence[str],
+                    ondelete: str | None = None, validate: bool = True) -> None:
+    if not _constraint_exists(source, name):
+        ondelete_sql = f" ON DELETE {ondelete}" if ondelete else ""
+        retry_on_lock_timeout(lambda: op.execute(
+            f"ALTER TABLE {_quote(source)} ADD CONSTRAINT {_quote(name)} FOREIGN KEY ({_columns(local_cols)}) "
+            f"REFERENCES {_quote(referent)} ({_columns(remote_cols)}){ondelete_sql} NOT VALID"))
+    if validate:
+        validate_constraint(source, name)
+
+
+def add_check(name: str, table: str, condition: str, validate: bool = True) -> None:
+    if not _constraint_exists(table, name):
+        retry_on_lock_timeout(lambda: op.execute(
+            f"ALTER TABLE {_quote(table)} ADD CONSTRAINT {_quote(name)} CHECK ({condition}) NOT VALID"))
+    if validate:
+        validate_constraint(table, name)
+
+
+def set_not_null(table: str, column: str) -> None:
+    """
+    SET NOT NULL without a full-table scan under ACCESS EXCLUSIVE: a validated
+    CHECK (column IS NOT NULL) lets Postgres skip the scan; the check is then dropped.
+    """
+    check = f"{table}_{column}_not_null"
+    add_check(check, table, f"{_quote(column)} IS NOT NULL")
+    retry_on_lock_timeout(lambda: op.execute(
+        f"ALTER TABLE {_quote(table)} ALTER COLUMN {_quote(column)} SET NOT NULL"))
+    op.execute(f"ALTER TABLE {_quote(table)} DROP CONSTRAINT IF EXISTS {_quote(check)}")
+
+
+# ------------------------------------------------------------
+#  enum و backfill
+# ------------------------------------------------------------
+
+def add_enum_value(enum: str, value: str, before: str | None = None, after: str | None = None) -> None:
+    """ALTER TYPE ... ADD VALUE in its own transaction, so the new value is usable by the next migration."""
+    position = f" BEFORE '{before}'" if before else f" AFTER '{after}'" if after else ""
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TYPE {enum} ADD VALUE IF NOT EXISTS '{value}'{position}")
+
+
+@contextmanager
+def replica_role():
+    """
+    Skip ordinary triggers (e.g. trg_change_log) for this session only, unlike
+    DISABLE TRIGGER, which locks the table and hides concurrent writes too.
+    Needs superuser, or GRANT SET ON PARAMETER session_replication_role (PG 15+).
+    """
+    op.execute("SET session_replication_role = replica")
+    # بدون finally: بعد از خطا تراکنش abort شده و RESET خطای اصلی را می‌پوشاند؛ اتصال به هر حال بسته می‌شود
+    yield
+    op.execute("RESET session_replication_role")
+
+
+def backfill(table: str, assignments: str, key: str, where: str | None = None,
+             batch_size: int = BACKFILL_BATCH_SIZE, pause: float = BACKFILL_PAUSE) -> int:
+    """
+    UPDATE `table` SET `assignments` in key ranges of `batch_size`, each batch
+    committed on its own (row locks are held for one batch only), with `pause`
+    seconds between batches. `where` should exclude rows that are already done,
+    so a failed or interrupted backfill can simply be re-run.
+    Offline mode emits one plain UPDATE.
+    """
+    where_sql = f" AND ({where})" if where else ""
+    if _offline():
+        op.execute(f"UPDATE {_quote(table)} SET {assignments} WHERE TRUE{where_sql}")
+        return 0
+    total = 0
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(sa.text(f"SELECT min({_quote(key)}), max({_quote(key)}) FROM {_quote(table)}")).one()
+        if low is None:
+            return 0
+        update = sa.text(f"UPDATE {_quote(table)} SET {assignments} "
+                         f"WHERE {_quote(key)} >= :low AND {_quote(key)} < :high{where_sql}")
+        started = time.monotonic()
+        for start in range(low, high + 1, batch_size):
+            total += bind.execute(update, {"low": start, "high": start + batch_size}).rowcount
+            if pause:
+                time.sleep(pause)
+        logger.info("backfill %s: %d rows in %.1fs", table, total, time.monotonic() - started)
+    return total
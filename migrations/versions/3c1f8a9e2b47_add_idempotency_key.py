@@ -0,0 +1,44 @@
+"""add_idempotency_key
+
+Revision ID: 3c1f8a9e2b47
+Revises: 97842335da00
+Create Date: 2026-10-19 16:05:41.527193
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f8a9e2b47'
+down_revision: Union[str, Sequence[str], None] = '97842335da00'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tbl_IdempotencyKey',
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('principal', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=False),
+    sa.Column('key', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('request_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('content_type', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=True),
+    sa.Column('response_body', sa.LargeBinary(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('principal', 'key', name='uq_idempotency_principal_key')
+    )
+    op.create_index(op.f('ix_tbl_IdempotencyKey_expires_at'), 'tbl_IdempotencyKey', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tbl_IdempotencyKey_expires_at'), table_name='tbl_IdempotencyKey')
+    op.drop_table('tbl_IdempotencyKey')
@@ -0,0 +1,48 @@
+"""add_outbox
+
+Revision ID: 5e2d7c41a9b3
+Revises: 3c1f8a9e2b47
+Create Date: 2026-10-19 17:12:08.331946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2d7c41a9b3'
+down_revision: Union[str, Sequence[str], None] = '3c1f8a9e2b47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+outbox_status_enum = sa.Enum('PENDING', 'DONE', 'DEAD', name='outboxstatusenum')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tbl_Outbox',
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sqlmodel.sql.sqltypes.AutoString(length=100), nullable=False),
+    sa.Column('aggregate_type', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('aggregate_id', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('status', outbox_status_enum, nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('available_at', sa.DateTime(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tbl_Outbox_status_available_at', 'tbl_Outbox', ['status', 'available_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tbl_Outbox_status_available_at', table_name='tbl_Outbox')
+    op.drop_table('tbl_Outbox')
+    outbox_status_enum.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,88 @@
+"""add_change_log
+
+Revision ID: 8a4b6d2f1c93
+Revises: 5e2d7c41a9b3
+Create Date: 2026-10-19 18:03:27.904412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4b6d2f1c93'
+down_revision: Union[str, Sequence[str], None] = '5e2d7c41a9b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# همان SQL مدل app/models/change_log.py در زمان این revision
+RECORD_CHANGE_FUNCTION = """
+CREATE OR REPLACE FUNCTION fn_record_change() RETURNS trigger AS $$
+DECLARE
+    rec jsonb;
+    patient integer;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        rec := to_jsonb(OLD);
+    ELSE
+        rec := to_jsonb(NEW);
+        IF TG_OP = 'UPDATE' AND rec = to_jsonb(OLD) THEN
+            RETURN NULL;
+        END IF;
+    END IF;
+    IF TG_ARGV[0] = 'payment' THEN
+        SELECT o.patient_id INTO patient FROM "tbl_Order" o WHERE o.order_id = (rec->>'order_id')::integer;
+    ELSE
+        patient := (rec->>'patient_id')::integer;
+    END IF;
+    INSERT INTO "tbl_ChangeLog" (entity, entity_id, operation, patient_id, status)
+    VALUES (TG_ARGV[0], (rec->>TG_ARGV[1])::integer, lower(TG_OP), patient, rec->>TG_ARGV[2]);
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGERS = {
+    "tbl_Order": ("order", "order_id", "order_status"),
+    "tbl_PaymentList": ("payment", "payment_list_id", "payment_status"),
+    "tbl_Patient": ("patient", "patient_id", "patient_status"),
+    "tbl_Message": ("message", "messages_id", ""),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence('seq_tbl_ChangeLog')))
+    op.create_table('tbl_ChangeLog',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('seq', sa.BigInteger(), nullable=True),
+    sa.Column('txid', sa.BigInteger(), server_default=sa.text('txid_current()'), nullable=False),
+    sa.Column('entity', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('operation', sqlmodel.sql.sqltypes.AutoString(length=6), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=True),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.Column('changed_at', sa.DateTime(), server_default=sa.text("(now() AT TIME ZONE 'utc')"), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tbl_ChangeLog_seq', 'tbl_ChangeLog', ['seq'], unique=True)
+    op.create_index('ix_tbl_ChangeLog_unsequenced', 'tbl_ChangeLog', ['id'], unique=False,
+                    postgresql_where=sa.text('seq IS NULL'))
+    op.execute(RECORD_CHANGE_FUNCTION)
+    for table, (entity, key, status) in TRIGGERS.items():
+        op.execute(f'CREATE TRIGGER trg_change_log AFTER INSERT OR UPDATE OR DELETE ON "{table}" '
+                   f"FOR EACH ROW EXECUTE FUNCTION fn_record_change('{entity}', '{key}', '{status}')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS trg_change_log ON "{table}"')
+    op.execute('DROP FUNCTION IF EXISTS fn_record_change()')
+    op.drop_index('ix_tbl_ChangeLog_unsequenced', table_name='tbl_ChangeLog')
+    op.drop_index('ix_tbl_ChangeLog_seq', table_name='tbl_ChangeLog')
+    op.drop_table('tbl_ChangeLog')
+    op.execute(sa.schema.DropSequence(sa.Sequence('seq_tbl_ChangeLog')))
@@ -0,0 +1,30 @@
+"""add_scopes_to_api_client
+
+Revision ID: 97842335da00
+Revises: 63d838f3b148
+Create Date: 2026-10-19 15:45:12.318406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '97842335da00'
+down_revision: Union[str, Sequence[str], None] = '63d838f3b148'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # کلاینت‌های موجود بدون هیچ دسترسی شروع می‌کنند تا صریحاً scope بگیرند
+    op.add_column('tbl_ApiClient', sa.Column('scopes', sa.JSON(), server_default='[]', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('tbl_ApiClient', 'scopes')
@@ -0,0 +1,43 @@
+"""add_patient_status_changed_at
+
+Revision ID: b7e3f9a15d28
+Revises: 8a4b6d2f1c93
+Create Date: 2026-10-19 19:11:52.610338
+
+tbl_Patient پرترافیک است: ستون با default ثابت فوری اضافه می‌شود، مقدار قبلی با
+backfill دسته‌ای پر می‌شود، NOT NULL با CHECK معتبرشده و index به صورت
+CONCURRENTLY ساخته می‌شود (migrations/online.py).
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f9a15d28'
+down_revision: Union[str, Sequence[str], None] = '8a4b6d2f1c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('tbl_Patient', sa.Column('status_changed_at', sa.DateTime(),
+                                           server_default=sa.text("(now() AT TIME ZONE 'utc')"), nullable=True))
+    # بهترین تخمین برای بیماران موجود: آخرین ویرایش. فید تغییرات لازم نیست همه بیماران را دوباره بفرستد،
+    # پس trigger فقط برای همین session خاموش است (نوشتن‌های همزمان API ثبت می‌شوند)
+    with online.replica_role():
+        online.backfill('tbl_Patient', 'status_changed_at = updated_at', key='patient_id',
+                        where='status_changed_at IS DISTINCT FROM updated_at')
+    online.set_not_null('tbl_Patient', 'status_changed_at')
+    online.create_index('ix_tbl_Patient_status_changed_at', 'tbl_Patient', ['patient_status', 'status_changed_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    online.drop_index('ix_tbl_Patient_status_changed_at', 'tbl_Patient')
+    op.drop_column('tbl_Patient', 'status_changed_at')
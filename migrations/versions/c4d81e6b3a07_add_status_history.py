@@ -0,0 +1,101 @@
+"""add_status_history
+
+Revision ID: c4d81e6b3a07
+Revises: b7e3f9a15d28
+Create Date: 2026-10-19 20:24:13.118720
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d81e6b3a07'
+down_revision: Union[str, Sequence[str], None] = 'b7e3f9a15d28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# همان SQL مدل app/models/status_history.py در زمان این revision
+STATUS_HISTORY_FUNCTION = """
+CREATE OR REPLACE FUNCTION fn_record_status_history() RETURNS trigger AS $$
+DECLARE
+    rec jsonb := to_jsonb(NEW);
+    old_rec jsonb;
+    entered timestamp;
+    changed timestamp := now() AT TIME ZONE 'utc';
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO "tbl_StatusHistory" (entity, entity_id, from_status, to_status, changed_at)
+        VALUES (TG_ARGV[0], (rec->>TG_ARGV[1])::integer, NULL, rec->>TG_ARGV[2], changed);
+        RETURN NULL;
+    END IF;
+    old_rec := to_jsonb(OLD);
+    IF old_rec->>TG_ARGV[2] IS NOT DISTINCT FROM rec->>TG_ARGV[2] THEN
+        RETURN NULL;
+    END IF;
+    SELECT max(h.changed_at) INTO entered FROM "tbl_StatusHistory" h
+    WHERE h.entity = TG_ARGV[0] AND h.entity_id = (rec->>TG_ARGV[1])::integer;
+    -- ردیف‌های قدیمی‌تر از این جدول: status_changed_at (بیمار) یا created_at
+    entered := coalesce(entered, (old_rec->>'status_changed_at')::timestamp, (old_rec->>'created_at')::timestamp);
+    INSERT INTO "tbl_StatusHistory" (entity, entity_id, from_status, to_status, changed_at, duration_ms)
+    VALUES (TG_ARGV[0], (rec->>TG_ARGV[1])::integer, old_rec->>TG_ARGV[2], rec->>TG_ARGV[2], changed,
+            greatest(0, (extract(epoch FROM changed - entered) * 1000)::bigint));
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+TRIGGERS = {
+    "tbl_Order": ("order", "order_id", "order_status"),
+    "tbl_Patient": ("patient", "patient_id", "patient_status"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tbl_StatusHistory',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('entity', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('from_status', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=True),
+    sa.Column('to_status', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('changed_at', sa.DateTime(), server_default=sa.text("(now() AT TIME ZONE 'utc')"), nullable=False),
+    sa.Column('duration_ms', sa.BigInteger(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tbl_StatusHistory_entity', 'tbl_StatusHistory', ['entity', 'entity_id', 'changed_at'],
+                    unique=False)
+    op.create_index('ix_tbl_StatusHistory_changed_at', 'tbl_StatusHistory', ['changed_at'], unique=False)
+    op.create_table('tbl_StatusRollup',
+    sa.Column('entity', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+    sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('avg_ms', sa.BigInteger(), nullable=False),
+    sa.Column('max_ms', sa.BigInteger(), nullable=False),
+    sa.Column('p50_ms', sa.BigInteger(), nullable=False),
+    sa.Column('p90_ms', sa.BigInteger(), nullable=False),
+    sa.Column('p95_ms', sa.BigInteger(), nullable=False),
+    sa.Column('p99_ms', sa.BigInteger(), nullable=False),
+    sa.Column('histogram', sa.JSON(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('entity', 'status', 'day')
+    )
+    op.execute(STATUS_HISTORY_FUNCTION)
+    for table, (entity, key, status) in TRIGGERS.items():
+        op.execute(f'CREATE TRIGGER trg_status_history AFTER INSERT OR UPDATE OF {status} ON "{table}" '
+                   f"FOR EACH ROW EXECUTE FUNCTION fn_record_status_history('{entity}', '{key}', '{status}')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TRIGGERS:
+        op.execute(f'DROP TRIGGER IF EXISTS trg_status_history ON "{table}"')
+    op.execute('DROP FUNCTION IF EXISTS fn_record_status_history()')
+    op.drop_table('tbl_StatusRollup')
+    op.drop_index('ix_tbl_StatusHistory_changed_at', table_name='tbl_StatusHistory')
+    op.drop_index('ix_tbl_StatusHistory_entity', table_name='tbl_StatusHistory')
+    op.drop_table('tbl_StatusHistory')
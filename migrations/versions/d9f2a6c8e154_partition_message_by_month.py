@@ -0,0 +1,106 @@
+"""partition_message_by_month
+
+Revision ID: d9f2a6c8e154
+Revises: c4d81e6b3a07
+Create Date: 2026-10-19 22:05:41.530912
+
+tbl_Message به جدول partition شده (RANGE روی created_at، یک partition برای هر
+ماه) منتقل می‌شود. همه ردیف‌ها در یک تراکنش کپی می‌شوند و جدول در این مدت قفل
+است؛ روی دیتابیس بزرگ در زمان کم‌کار اجرا شود. partition های ماه‌های بعد و
+جدا کردن ماه‌های قدیمی را app/core/partitions.py انجام می‌دهد.
+
+کپی، ساخت کلید اصلی و index ها از statement_timeout محیط (migrations/online.py)
+معاف‌اند؛ RENAME اول با lock_timeout دوباره امتحان می‌شود تا پشت تراکنش‌های باز
+صف نکشد.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f2a6c8e154'
+down_revision: Union[str, Sequence[str], None] = 'c4d81e6b3a07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# partition های آماده بعد از ماه جاری (همان پیش‌فرض MESSAGE_PARTITIONS_AHEAD)
+PARTITIONS_AHEAD = 3
+
+CREATE_PARTITIONS = f"""
+DO $$
+DECLARE
+    month date := date_trunc('month', coalesce((SELECT min(created_at) FROM "tbl_Message_legacy"),
+                                               now() AT TIME ZONE 'utc'))::date;
+    last_month date := (date_trunc('month', now() AT TIME ZONE 'utc') + interval '{PARTITIONS_AHEAD} months')::date;
+BEGIN
+    WHILE month <= last_month LOOP
+        EXECUTE format('CREATE TABLE %I PARTITION OF "tbl_Message" FOR VALUES FROM (%L) TO (%L)',
+                       'tbl_Message_p' || to_char(month, 'YYYYMM'), month, (month + interval '1 month')::date);
+        month := (month + interval '1 month')::date;
+    END LOOP;
+END
+$$
+"""
+
+# sequence ستون serial قبل از drop جدول قبلی به جدول جدید منتقل می‌شود
+MOVE_SEQUENCE = """
+DO $$
+BEGIN
+    EXECUTE format('ALTER SEQUENCE %s OWNED BY "tbl_Message".messages_id',
+                   pg_get_serial_sequence('"{old}"', 'messages_id'));
+END
+$$
+"""
+
+CHANGE_LOG_TRIGGER = ('CREATE TRIGGER trg_change_log AFTER INSERT OR UPDATE OR DELETE ON "tbl_Message" '
+                      "FOR EACH ROW EXECUTE FUNCTION fn_record_change('message', 'messages_id', '')")
+
+
+def _add_constraints(primary_key: str) -> None:
+    op.execute(f'ALTER TABLE "tbl_Message" ADD CONSTRAINT "tbl_Message_pkey" PRIMARY KEY ({primary_key})')
+    op.execute('ALTER TABLE "tbl_Message" ADD CONSTRAINT "tbl_Message_user_id_fkey" '
+               'FOREIGN KEY (user_id) REFERENCES "tbl_User" (user_id)')
+    op.execute('ALTER TABLE "tbl_Message" ADD CONSTRAINT "tbl_Message_patient_id_fkey" '
+               'FOREIGN KEY (patient_id) REFERENCES "tbl_Patient" (patient_id)')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    online.retry_on_lock_timeout(lambda: op.execute('ALTER TABLE "tbl_Message" RENAME TO "tbl_Message_legacy"'))
+    op.execute('CREATE TABLE "tbl_Message" (LIKE "tbl_Message_legacy" INCLUDING DEFAULTS) '
+               'PARTITION BY RANGE (created_at)')
+    op.execute(CREATE_PARTITIONS)
+    # اگر کار partition سازی چند ماه عقب بماند insert ها اینجا می‌نشینند
+    op.execute('CREATE TABLE "tbl_Message_default" PARTITION OF "tbl_Message" DEFAULT')
+    with online.timeouts(statement_timeout='0'):
+        op.execute('INSERT INTO "tbl_Message" SELECT * FROM "tbl_Message_legacy"')
+    op.execute(MOVE_SEQUENCE.format(old="tbl_Message_legacy"))
+    op.execute('DROP TABLE "tbl_Message_legacy"')
+    with online.timeouts(statement_timeout='0'):
+        # کلید partition باید جزو کلید اصلی باشد؛ messages_id همچنان از sequence یکتاست
+        _add_constraints("messages_id, created_at")
+        op.create_index('ix_tbl_Message_patient_id_created_at', 'tbl_Message', ['patient_id', 'created_at'],
+                        unique=False)
+        op.create_index('ix_tbl_Message_unseen', 'tbl_Message', ['created_at'], unique=False,
+                        postgresql_where='NOT messages_seen')
+    # trigger روی جدول والد روی همه partition ها (فعلی و بعدی) اجرا می‌شود
+    op.execute(CHANGE_LOG_TRIGGER)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # partition هایی که به schema archive منتقل شده‌اند برنمی‌گردند
+    online.retry_on_lock_timeout(
+        lambda: op.execute('ALTER TABLE "tbl_Message" RENAME TO "tbl_Message_partitioned"'))
+    op.execute('CREATE TABLE "tbl_Message" (LIKE "tbl_Message_partitioned" INCLUDING DEFAULTS)')
+    with online.timeouts(statement_timeout='0'):
+        op.execute('INSERT INTO "tbl_Message" SELECT * FROM "tbl_Message_partitioned"')
+    op.execute(MOVE_SEQUENCE.format(old="tbl_Message_partitioned"))
+    op.execute('DROP TABLE "tbl_Message_partitioned"')
+    with online.timeouts(statement_timeout='0'):
+        _add_constraints("messages_id")
+    op.execute(CHANGE_LOG_TRIGGER)
@@ -0,0 +1,61 @@
+"""add_archive_tables
+
+Revision ID: e6a1c4b9f372
+Revises: d9f2a6c8e154
+Create Date: 2026-10-19 23:12:08.447215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a1c4b9f372'
+down_revision: Union[str, Sequence[str], None] = 'd9f2a6c8e154'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('tbl_ArchiveSegment',
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_name', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=False),
+    sa.Column('sha256', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+    sa.Column('row_count', sa.Integer(), nullable=False),
+    sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+    sa.Column('snapshot_at', sa.DateTime(), nullable=False),
+    sa.Column('purged_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('file_name')
+    )
+    op.create_table('tbl_ArchivedCase',
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('patient_id', sa.Integer(), nullable=False),
+    sa.Column('segment_id', sa.Integer(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('order_items', sa.Integer(), nullable=False),
+    sa.Column('payments', sa.Integer(), nullable=False),
+    sa.Column('messages', sa.Integer(), nullable=False),
+    sa.Column('restored_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['patient_id'], ['tbl_Patient.patient_id'], ),
+    sa.ForeignKeyConstraint(['segment_id'], ['tbl_ArchiveSegment.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_tbl_ArchivedCase_patient_id'), 'tbl_ArchivedCase', ['patient_id'], unique=False)
+    op.create_index(op.f('ix_tbl_ArchivedCase_segment_id'), 'tbl_ArchivedCase', ['segment_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_tbl_ArchivedCase_segment_id'), table_name='tbl_ArchivedCase')
+    op.drop_index(op.f('ix_tbl_ArchivedCase_patient_id'), table_name='tbl_ArchivedCase')
+    op.drop_table('tbl_ArchivedCase')
+    op.drop_table('tbl_ArchiveSegment')
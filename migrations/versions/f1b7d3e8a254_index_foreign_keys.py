@@ -0,0 +1,50 @@
+"""index_foreign_keys
+
+Revision ID: f1b7d3e8a254
+Revises: e6a1c4b9f372
+Create Date: 2026-10-20 09:41:27.306518
+
+index ستون‌های foreign key که تا حالا index نداشتند (join های eager load سفارش و
+پرداخت و حذف ردیف‌های والد). همه با CREATE INDEX CONCURRENTLY ساخته می‌شوند تا
+جدول‌ها در حین ساخت قابل نوشتن بمانند (migrations/online.py).
+tbl_Message.patient_id از قبل با ix_tbl_Message_patient_id_created_at پوشش دارد.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations import online
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1b7d3e8a254'
+down_revision: Union[str, Sequence[str], None] = 'e6a1c4b9f372'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('tbl_OrderList', 'order_id'),
+    ('tbl_OrderList', 'drug_id'),
+    ('tbl_PaymentList', 'order_id'),
+    ('tbl_PaymentList', 'user_id'),
+    ('tbl_Order', 'patient_id'),
+    ('tbl_Order', 'user_id'),
+    ('tbl_DrugMap', 'drugs_id'),
+    ('tbl_User', 'role_id'),
+    ('tbl_UserRolePermission', 'role_id'),
+    ('tbl_Message', 'user_id'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column in INDEXES:
+        online.create_index(f'ix_{table}_{column}', table, [column])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column in reversed(INDEXES):
+        online.drop_index(f'ix_{table}_{column}', table)
@@ -3,8 +3,8 @@
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer, HTTPBearer, HTTPAuthorizationCredentials
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer, HTTPBearer, HTTPAuthorizationCredentials, APIKeyHeader
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from pydantic import ValidationError
@@ -14,7 +14,9 @@ from sqlmodel import select
 from sqlalchemy.orm import selectinload
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.models import UserRole
+from app.core.api_key import ApiClientPrincipal, authenticate_api_key
+from app.core.token_claims import TokenPrincipal, encode_permissions, permission_versions
+from app.models import UserRole, UserRolePermission
 from setting import settings
 from database import get_session
 from app.models.user import User
@@ -34,15 +36,25 @@ oauth2_scheme = OAuth2PasswordBearer(
 
 # این اسکیمای امنیتی اصلی ما برای محافظت از اندپوینت‌ها است.
 # این اسکیم به Swagger می‌گوید که فقط یک فیلد برای وارد کردن "Bearer Token" نمایش بده.
-bearer_scheme = HTTPBearer()
+# auto_error=False: درخواست می‌تواند به جای توکن، هدر X-API-Key داشته باشد
+bearer_scheme = HTTPBearer(auto_error=False)
+
+# کلاینت‌های ماشینی (ربات تلگرام) با کلید API و بدون لاگین احراز هویت می‌شوند
+api_key_scheme = APIKeyHeader(name="X-API-Key", auto_error=False)
 
 ALGORITHM = "HS256"
 
+# کلید scope["state"] که /batch کاربر احراز هویت شده را در آن به زیر-درخواست‌ها می‌دهد.
+# فقط کد درون پروسه می‌تواند scope را بسازد، پس از بیرون قابل جعل نیست.
+BATCH_PRINCIPAL_STATE = "batch_principal"
+
 
-def create_access_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
+def create_access_token(subject: str | Any, expires_delta: timedelta | None = None,
+                        claims: dict[str, Any] | None = None) -> str:
     """
     ایجاد توکن JWT جدید.
     subject: شناسه‌ای که می‌خواهیم داخل توکن قرار دهیم (در اینجا شماره موبایل).
+    claims: داده‌های اضافه (uid, rid, perms, pv) برای احراز هویت بدون دیتابیس.
     """
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
@@ -50,11 +62,52 @@ def create_access_token(subject: str | Any, expires_delta: timedelta | None = No
         expire = datetime.now(timezone.utc) + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def create_refresh_token(subject: str | Any, user_id: int) -> str:
+    """توکن بلندمدت که فقط برای گرفتن توکن دسترسی جدید قابل استفاده است."""
+    return create_access_token(
+        subject,
+        expires_delta=timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+        claims={"typ": "refresh", "uid": user_id},
+    )
+
+
+async def issue_tokens(user: User, session: AsyncSession) -> dict[str, Any]:
+    """
+    صدور توکن دسترسی (کوتاه‌مدت، با دسترسی‌های نقش) و توکن refresh برای کاربر.
+    """
+    permissions = []
+    if user.role_id is not None:
+        statement = select(UserRolePermission).where(UserRolePermission.role_id == user.role_id)
+        permissions = (await session.exec(statement)).all()
+
+    versions = await permission_versions.get(session)
+    if versions.users.get(user.user_id) != (user.role_id, user.is_active):
+        # کاربر تازه ساخته شده یا جدول نسخه‌ها هنوز تغییر را ندیده
+        permission_versions.invalidate()
+        versions = await permission_versions.get(session)
+
+    access_token = create_access_token(
+        subject=user.mobile_number,
+        claims={
+            "uid": user.user_id,
+            "rid": user.role_id,
+            "perms": encode_permissions(permissions),
+            "pv": versions.roles.get(user.role_id, 0),
+        },
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "refresh_token": create_refresh_token(user.mobile_number, user.user_id),
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """بررسی تطابق رمز عبور ساده با نسخه هش شده."""
     return pwd_context.verify(plain_password, hashed_password)
@@ -66,15 +119,40 @@ def get_password_hash(password: str) -> str:
 
 
 async def get_current_user(
+        request: Request,
         session: AsyncSession = Depends(get_session),
         # همان وابستگی شما که به درستی کار می‌کند
-        credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-) -> User:
+        credentials: HTTPAuthorizationCredentials | None = Depends(bearer_scheme),
+        api_key: str | None = Depends(api_key_scheme),
+) -> User | TokenPrincipal | ApiClientPrincipal:
     """
     وابستگی (Dependency) برای دریافت کاربر فعلی از توکن JWT.
     این نسخه بهینه شده و اطلاعات نقش (Role) و دسترسی‌های (Permissions) کاربر را نیز
     همزمان با خود کاربر بارگذاری می‌کند.
+
+    اگر هدر X-API-Key ارسال شده باشد، کلاینت ماشینی از کش درون حافظه
+    شناسایی می‌شود (ApiClientPrincipal) و هیچ کوئری کاربری اجرا نمی‌شود.
+
+    زیر-درخواست‌های /batch کاربر را از درخواست اصلی می‌گیرند (یک بار برای کل batch).
     """
+    principal = request.scope.get("state", {}).get(BATCH_PRINCIPAL_STATE)
+    if principal is not None:
+        return principal
+
+    if api_key:
+        principal = await authenticate_api_key(api_key, session)
+        if principal is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid API key",
+                headers={"WWW-Authenticate": "ApiKey"},
+            )
+        return principal
+
+    if credentials is None:
+        # همان پاسخ HTTPBearer پیش‌فرض
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authenticated")
+
     token = credentials.credentials
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -89,6 +167,22 @@ async def get_current_user(
     except (JWTError, ValidationError):
         raise credentials_exception
 
+    # توکن refresh فقط در /login/refresh-token پذیرفته می‌شود
+    if token_data.typ != "access":
+        raise credentials_exception
+
+    # مسیر سریع: دسترسی‌ها داخل توکن هستند و نسخه آن‌ها هنوز معتبر است (بدون کوئری)
+    if token_data.uid is not None and token_data.perms is not None and token_data.pv is not None:
+        versions = await permission_versions.get(session)
+        if versions.is_current(token_data.uid, token_data.rid, token_data.pv):
+            return TokenPrincipal(
+                user_id=token_data.uid,
+                role_id=token_data.rid,
+                mobile_number=token_data.sub,
+                permissions=token_data.perms,
+            )
+
+    # توکن قدیمی یا دسترسی‌های تغییر کرده: کاربر و دسترسی‌های فعلی از دیتابیس
     mobile_number = token_data.sub
 
     # === فقط این بخش تغییر می‌کند (بهینه‌سازی کوئری) ===
@@ -118,8 +212,8 @@ async def get_current_user(
 
 async def get_current_active_user(
         # این تابع از تابع get_current_user شما استفاده می‌کند
-        current_user: User = Depends(get_current_user),
-) -> User:
+        current_user: User | TokenPrincipal | ApiClientPrincipal = Depends(get_current_user),
+) -> User | TokenPrincipal | ApiClientPrincipal:
     """
     وابستگی اصلی برای اندپوینت‌های محافظت شده.
     کاربر را از get_current_user می‌گیرد و چک می‌کند که آیا فعال (is_active) است یا خیر.
@@ -1,5 +1,7 @@
 # setting.py
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from pydantic import computed_field
 
@@ -14,7 +16,95 @@ class Settings(BaseSettings):
     POSTGRES_PORT: int = 5432
     SECRET_KEY: str
     ALGORITHM: str
-    ACCESS_TOKEN_EXPIRE_MINUTES: int
+    ACCESS_TOKEN_EXPIRE_MINUTES: int  # keep short (e.g. 15); clients renew with /login/refresh-token
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7
+    PERMISSION_VERSION_CACHE_SECONDS: float = 10.0  # role/permission edits on other workers apply within this time
+
+    # API keys (machine clients such as the Telegram bot)
+    API_KEY_SECRET: str | None = None  # HMAC key for hashed_api_key; falls back to SECRET_KEY
+    API_CLIENT_CACHE_SECONDS: float = 30.0  # revocations on other workers take effect within this time
+
+    # Server (main.py)
+    HOST: str = "0.0.0.0"
+    PORT: int = 8000
+    WORKERS: int = 1  # processes; each one has its own DB pool, rate limiter and metrics
+    SERVER_LOOP: Literal["auto", "uvloop", "asyncio"] = "auto"  # auto = uvloop when installed
+    SERVER_HTTP: Literal["auto", "httptools", "h11"] = "auto"  # auto = httptools when installed
+    KEEP_ALIVE_TIMEOUT: int = 75  # seconds; keep above the idle timeout of the reverse proxy
+    BACKLOG: int = 2048  # pending TCP connections queued by the kernel
+    GRACEFUL_TIMEOUT: int = 30  # seconds to drain in-flight requests on SIGTERM
+    LIMIT_MAX_REQUESTS: int | None = None  # recycle a worker after this many requests
+
+    # Caches & warm-up
+    CACHE_TTL_SECONDS: float = 60.0  # bot-message / drug catalog snapshots; writes on the same worker invalidate at once
+    WARMUP_CONNECTIONS: int = 5  # pool connections opened (and primed) before /health/ready turns green
+
+    # Batch endpoint
+    BATCH_MAX_REQUESTS: int = 20  # sub-requests per /batch call
+    BATCH_CONCURRENCY: int = 4  # sub-requests running at once (each may use its own DB connection)
+
+    # Serialization
+    FAST_SERIALIZATION: bool = True  # list endpoints skip response_model validation of ORM rows
+
+    # Idempotency-Key (POST /order/, /payment/)
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # how long a stored response can be replayed
+    IDEMPOTENCY_LOCK_SECONDS: float = 60.0  # a key still "in progress" after this is taken over (crashed worker)
+    IDEMPOTENCY_CACHE_SIZE: int = 10000  # in-memory front cache entries per worker
+    IDEMPOTENCY_CLEANUP_INTERVAL: float = 3600.0
+
+    # Outbox (side effects of status changes, e.g. bot notifications)
+    OUTBOX_WORKERS: int = 2  # asyncio workers per process; 0 disables delivery on this process
+    OUTBOX_BATCH_SIZE: int = 50  # events claimed per round trip
+    OUTBOX_POLL_INTERVAL: float = 1.0  # seconds between polls when idle (a commit on this worker wakes them at once)
+    OUTBOX_MAX_ATTEMPTS: int = 8  # then the event is dead-lettered
+    OUTBOX_BACKOFF_BASE: float = 2.0  # seconds; doubled after every failed attempt (with jitter)
+    OUTBOX_BACKOFF_MAX: float = 600.0
+    OUTBOX_LEASE_SECONDS: float = 60.0  # a claimed event is retried after this if its worker dies
+    OUTBOX_RETENTION_DAYS: int = 7  # delivered events older than this are purged
+    TELEGRAM_BOT_TOKEN: str | None = None  # patient notifications are skipped when unset
+    TELEGRAM_API_URL: str = "https://api.telegram.org"
+
+    # Change feed (GET /changes)
+    CHANGE_LOG_RETENTION_DAYS: int = 30  # older changes are purged; clients behind that get 410 and resync
+
+    # Status history & SLA report (GET /report/status-sla)
+    STATUS_ROLLUP_INTERVAL: float = 300.0  # seconds between rollup refreshes
+    STATUS_ROLLUP_DAYS: int = 2  # days always recomputed on each refresh (today and yesterday), more after an outage
+
+    # Message partitions (tbl_Message is range-partitioned by month on created_at)
+    MESSAGE_PARTITIONS_AHEAD: int = 3  # future monthly partitions created in advance
+    MESSAGE_RETENTION_MONTHS: int = 0  # older partitions are detached to the "archive" schema; 0 keeps everything
+    PARTITION_MAINTENANCE_INTERVAL: float = 86400.0
+
+    # Cold archive of closed cases (POST /archive/patients/{id}/rehydrate restores one)
+    ARCHIVE_AFTER_DAYS: int = 0  # completed patients idle longer than this are archived; 0 disables the job
+    ARCHIVE_DIR: str = "archive"  # segment files; must be shared by every host that runs the job or restores
+    ARCHIVE_BATCH_PATIENTS: int = 200  # patients per segment file
+    ARCHIVE_DELETE_CHUNK: int = 1000  # rows deleted per transaction after a segment is written
+    ARCHIVE_INTERVAL: float = 86400.0
+
+    # Compression (Accept-Encoding: br / gzip) & MessagePack (Accept: application/msgpack)
+    COMPRESSION_MIN_SIZE: int = 1024  # bytes; smaller bodies are sent as-is
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4  # 0-11; higher levels cost too much CPU per request
+
+    # Admin panel: "eager" builds it at import, "lazy" on the first /admin request,
+    # "off" serves the API only (run admin_panel.setup:create_admin_app separately)
+    ADMIN_MODE: Literal["eager", "lazy", "off"] = "lazy"
+
+    # Rate limit (per client IP)
+    RATE_LIMIT_COUNT: int = 500
+    RATE_LIMIT_SECONDS: int = 60
+
+    # Logging
+    LOG_JSON: bool = False  # compact JSON lines in logs/app.log instead of the text format
+    LOG_SAMPLING: dict[str, float] = {}  # e.g. {"uvicorn.access": 0.1} keeps 10% of access logs
+    DB_ECHO: bool = False  # log every SQL statement (through the logging queue)
+
+    # Monitoring
+    DEBUG: bool = False  # adds X-DB-Queries / X-DB-Time headers to every response
+    DB_QUERY_REPEAT_THRESHOLD: int = 5  # same statement this many times in one request is logged as N+1
+    METRICS_TOKEN: str | None = None  # bearer token for /metrics; the endpoint is disabled when unset
 
     @computed_field
     @property
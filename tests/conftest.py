@@ -0,0 +1,103 @@
+# tests/conftest.py
+"""
+Integration checks for the riskiest paths, against a throwaway Postgres
+database (triggers, SKIP LOCKED, advisory locks and partitions are
+Postgres-only, so there is no SQLite fallback).
+
+    TEST_POSTGRES_DB=pharma_test python -m pytest -q tests
+
+Every test drops and recreates the public schema of TEST_POSTGRES_DB, so it
+must never name a real database. Without it the tests are skipped. The other
+POSTGRES_* settings come from the environment / .env as usual.
+"""
+
+import asyncio
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+TEST_DB = os.environ.get("TEST_POSTGRES_DB")
+if TEST_DB:
+    os.environ["POSTGRES_DB"] = TEST_DB
+else:
+    # فقط برای import شدن ماژول‌ها؛ تست‌ها بدون TEST_POSTGRES_DB اجرا نمی‌شوند
+    for name, value in {"POSTGRES_SERVER": "localhost", "POSTGRES_USER": "-", "POSTGRES_PASSWORD": "-",
+                        "POSTGRES_DB": "-"}.items():
+        os.environ.setdefault(name, value)
+for name, value in {"SECRET_KEY": "test-secret", "ALGORITHM": "HS256", "ACCESS_TOKEN_EXPIRE_MINUTES": "15",
+                    "ADMIN_MODE": "off"}.items():
+    os.environ.setdefault(name, value)
+
+from sqlalchemy import text  # noqa: E402
+
+import config  # noqa: E402,F401  (DDL تریگرها روی metadata ثبت می‌شود)
+from app.core.cache import ALL_CACHES  # noqa: E402
+from app.core.idempotency import front_cache  # noqa: E402
+from app.core.permission import FormName  # noqa: E402
+from app.models import User, UserRole, UserRolePermission  # noqa: E402
+from database import async_session_maker, engine, init_db  # noqa: E402
+from security import get_password_hash  # noqa: E402
+
+ADMIN_MOBILE = "09120000000"
+ADMIN_PASSWORD = "secret-password"
+
+
+async def _reset_schema() -> None:
+    async with engine.begin() as conn:
+        await conn.execute(text("DROP SCHEMA public CASCADE"))
+        await conn.execute(text("CREATE SCHEMA public"))
+    await init_db()
+    async with async_session_maker() as session:
+        session.add(UserRole(role_id=1, role_name="admin", role_type=2))
+        await session.flush()
+        for form in FormName:
+            session.add(UserRolePermission(role_id=1, form_name=form.value, view=True, insert=True, update=True,
+                                           delete=True))
+        session.add(User(user_id=1, full_name="admin", mobile_number=ADMIN_MOBILE, national_code="0000000000",
+                         telegram_id="100", role_id=1, hashed_password=get_password_hash(ADMIN_PASSWORD),
+                         is_active=True))
+        await session.commit()
+
+
+def _run(test):
+    """Run an async test body on a fresh event loop; the pool is bound to that loop, so it is disposed after."""
+    async def main():
+        try:
+            return await test()
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def run():
+    if not TEST_DB:
+        pytest.skip("set TEST_POSTGRES_DB to a throwaway database to run the integration checks")
+    _run(_reset_schema)
+    for cache in ALL_CACHES:
+        cache.clear()
+    front_cache.clear()
+    return _run
+
+
+@asynccontextmanager
+async def _api():
+    transport = httpx.ASGITransport(app=config.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/login/access-token",
+                                     json={"username": ADMIN_MOBILE, "password": ADMIN_PASSWORD})
+        assert response.status_code == 200, response.text
+        client.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        yield client
+
+
+@pytest.fixture
+def api():
+    """`async with api() as client:` an in-process client logged in as the admin user (user_id=1)."""
+    return _api
@@ -0,0 +1,119 @@
+# tests/test_archive.py
+
+from datetime import timedelta
+from decimal import Decimal
+
+from sqlmodel import select
+
+from app.core import archive
+from app.core.enums import PatientStatus
+from app.models import Drug, Message, Order, OrderList, Patient, PaymentList
+from app.models.archive import ArchivedCase, ArchiveSegment
+from app.models.base import get_current_utc_naive
+from app.models.order import OrderStatusEnum
+from app.models.payment_list import PaymentStatusEnum
+from database import async_session_maker
+from setting import settings
+
+ARCHIVED_MODELS = (Order, OrderList, PaymentList, Message)
+
+
+async def _seed() -> None:
+    closed_at = get_current_utc_naive() - timedelta(days=40)
+    async with async_session_maker() as session:
+        # بیمار ۱ پرونده بسته دارد؛ سفارش بیمار ۲ هنوز باز است
+        for patient_id in (1, 2):
+            session.add(Patient(patient_id=patient_id, full_name=f"p{patient_id}", telegram_id=f"500{patient_id}",
+                                patient_status=PatientStatus.COMPLETED, status_changed_at=closed_at))
+        session.add(Drug(drugs_id=1, drug_pname="d1", unit="box", price=Decimal("1000")))
+        await session.flush()
+        session.add(Order(order_id=1, patient_id=1, user_id=1, order_status=OrderStatusEnum.DELIVERED))
+        session.add(Order(order_id=2, patient_id=2, user_id=1, order_status=OrderStatusEnum.SENT))
+        await session.flush()
+        session.add(OrderList(order_list_id=1, order_id=1, drug_id=1, qty=2, price=Decimal("1000.50")))
+        session.add(PaymentList(payment_list_id=1, order_id=1, user_id=1, payment_date=closed_at,
+                                payment_value=Decimal("2001.00"), payment_status=PaymentStatusEnum.ACCEPTED))
+        session.add(Message(messages_id=1, patient_id=1, user_id=1, messages="سلام", messages_seen=True,
+                            messages_sender=False, attachment_path=["a.jpg"]))
+        await session.commit()
+
+
+async def _rows(patient_id: int) -> dict[str, list[dict]]:
+    rows = {}
+    async with async_session_maker() as session:
+        for model in ARCHIVED_MODELS:
+            statement = select(model)
+            owner = model
+            if model in (OrderList, PaymentList):
+                statement = statement.join(Order, Order.order_id == model.order_id)
+                owner = Order
+            statement = statement.where(owner.patient_id == patient_id)
+            rows[model.__tablename__] = [row.model_dump() for row in (await session.exec(statement)).all()]
+    return rows
+
+
+def test_archive_purge_and_rehydrate_round_trip(run, api, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "ARCHIVE_AFTER_DAYS", 30)
+
+    async def body():
+        await _seed()
+        original = await _rows(1)
+        assert all(len(rows) == 1 for rows in original.values())
+        untouched = await _rows(2)
+
+        assert await archive.archive_closed_cases() == 1
+        async with async_session_maker() as session:
+            segment = (await session.exec(select(ArchiveSegment))).one()
+            case = (await session.exec(select(ArchivedCase))).one()
+        assert segment.purged_at is not None and segment.row_count == 4
+        assert (tmp_path / f"{segment.file_name}.sha256").read_text().split()[0] == segment.sha256
+        assert (case.patient_id, case.orders, case.order_items, case.payments, case.messages) == (1, 1, 1, 1, 1)
+        assert all(rows == [] for rows in (await _rows(1)).values())
+        assert await _rows(2) == untouched
+
+        # اجرای دوباره چیزی برای بایگانی ندارد
+        assert await archive.archive_closed_cases() == 0
+
+        async with api() as client:
+            response = await client.post("/archive/patients/1/rehydrate")
+            assert response.status_code == 200, response.text
+            assert response.json() == {"patient_id": 1, "cases": 1, "orders": 1, "order_items": 1, "payments": 1,
+                                       "messages": 1}
+            assert await _rows(1) == original
+
+            response = await client.post("/archive/patients/1/rehydrate")
+            assert response.status_code == 404
+
+    run(body)
+
+
+def test_rehydrate_refuses_a_tampered_or_missing_segment(run, api, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "ARCHIVE_AFTER_DAYS", 30)
+
+    async def body():
+        await _seed()
+        assert await archive.archive_closed_cases() == 1
+        async with async_session_maker() as session:
+            segment = (await session.exec(select(ArchiveSegment))).one()
+        path = tmp_path / segment.file_name
+        content = path.read_bytes()
+
+        async with api() as client:
+            path.write_bytes(content[:-1] + bytes([content[-1] ^ 1]))
+            response = await client.post("/archive/patients/1/rehydrate")
+            assert response.status_code == 409
+            assert "sha256" in response.json()["detail"]
+
+            path.unlink()
+            response = await client.post("/archive/patients/1/rehydrate")
+            assert response.status_code == 409
+            assert "missing" in response.json()["detail"]
+            assert all(rows == [] for rows in (await _rows(1)).values())
+
+            path.write_bytes(content)
+            response = await client.post("/archive/patients/1/rehydrate")
+            assert response.status_code == 200, response.text
+
+    run(body)
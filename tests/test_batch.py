@@ -0,0 +1,27 @@
+# tests/test_batch.py
+
+from decimal import Decimal
+
+from app.models import Drug
+from database import async_session_maker
+
+
+def test_sub_request_accept_header_does_not_change_the_body_format(run, api):
+    async def body():
+        async with async_session_maker() as session:
+            session.add(Drug(drugs_id=1, drug_pname="d1", unit="box", price=Decimal("1000")))
+            await session.commit()
+
+        async with api() as client:
+            response = await client.post("/batch", json={"requests": [
+                {"id": "json", "url": "/drug/1"},
+                {"id": "msgpack", "url": "/drug/1", "headers": {"Accept": "application/msgpack"}},
+            ]})
+        assert response.status_code == 200, response.text
+        json_result, msgpack_result = response.json()["responses"]
+        assert msgpack_result["status"] == 200
+        assert msgpack_result["headers"]["content-type"].startswith("application/json")
+        assert msgpack_result["body"] == json_result["body"]
+        assert msgpack_result["body"]["drug_pname"] == "d1"
+
+    run(body)
@@ -0,0 +1,40 @@
+# tests/test_bot.py
+
+from app.models import Order, Patient
+from app.models.order import OrderStatusEnum
+from database import async_session_maker
+
+
+def test_bootstrap_leaves_out_delivered_and_rejected_orders(run, api):
+    async def body():
+        async with async_session_maker() as session:
+            session.add(Patient(patient_id=1, full_name="p1", telegram_id="5001"))
+            await session.flush()
+            session.add_all([
+                Order(order_id=1, patient_id=1, user_id=1, order_status=OrderStatusEnum.CREATED),
+                Order(order_id=2, patient_id=1, user_id=1, order_status=OrderStatusEnum.DELIVERED),
+                Order(order_id=3, patient_id=1, user_id=1, order_status=OrderStatusEnum.REJECTED),
+                Order(order_id=4, patient_id=1, user_id=1, order_status=OrderStatusEnum.SENT),
+            ])
+            await session.commit()
+
+        async with api() as client:
+            response = await client.get("/bot/bootstrap/5001")
+        assert response.status_code == 200, response.text
+        data = response.json()
+        assert data["patient"]["patient_id"] == 1
+        assert data["staff_role"] is None
+        assert sorted(order["order_id"] for order in data["active_orders"]) == [1, 4]
+
+    run(body)
+
+
+def test_bootstrap_of_unknown_telegram_id(run, api):
+    async def body():
+        async with api() as client:
+            response = await client.get("/bot/bootstrap/404")
+        assert response.status_code == 200, response.text
+        assert response.json()["patient"] is None
+        assert response.json()["active_orders"] == []
+
+    run(body)
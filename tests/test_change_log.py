@@ -0,0 +1,84 @@
+# tests/test_change_log.py
+
+from datetime import timedelta
+
+from sqlalchemy import update
+
+from app.core.change_log import purge_old_changes
+from app.models import Order, Patient
+from app.models.base import get_current_utc_naive
+from app.models.change_log import ChangeLog
+from app.models.order import OrderStatusEnum
+from database import async_session_maker
+from setting import settings
+
+
+async def _seed() -> None:
+    async with async_session_maker() as session:
+        session.add(Patient(patient_id=1, full_name="p1", telegram_id="5001"))
+        await session.commit()
+        for order_id in (1, 2, 3):
+            session.add(Order(order_id=order_id, patient_id=1, user_id=1, order_status=OrderStatusEnum.CREATED))
+            await session.commit()
+
+
+def _changes(response) -> list[tuple[str, int, str, str | None]]:
+    return [(c["entity"], c["entity_id"], c["operation"], c["status"]) for c in response.json()["changes"]]
+
+
+def test_since_pages_through_new_changes_only(run, api):
+    async def body():
+        await _seed()
+        async with api() as client:
+            first = await client.get("/changes/", params={"since": 0, "limit": 3})
+            assert first.status_code == 200, first.text
+            assert _changes(first) == [("patient", 1, "insert", "awaiting_profile_completion"),
+                                       ("order", 1, "insert", "Created"), ("order", 2, "insert", "Created")]
+            assert first.json()["has_more"] is True
+
+            since = first.json()["next_since"]
+            second = await client.get("/changes/", params={"since": since, "limit": 3})
+            assert _changes(second) == [("order", 3, "insert", "Created")]
+            assert second.json()["has_more"] is False
+
+            since = second.json()["next_since"]
+            empty = await client.get("/changes/", params={"since": since})
+            assert empty.json() == {"changes": [], "next_since": since, "has_more": False}
+
+            async with async_session_maker() as session:
+                order = await session.get(Order, 2)
+                order.order_status = OrderStatusEnum.SENT
+                await session.commit()
+
+            latest = await client.get("/changes/", params={"since": since, "entity": "order"})
+            assert _changes(latest) == [("order", 2, "update", "Sent")]
+            assert latest.json()["next_since"] > since
+
+    run(body)
+
+
+def test_since_before_the_purged_changes_is_410(run, api):
+    async def body():
+        await _seed()
+        async with api() as client:
+            feed = await client.get("/changes/")
+            seqs = [change["seq"] for change in feed.json()["changes"]]
+
+            # دو تغییر اول از بازه نگهداری خارج شده‌اند
+            old = get_current_utc_naive() - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS + 1)
+            async with async_session_maker() as session:
+                await session.exec(update(ChangeLog).where(ChangeLog.seq.in_(seqs[:2])).values(changed_at=old))
+                await session.commit()
+            assert await purge_old_changes() == 2
+
+            expired = await client.get("/changes/", params={"since": seqs[0]})
+            assert expired.status_code == 410
+
+            resumed = await client.get("/changes/", params={"since": seqs[1]})
+            assert resumed.status_code == 200
+            assert [change["seq"] for change in resumed.json()["changes"]] == seqs[2:]
+
+            resync = await client.get("/changes/", params={"since": 0})
+            assert [change["seq"] for change in resync.json()["changes"]] == seqs[2:]
+
+    run(body)
@@ -0,0 +1,90 @@
+# tests/test_idempotency.py
+
+from decimal import Decimal
+
+from sqlalchemy import func, update
+from sqlmodel import select
+
+from app.core.idempotency import REPLAYED_HEADER, front_cache
+from app.models import Drug, Order, Patient
+from app.models.idempotency_key import IdempotencyKey
+from database import async_session_maker
+
+ORDER = {"patient_id": 1, "user_id": 1, "items": [{"drug_id": 1, "qty": 2}]}
+
+
+async def _seed() -> None:
+    async with async_session_maker() as session:
+        session.add(Patient(patient_id=1, full_name="p1", telegram_id="5001"))
+        session.add(Drug(drugs_id=1, drug_pname="d1", unit="box", price=Decimal("1000")))
+        await session.commit()
+
+
+async def _order_count() -> int:
+    async with async_session_maker() as session:
+        return (await session.exec(select(func.count()).select_from(Order))).one()
+
+
+def test_retry_replays_the_stored_response(run, api):
+    async def body():
+        await _seed()
+        async with api() as client:
+            first = await client.post("/order/", json=ORDER, headers={"Idempotency-Key": "k1"})
+            assert first.status_code == 201, first.text
+            assert REPLAYED_HEADER.lower() not in first.headers
+
+            # از جدول، نه فقط از کش حافظه (worker دیگر)
+            front_cache.clear()
+            retry = await client.post("/order/", json=ORDER, headers={"Idempotency-Key": "k1"})
+            assert retry.status_code == 201
+            assert retry.headers[REPLAYED_HEADER.lower()] == "true"
+            assert retry.content == first.content
+
+            other = await client.post("/order/", json=ORDER, headers={"Idempotency-Key": "k2"})
+            assert other.json()["order_id"] != first.json()["order_id"]
+        assert await _order_count() == 2
+
+    run(body)
+
+
+def test_same_key_for_a_different_request_is_422(run, api):
+    async def body():
+        await _seed()
+        async with api() as client:
+            first = await client.post("/order/", json=ORDER, headers={"Idempotency-Key": "k1"})
+            assert first.status_code == 201, first.text
+
+            changed_body = {**ORDER, "items": [{"drug_id": 1, "qty": 3}]}
+            response = await client.post("/order/", json=changed_body, headers={"Idempotency-Key": "k1"})
+            assert response.status_code == 422
+
+            response = await client.post("/order/?source=bot", json=ORDER, headers={"Idempotency-Key": "k1"})
+            assert response.status_code == 422
+
+            response = await client.post("/order/", json=ORDER,
+                                         headers={"Idempotency-Key": "k1", "Accept": "application/msgpack"})
+            assert response.status_code == 422
+        assert await _order_count() == 1
+
+    run(body)
+
+
+def test_retry_while_the_first_request_is_in_flight_is_409(run, api):
+    async def body():
+        await _seed()
+        async with api() as client:
+            first = await client.post("/order/", json=ORDER, headers={"Idempotency-Key": "k1"})
+            assert first.status_code == 201, first.text
+
+            # رزرو بدون پاسخ = درخواست اول هنوز در حال اجراست
+            async with async_session_maker() as session:
+                await session.exec(update(IdempotencyKey).values(status_code=None, content_type=None,
+                                                                 response_body=None))
+                await session.commit()
+            front_cache.clear()
+
+            retry = await client.post("/order/", json=ORDER, headers={"Idempotency-Key": "k1"})
+            assert retry.status_code == 409
+        assert await _order_count() == 1
+
+    run(body)
@@ -0,0 +1,40 @@
+# tests/test_negotiation.py
+
+from decimal import Decimal
+
+import msgpack
+
+from app.models import Drug
+from database import async_session_maker
+
+MSGPACK = "application/msgpack"
+
+
+def test_formats_have_their_own_etag_and_vary_on_accept(run, api):
+    async def body():
+        async with async_session_maker() as session:
+            session.add(Drug(drugs_id=1, drug_pname="d1", unit="box", price=Decimal("1000")))
+            await session.commit()
+
+        async with api() as client:
+            as_json = await client.get("/drug/1")
+            as_msgpack = await client.get("/drug/1", headers={"Accept": MSGPACK})
+            assert as_json.status_code == as_msgpack.status_code == 200
+            assert as_msgpack.headers["content-type"] == MSGPACK
+            assert msgpack.unpackb(as_msgpack.content)["drugs_id"] == as_json.json()["drugs_id"] == 1
+            for response in (as_json, as_msgpack):
+                assert "accept" in response.headers["vary"].lower()
+            assert as_json.headers["etag"] != as_msgpack.headers["etag"]
+
+            # بدنه JSON ذخیره شده نباید برای درخواست MessagePack با 304 تأیید شود
+            cross = await client.get("/drug/1", headers={"Accept": MSGPACK,
+                                                         "If-None-Match": as_json.headers["etag"]})
+            assert cross.status_code == 200
+            assert cross.headers["content-type"] == MSGPACK
+
+            same = await client.get("/drug/1", headers={"Accept": MSGPACK,
+                                                        "If-None-Match": as_msgpack.headers["etag"]})
+            assert same.status_code == 304
+            assert "accept" in same.headers["vary"].lower()
+
+    run(body)
@@ -0,0 +1,136 @@
+# tests/test_outbox.py
+
+from datetime import timedelta
+
+from sqlalchemy import update
+from sqlmodel import select
+
+from app.core import outbox
+from app.core.enums import OutboxStatusEnum
+from app.models import Order, Patient
+from app.models.base import get_current_utc_naive
+from app.models.order import OrderStatusEnum
+from app.models.outbox import OutboxEvent
+from database import async_session_maker
+from setting import settings
+
+EVENT = "test.event"
+
+
+async def _add_events(count: int) -> None:
+    async with async_session_maker() as session:
+        for number in range(1, count + 1):
+            session.add(OutboxEvent(event_type=EVENT, aggregate_type="test", aggregate_id=number))
+        await session.commit()
+
+
+async def _events() -> list[OutboxEvent]:
+    async with async_session_maker() as session:
+        return list((await session.exec(select(OutboxEvent).order_by(OutboxEvent.id))).all())
+
+
+async def _make_available() -> None:
+    async with async_session_maker() as session:
+        await session.exec(update(OutboxEvent).values(available_at=get_current_utc_naive() - timedelta(seconds=1)))
+        await session.commit()
+
+
+def test_status_change_writes_an_event_in_the_same_transaction(run):
+    async def body():
+        async with async_session_maker() as session:
+            session.add(Patient(patient_id=1, full_name="p1", telegram_id="5001"))
+            await session.flush()
+            order = Order(order_id=1, patient_id=1, user_id=1, order_status=OrderStatusEnum.CREATED)
+            session.add(order)
+            await session.commit()
+            assert await _events() == []
+
+            order.order_status = OrderStatusEnum.CONFIRM
+            await session.commit()
+
+            order.order_status = OrderStatusEnum.PAID
+            await session.flush()
+            await session.rollback()
+
+        events = await _events()
+        assert [(e.event_type, e.aggregate_id, e.payload) for e in events] == [
+            ("order.status_changed", 1, {"old": "Created", "new": "Confirm", "patient_id": 1})]
+
+    run(body)
+
+
+def test_claimed_events_are_leased_to_one_worker(run):
+    async def body():
+        await _add_events(5)
+        async with async_session_maker() as first, async_session_maker() as second:
+            claimed_first = await outbox.claim_batch(first, 3)
+            claimed_second = await outbox.claim_batch(second, 10)
+        assert [e.aggregate_id for e in claimed_first] == [1, 2, 3]
+        assert [e.aggregate_id for e in claimed_second] == [4, 5]
+        assert all(e.attempts == 1 for e in claimed_first + claimed_second)
+
+        async with async_session_maker() as session:
+            assert await outbox.claim_batch(session, 10) == []
+
+    run(body)
+
+
+def test_failed_delivery_is_retried_with_backoff(run, monkeypatch):
+    calls = []
+
+    async def flaky(session, outbox_event):
+        calls.append(outbox_event.id)
+        if len(calls) == 1:
+            raise RuntimeError("bot unreachable")
+
+    monkeypatch.setitem(outbox.HANDLERS, EVENT, [flaky])
+
+    async def body():
+        await _add_events(1)
+        assert await outbox.process_batch() == 1
+        [event] = await _events()
+        assert event.status == OutboxStatusEnum.PENDING
+        assert event.attempts == 1
+        assert event.last_error == "RuntimeError: bot unreachable"
+        assert event.available_at > get_current_utc_naive()
+
+        # هنوز زمان تلاش بعدی نرسیده
+        assert await outbox.process_batch() == 0
+        await _make_available()
+        assert await outbox.process_batch() == 1
+        [event] = await _events()
+        assert event.status == OutboxStatusEnum.DONE
+        assert event.attempts == 2
+        assert event.last_error is None
+        assert event.processed_at is not None
+
+    run(body)
+    assert len(calls) == 2
+
+
+def test_event_is_dead_lettered_after_max_attempts_or_a_permanent_error(run, monkeypatch):
+    async def failing(session, outbox_event):
+        if outbox_event.aggregate_id == 2:
+            raise outbox.PermanentDeliveryError("patient blocked the bot")
+        raise RuntimeError("bot unreachable")
+
+    monkeypatch.setitem(outbox.HANDLERS, EVENT, [failing])
+    monkeypatch.setattr(settings, "OUTBOX_MAX_ATTEMPTS", 2)
+
+    async def body():
+        await _add_events(2)
+        await outbox.process_batch()
+        first, second = await _events()
+        assert (first.status, first.attempts) == (OutboxStatusEnum.PENDING, 1)
+        assert (second.status, second.attempts) == (OutboxStatusEnum.DEAD, 1)
+
+        await _make_available()
+        await outbox.process_batch()
+        first, _ = await _events()
+        assert (first.status, first.attempts) == (OutboxStatusEnum.DEAD, 2)
+        assert first.last_error == "RuntimeError: bot unreachable"
+
+        await _make_available()
+        assert await outbox.process_batch() == 0
+
+    run(body)
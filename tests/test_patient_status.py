@@ -0,0 +1,84 @@
+# tests/test_patient_status.py
+
+from sqlmodel import select
+
+from app.core.enums import PatientStatus
+from app.models import Patient
+from app.models.outbox import OutboxEvent
+from database import async_session_maker
+
+
+async def _seed(*statuses: PatientStatus) -> None:
+    async with async_session_maker() as session:
+        for patient_id, patient_status in enumerate(statuses, start=1):
+            session.add(Patient(patient_id=patient_id, full_name=f"p{patient_id}", telegram_id=f"500{patient_id}",
+                                patient_status=patient_status))
+        await session.commit()
+
+
+async def _patients() -> dict[int, Patient]:
+    async with async_session_maker() as session:
+        return {patient.patient_id: patient for patient in (await session.exec(select(Patient))).all()}
+
+
+async def _events() -> list[tuple[str, int, dict]]:
+    async with async_session_maker() as session:
+        events = (await session.exec(select(OutboxEvent).order_by(OutboxEvent.aggregate_id))).all()
+        return [(event.event_type, event.aggregate_id, event.payload) for event in events]
+
+
+def test_disallowed_patient_transition_is_409(run, api):
+    async def body():
+        await _seed(PatientStatus.AWAITING_PAYMENT)
+        before = (await _patients())[1]
+        async with api() as client:
+            response = await client.patch("/patient/5001", json={"patient_status": "shipped", "address": "new"})
+            assert response.status_code == 409
+            assert "awaiting_payment" in response.json()["detail"]
+
+            unchanged = (await _patients())[1]
+            assert unchanged.patient_status == PatientStatus.AWAITING_PAYMENT
+            assert unchanged.address == before.address
+            assert await _events() == []
+
+            # ویرایش بدون وضعیت، status_changed_at را جابجا نمی‌کند
+            response = await client.patch("/patient/5001", json={"address": "new"})
+            assert response.status_code == 200, response.text
+            assert (await _patients())[1].status_changed_at == before.status_changed_at
+
+            response = await client.patch("/patient/5001", json={"patient_status": "payment_completed"})
+            assert response.status_code == 200, response.text
+            moved = (await _patients())[1]
+            assert moved.patient_status == PatientStatus.PAYMENT_COMPLETED
+            assert moved.status_changed_at > before.status_changed_at
+        assert await _events() == [("patient.status_changed", 1,
+                                    {"old": "awaiting_payment", "new": "payment_completed"})]
+
+    run(body)
+
+
+def test_bulk_transition_moves_only_patients_still_in_from_status(run, api):
+    async def body():
+        await _seed(PatientStatus.PAYMENT_CONFIRMED, PatientStatus.PAYMENT_CONFIRMED,
+                    PatientStatus.PAYMENT_CONFIRMED, PatientStatus.AWAITING_PAYMENT)
+        async with api() as client:
+            response = await client.post("/patient/status-transitions/", json={
+                "from_status": "payment_confirmed", "to_status": "awaiting_shipment", "patient_ids": [1, 2, 4]})
+            assert response.status_code == 200, response.text
+            assert response.json()["moved"] == 2
+            assert sorted(response.json()["patient_ids"]) == [1, 2]
+
+            response = await client.post("/patient/status-transitions/", json={
+                "from_status": "awaiting_payment", "to_status": "shipped"})
+            assert response.status_code == 409
+
+        patients = await _patients()
+        assert {patient_id: patient.patient_status for patient_id, patient in patients.items()} == {
+            1: PatientStatus.AWAITING_SHIPMENT, 2: PatientStatus.AWAITING_SHIPMENT,
+            3: PatientStatus.PAYMENT_CONFIRMED, 4: PatientStatus.AWAITING_PAYMENT}
+        assert patients[1].status_changed_at > patients[3].status_changed_at
+        assert await _events() == [
+            ("patient.status_changed", patient_id, {"old": "payment_confirmed", "new": "awaiting_shipment"})
+            for patient_id in (1, 2)]
+
+    run(body)
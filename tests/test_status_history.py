@@ -0,0 +1,61 @@
+# tests/test_status_history.py
+
+from datetime import datetime, time, timedelta
+
+from sqlmodel import select
+
+from app.core import status_history
+from app.models.base import get_current_utc_naive
+from app.models.status_history import StatusHistory, StatusRollup
+from database import async_session_maker
+
+
+async def _add_history(*days) -> None:
+    async with async_session_maker() as session:
+        for number, day in enumerate(days, start=1):
+            session.add(StatusHistory(entity="order", entity_id=number, from_status="CREATED", to_status="CONFIRM",
+                                      changed_at=datetime.combine(day, time(12)), duration_ms=60_000))
+        await session.commit()
+
+
+async def _rolled_up_days() -> list:
+    async with async_session_maker() as session:
+        return sorted((await session.exec(select(StatusRollup.day))).all())
+
+
+def test_rollups_catch_up_on_days_missed_during_an_outage(run, monkeypatch):
+    today = get_current_utc_naive().date()
+    days = [today - timedelta(days=offset) for offset in (10, 7, 4, 0)]
+
+    async def body():
+        # آخرین اجرا ده روز پیش بوده
+        await _add_history(days[0])
+        outage_start = datetime.combine(days[0], time(13))
+        monkeypatch.setattr(status_history, "get_current_utc_naive", lambda: outage_start)
+        assert await status_history.catch_up_rollups() == 1
+        assert await _rolled_up_days() == days[:1]
+
+        await _add_history(*days[1:])
+        monkeypatch.undo()
+        assert await status_history.rollup_start(today) == days[0]
+        await status_history.catch_up_rollups()
+        assert await _rolled_up_days() == days
+
+        # بدون عقب‌ماندگی فقط پنجره STATUS_ROLLUP_DAYS
+        assert await status_history.rollup_start(today) == today - timedelta(days=1)
+
+    run(body)
+
+
+def test_first_refresh_starts_from_the_first_history_day(run):
+    today = get_current_utc_naive().date()
+    days = [today - timedelta(days=offset) for offset in (40, 3)]
+
+    async def body():
+        assert await status_history.rollup_start(today) == today - timedelta(days=1)
+        await _add_history(*days)
+        assert await status_history.rollup_start(today) == days[0]
+        await status_history.catch_up_rollups()
+        assert await _rolled_up_days() == days
+
+    run(body)
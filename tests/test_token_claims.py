@@ -0,0 +1,126 @@
+# tests/test_token_claims.py
+
+from contextlib import contextmanager
+
+from jose import jwt
+from sqlalchemy import event
+from sqlmodel import select
+
+from app.core.permission import FormName
+from app.core.token_claims import PERMISSION_BITS
+from app.models import User, UserRolePermission
+from database import async_session_maker, engine
+from security import ALGORITHM, create_access_token, get_password_hash
+from setting import settings
+
+CLERK_MOBILE = "09120000001"
+CLERK_PASSWORD = "clerk-password"
+
+
+@contextmanager
+def _statements():
+    """SQL sent while the block runs."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+
+def _claims(token: str) -> dict:
+    return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+
+
+async def _order_view_permission_id() -> int:
+    async with async_session_maker() as session:
+        return (await session.exec(select(UserRolePermission.permission_id).where(
+            UserRolePermission.role_id == 1, UserRolePermission.form_name == FormName.ORDER.value))).one()
+
+
+def test_current_token_skips_the_user_query(run, api):
+    async def body():
+        async with api() as client:
+            token = client.headers["Authorization"].removeprefix("Bearer ")
+            assert _claims(token)["perms"][FormName.ORDER.value] == sum(PERMISSION_BITS.values())
+            # بار اول جدول نسخه‌ها بارگذاری می‌شود
+            assert (await client.get("/order/")).status_code == 200
+            with _statements() as statements:
+                response = await client.get("/order/")
+            assert response.status_code == 200, response.text
+            assert not [sql for sql in statements if '"tbl_User"' in sql]
+
+            # توکن قدیمی بدون claims از مسیر دیتابیس می‌گذرد
+            with _statements() as statements:
+                response = await client.get("/order/", headers={
+                    "Authorization": f"Bearer {create_access_token(subject='09120000000')}"})
+            assert response.status_code == 200, response.text
+            assert [sql for sql in statements if '"tbl_User"' in sql]
+
+    run(body)
+
+
+def test_revoked_permission_applies_to_old_and_refreshed_tokens(run, api):
+    async def body():
+        permission_id = await _order_view_permission_id()
+        async with api() as client:
+            login = (await client.post("/login/access-token",
+                                       json={"username": "09120000000", "password": "secret-password"})).json()
+            old_token = {"Authorization": f"Bearer {login['access_token']}"}
+            assert (await client.get("/order/", headers=old_token)).status_code == 200
+
+            response = await client.patch(f"/permission/{permission_id}", json={"view": False})
+            assert response.status_code == 200, response.text
+
+            # نسخه عوض شده: توکن قدیمی به مسیر دیتابیس می‌رود و دسترسی فعلی را می‌بیند
+            assert (await client.get("/order/", headers=old_token)).status_code == 403
+            assert (await client.get("/patient/", headers=old_token)).status_code == 200
+
+            refreshed = await client.post("/login/refresh-token", json={"refresh_token": login["refresh_token"]})
+            assert refreshed.status_code == 200, refreshed.text
+            new_token = refreshed.json()["access_token"]
+            bits = _claims(new_token)["perms"][FormName.ORDER.value]
+            assert bits == sum(PERMISSION_BITS.values()) - PERMISSION_BITS["view"]
+            with _statements() as statements:
+                response = await client.get("/order/", headers={"Authorization": f"Bearer {new_token}"})
+            assert response.status_code == 403
+            assert not [sql for sql in statements if '"tbl_User"' in sql]
+
+            # یک توکن refresh برای گرفتن توکن دسترسی است، نه برای صدا زدن API
+            response = await client.get("/patient/", headers={"Authorization": f"Bearer {login['refresh_token']}"})
+            assert response.status_code == 401
+
+    run(body)
+
+
+def test_deactivated_user_is_rejected_on_both_paths(run, api):
+    async def body():
+        async with async_session_maker() as session:
+            session.add(User(user_id=2, full_name="clerk", mobile_number=CLERK_MOBILE, national_code="0000000001",
+                             telegram_id="200", role_id=1, hashed_password=get_password_hash(CLERK_PASSWORD),
+                             is_active=True))
+            await session.commit()
+
+        async with api() as admin:
+            login = await admin.post("/login/access-token",
+                                     json={"username": CLERK_MOBILE, "password": CLERK_PASSWORD})
+            assert login.status_code == 200, login.text
+            tokens = login.json()
+            fast = {"Authorization": f"Bearer {tokens['access_token']}"}
+            legacy = {"Authorization": f"Bearer {create_access_token(subject=CLERK_MOBILE)}"}
+            assert (await admin.get("/patient/", headers=fast)).status_code == 200
+            assert (await admin.get("/patient/", headers=legacy)).status_code == 200
+
+            response = await admin.patch("/user/2", json={"is_active": False})
+            assert response.status_code == 200, response.text
+
+            assert (await admin.get("/patient/", headers=fast)).status_code == 403
+            assert (await admin.get("/patient/", headers=legacy)).status_code == 403
+            response = await admin.post("/login/refresh-token", json={"refresh_token": tokens["refresh_token"]})
+            assert response.status_code == 401
+
+    run(body)